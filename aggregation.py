@@ -0,0 +1,250 @@
+# ==================== aggregation.py ====================
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from models import Requirement, RequirementTable, TokenUsage, ValidationResult, intern_strings
+
+TYPE_NAMES: Tuple[str, ...] = tuple(t.value for t in RequirementTable.TYPES)
+HISTOGRAM_BINS = np.linspace(0, 100, 11)
+PERCENTILES = (10, 25, 50, 75, 90, 99)
+
+# Enum.__hash__ 为Python层实现，逐条取类型编码时按对象id查表更快
+_TYPE_CODES_BY_ID = {id(t): code for t, code in RequirementTable.TYPE_CODES.items()}
+
+class RequirementMatrix:
+    """需求得分与缺失要素指示矩阵
+
+    scores: (n,) 得分；type_codes: (n,) 类型编码（RequirementTable.TYPES下标）；
+    missing: (n, m) 布尔矩阵，列对应 element_names。
+    """
+
+    def __init__(self, scores: np.ndarray, type_codes: np.ndarray,
+                 missing: np.ndarray, element_names: List[str]):
+        self.scores = scores
+        self.type_codes = type_codes
+        self.missing = missing
+        self.element_names = element_names
+
+    @classmethod
+    def from_requirements(cls, requirements: Union[Sequence[Requirement], RequirementTable],
+                          element_names: Optional[List[str]] = None) -> "RequirementMatrix":
+        if isinstance(requirements, RequirementTable):
+            return cls._from_table(requirements, element_names)
+
+        element_index = {name: i for i, name in enumerate(element_names or [])}
+        element_names = list(element_names or [])
+        rows, cols = [], []
+        for row, req in enumerate(requirements):
+            for elem in req.missing_elements:
+                col = element_index.get(elem)
+                if col is None:
+                    col = element_index[elem] = len(element_names)
+                    element_names.append(elem)
+                rows.append(row)
+                cols.append(col)
+
+        count = len(requirements)
+        missing = np.zeros((count, len(element_names)), dtype=bool)
+        missing[rows, cols] = True
+        scores = np.fromiter((req.completeness_score for req in requirements), dtype=np.float64, count=count)
+        type_codes = np.fromiter(
+            (_TYPE_CODES_BY_ID[id(req.req_type)] for req in requirements), dtype=np.uint8, count=count
+        )
+        return cls(scores, type_codes, missing, element_names)
+
+    @classmethod
+    def _from_table(cls, table: RequirementTable,
+                    element_names: Optional[List[str]]) -> "RequirementMatrix":
+        # 表中缺失要素组合已去重，先为每种组合建指示行，再按下标整体展开
+        element_index = {name: i for i, name in enumerate(element_names or [])}
+        element_names = list(element_names or [])
+        for combo in table.missing_vocab:
+            for elem in combo:
+                if elem not in element_index:
+                    element_index[elem] = len(element_names)
+                    element_names.append(elem)
+
+        vocab_matrix = np.zeros((len(table.missing_vocab), len(element_names)), dtype=bool)
+        for code, combo in enumerate(table.missing_vocab):
+            vocab_matrix[code, [element_index[elem] for elem in combo]] = True
+
+        # 复制而非frombuffer：导出缓冲区的array无法再追加
+        codes = np.array(table.missing_codes, dtype=np.int64)
+        return cls(
+            scores=np.array(table.scores, dtype=np.float64),
+            type_codes=np.array(table.type_codes, dtype=np.uint8),
+            missing=vocab_matrix[codes],
+            element_names=element_names
+        )
+
+    def __len__(self) -> int:
+        return len(self.scores)
+
+    def complete_mask(self) -> np.ndarray:
+        return ~self.missing.any(axis=1)
+
+    def missing_counts_by_type(self) -> Dict[str, Dict[str, int]]:
+        """按需求类型统计各缺失要素数量，与逐条累加的结果一致"""
+        if not len(self) or not self.missing.shape[1]:
+            return {}
+
+        type_count = len(RequirementTable.TYPES)
+        one_hot = np.zeros((len(self), type_count), dtype=np.int64)
+        one_hot[np.arange(len(self)), self.type_codes] = 1
+        counts = one_hot.T @ self.missing.astype(np.int64)
+
+        missing_by_type = {}
+        for type_code in np.flatnonzero(counts.sum(axis=1)):
+            row = counts[type_code]
+            missing_by_type[TYPE_NAMES[type_code]] = {
+                self.element_names[col]: int(row[col]) for col in np.flatnonzero(row)
+            }
+        return missing_by_type
+
+def evaluate_against_criteria(requirements: Union[Sequence[Requirement], RequirementTable],
+                              criteria: Dict[str, List[str]]):
+    """按完整性标准批量补充缺失要素并修正得分（原地修改）"""
+    if not len(requirements):
+        return requirements
+
+    element_names = intern_strings(dict.fromkeys(elem for elems in criteria.values() for elem in elems))
+    criteria_index = {name: i for i, name in enumerate(element_names)}
+    matrix = RequirementMatrix.from_requirements(requirements, element_names)
+
+    expected = np.zeros((len(TYPE_NAMES), len(matrix.element_names)), dtype=bool)
+    for type_code, type_name in enumerate(TYPE_NAMES):
+        for elem in criteria.get(type_name, []):
+            expected[type_code, criteria_index[elem]] = True
+
+    rows, cols = [], []
+    for row, req in enumerate(requirements):
+        for name in req.elements:
+            col = criteria_index.get(name)
+            if col is not None:
+                rows.append(row)
+                cols.append(col)
+    present = np.zeros_like(matrix.missing)
+    present[rows, cols] = True
+    # 评估结果列为缺失的要素不算已描述：elements 可能来自本地线索词，不能据此抬高模型给出的得分
+    present &= ~matrix.missing
+
+    req_expected = expected[matrix.type_codes]
+    missing_from_config = req_expected & ~present
+    combined = matrix.missing | missing_from_config
+
+    expected_count = req_expected.sum(axis=1)
+    has_criteria = expected_count > 0
+    config_scores = np.zeros(len(matrix))
+    config_scores[has_criteria] = (
+        1 - missing_from_config[has_criteria].sum(axis=1) / expected_count[has_criteria]
+    ) * 100
+    new_scores = np.where(has_criteria, np.maximum(matrix.scores, config_scores), matrix.scores)
+
+    # 相同的缺失组合只构造一次列表
+    if combined.shape[1]:
+        _, first_rows, inverse = np.unique(_row_keys(combined), return_index=True, return_inverse=True)
+        inverse = inverse.reshape(-1)
+        pattern_lists = [[matrix.element_names[col] for col in np.flatnonzero(combined[r])] for r in first_rows]
+    else:
+        inverse = np.zeros(len(matrix), dtype=np.int64)
+        pattern_lists = [[]]
+
+    for row, req in enumerate(requirements):
+        req.missing_elements = list(pattern_lists[inverse[row]])
+        if has_criteria[row]:
+            req.completeness_score = float(new_scores[row])
+    return requirements
+
+def _row_keys(matrix: np.ndarray) -> np.ndarray:
+    """把布尔矩阵每行压成一个可排序的键，比 np.unique(axis=0) 快一个数量级"""
+    if matrix.shape[1] <= 63:
+        weights = np.left_shift(np.int64(1), np.arange(matrix.shape[1], dtype=np.int64))
+        return matrix.astype(np.int64) @ weights
+    packed = np.ascontiguousarray(np.packbits(matrix, axis=1))
+    return packed.view(np.dtype((np.void, packed.shape[1]))).reshape(-1)
+
+def summarize_document(requirements: Union[Sequence[Requirement], RequirementTable]) -> Dict:
+    """单文档统计：总数、完整数、平均分、按类型缺失要素"""
+    matrix = RequirementMatrix.from_requirements(requirements)
+    return {
+        "total_requirements": len(matrix),
+        "complete_requirements": int(matrix.complete_mask().sum()),
+        "completeness_score": float(matrix.scores.mean()) if len(matrix) else 0.0,
+        "missing_elements_by_type": matrix.missing_counts_by_type()
+    }
+
+@dataclass
+class BatchStatistics:
+    """跨文档批量统计"""
+    document_count: int = 0
+    requirement_count: int = 0
+    document_score_percentiles: Dict[str, float] = field(default_factory=dict)
+    requirement_score_percentiles: Dict[str, float] = field(default_factory=dict)
+    score_histogram: List[Tuple[str, int]] = field(default_factory=list)
+    type_statistics: Dict[str, Dict[str, float]] = field(default_factory=dict)
+    top_missing_elements: List[Tuple[str, int]] = field(default_factory=list)
+    token_usage: TokenUsage = field(default_factory=TokenUsage)
+    estimated_cost: float = 0.0
+
+def summarize_batch(results: Sequence[ValidationResult], top_n: int = 20) -> BatchStatistics:
+    stats = BatchStatistics(document_count=len(results))
+    if not results:
+        return stats
+
+    for result in results:
+        stats.token_usage.add(result.token_usage)
+        stats.estimated_cost += result.estimated_cost
+
+    element_names: List[str] = []
+    matrices = []
+    for result in results:
+        matrix = RequirementMatrix.from_requirements(result.requirements_details, element_names)
+        element_names = matrix.element_names
+        matrices.append(matrix)
+
+    width = len(element_names)
+    scores = np.concatenate([m.scores for m in matrices]) if matrices else np.zeros(0)
+    type_codes = np.concatenate([m.type_codes for m in matrices])
+    missing = np.vstack([
+        np.pad(m.missing, ((0, 0), (0, width - m.missing.shape[1]))) for m in matrices
+    ]) if width else np.zeros((len(scores), 0), dtype=bool)
+
+    doc_scores = np.array([r.completeness_score for r in results], dtype=np.float64)
+    stats.requirement_count = len(scores)
+    stats.document_score_percentiles = _percentiles(doc_scores)
+    stats.requirement_score_percentiles = _percentiles(scores)
+
+    if len(scores):
+        hist, edges = np.histogram(np.clip(scores, 0, 100), bins=HISTOGRAM_BINS)
+        stats.score_histogram = [
+            (f"{edges[i]:.0f}-{edges[i + 1]:.0f}", int(hist[i])) for i in range(len(hist))
+        ]
+
+        complete = ~missing.any(axis=1)
+        for type_code in np.unique(type_codes):
+            mask = type_codes == type_code
+            stats.type_statistics[TYPE_NAMES[type_code]] = {
+                "count": int(mask.sum()),
+                "mean_score": float(scores[mask].mean()),
+                "complete_ratio": float(complete[mask].mean())
+            }
+
+    if width:
+        totals = missing.sum(axis=0)
+        order = np.argsort(-totals, kind="stable")[:top_n]
+        stats.top_missing_elements = [
+            (element_names[col], int(totals[col])) for col in order if totals[col] > 0
+        ]
+    return stats
+
+def _percentiles(values: np.ndarray) -> Dict[str, float]:
+    if not len(values):
+        return {}
+    points = np.percentile(values, PERCENTILES)
+    summary = {f"p{p}": float(v) for p, v in zip(PERCENTILES, points)}
+    summary["mean"] = float(values.mean())
+    summary["min"] = float(values.min())
+    summary["max"] = float(values.max())
+    return summary
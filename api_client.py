@@ -1,110 +1,255 @@
 # ==================== api_client.py ====================
-import json
+import math
 import re
+import threading
 import time
-from typing import Dict
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait
+from typing import Dict, List, Optional, Tuple, Union
 import requests
 
 from config import Config
+from transport import RecordReplayAdapter
+from endpoint_pool import EndpointPool
+from prompts import PromptLibrary
+from metrics import metrics
+
+class _Attempt:
+    """对冲中的一次发送：等待并发额度时可被放弃；sent 在请求发出（或放弃、失败）后置位"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._state = "waiting"
+        self.sent = threading.Event()
+    
+    def claim(self) -> bool:
+        """取得并发额度后标记为发送中；已被放弃时返回 False"""
+        with self._lock:
+            if self._state != "waiting":
+                return False
+            self._state = "sending"
+            return True
+    
+    def abandon(self) -> bool:
+        """放弃尚未发送的请求；已发送时返回 False"""
+        with self._lock:
+            if self._state != "waiting":
+                return False
+            self._state = "abandoned"
+        self.sent.set()
+        return True
 
 class DeepSeekAPI:
     """DeepSeek API调用封装"""
     
+    LATENCY_WINDOW = 200
+    
     def __init__(self, config: Config):
         self.config = config
         self.session = requests.Session()
         self.session.headers.update({
-            "Authorization": f"Bearer {config.API_KEY}",
             "Content-Type": "application/json"
         })
+        self.pool = EndpointPool(config)
+        self.prompts = PromptLibrary(config.COMPLETENESS_CRITERIA)
         
-    def generate_prompt(self, prompt_type: str, text: str, context: Dict = None) -> str:
-        if prompt_type == "parse":
-            return self._create_parse_prompt(text)
-        elif prompt_type == "evaluate":
-            return self._create_evaluate_prompt(text, context)
-        elif prompt_type == "report":
-            return self._create_report_prompt(text, context)
-        else:
-            raise ValueError(f"未知的提示类型: {prompt_type}")
-    
-    def _create_parse_prompt(self, text: str) -> str:
-        return f"""你是一位资深需求工程师，请解析以下需求文档片段：
-
-提取所有需求条目并按类别分类：
-- 功能需求
-- 非功能需求
-- 接口需求
-
-输出JSON格式：
-{{
-  "requirements": [
-    {{
-      "id": "自动生成的唯一ID",
-      "text": "需求描述文本",
-      "type": "功能需求|非功能需求|接口需求",
-      "elements": {{}}
-    }}
-  ]
-}}
-
-文档片段：
-{text[:5000]}
-请开始解析："""
+        # 进程内共享的并发预算，多个文档或服务任务同时运行时不超过上限
+        self._inflight_limit = (
+            threading.BoundedSemaphore(config.API_MAX_CONCURRENCY) if config.API_MAX_CONCURRENCY > 0 else None
+        )
+        
+        # 对冲请求：近期成功请求耗时的滑动窗口决定等待阈值
+        self._latencies = deque(maxlen=self.LATENCY_WINDOW)
+        self._latency_lock = threading.Lock()
+        self._inflight_requests = 0
+        self._inflight_hedges = 0
+        self._hedge_executor = None
+        if config.HEDGE_REQUESTS:
+            self._hedge_executor = ThreadPoolExecutor(
+                max_workers=2 * (config.API_MAX_CONCURRENCY or 32),
+                thread_name_prefix="api-hedge"
+            )
+        
+        self.transport = None
+        if config.API_TRANSPORT != "live":
+            self.transport = RecordReplayAdapter(config.API_TRANSPORT, config.RECORDINGS_DIR)
+            self.session.mount("http://", self.transport)
+            self.session.mount("https://", self.transport)
+        
+    def generate_prompt(self, prompt_type: str, text: str, context: Dict = None) -> List[Dict]:
+        """生成消息列表（system + user），静态说明在前、可变内容在后，见 prompts.py"""
+        return self.prompts.render(prompt_type, text, context)
     
-    def _create_evaluate_prompt(self, text: str, context: Dict) -> str:
-        criteria = context.get("criteria", self.config.COMPLETENESS_CRITERIA)
-        return f"""评估需求条目的完整性。
-
-完整性评估标准：
-{json.dumps(criteria, indent=2, ensure_ascii=False)}
-
-输入数据：
-{text}
-
-输出JSON格式：
-{{
-  "requirements": [
-    {{
-      "id": "需求ID",
-      "completeness_score": 85.5,
-      "missing_elements": ["验收标准", "异常处理"],
-      "improvement_suggestions": ["具体建议"]
-    }}
-  ]
-}}
-请开始评估："""
-    
-    def call_api(self, prompt: str, retry_count: int = 0) -> Dict:
+    def call_api(self, prompt: Union[str, List[Dict]], retry_count: int = 0,
+                 max_tokens: Optional[int] = None) -> Dict:
+        messages = [{"role": "user", "content": prompt}] if isinstance(prompt, str) else prompt
         payload = {
             "model": self.config.MODEL_NAME,
-            "messages": [{"role": "user", "content": prompt}],
+            "messages": messages,
             "temperature": self.config.TEMPERATURE,
             "top_p": self.config.TOP_P,
-            "max_tokens": self.config.MAX_TOKENS,
+            "max_tokens": max_tokens or self.config.MAX_TOKENS,
             "stream": False
         }
         
+        try:
+            result = self._send_hedged(payload) if self._hedge_executor else self._send(payload)
+            if "choices" not in result or len(result["choices"]) == 0:
+                raise ValueError("API响应格式错误")
+            return result
+        except requests.exceptions.RequestException as e:
+            metrics.record_error("api", e)
+            error = e
+        
+        # 重试放在计时之外，单次请求耗时不包含退避等待
+        if retry_count < self.config.MAX_RETRIES:
+            metrics.inc("api_retries_total")
+            wait_time = 2 ** retry_count
+            time.sleep(wait_time)
+            return self.call_api(prompt, retry_count + 1, max_tokens)
+        raise Exception(f"API调用失败，已达最大重试次数: {error}")
+    
+    def _send(self, payload: Dict, attempt: Optional["_Attempt"] = None) -> Optional[Dict]:
+        """选择端点发送一次请求，失败时抛出 RequestException。
+        attempt 在取得并发额度前已被放弃时不发送，返回 None"""
+        if self._inflight_limit:
+            self._inflight_limit.acquire()
+        if attempt is not None and not attempt.claim():
+            if self._inflight_limit:
+                self._inflight_limit.release()
+            return None
+        try:
+            endpoint = self.pool.acquire()
+        except BaseException:
+            if self._inflight_limit:
+                self._inflight_limit.release()
+            raise
+        finally:
+            if attempt is not None:
+                attempt.sent.set()
+        payload = dict(payload, model=endpoint.model or self.config.MODEL_NAME)
+        metrics.add_gauge("api_inflight_requests", 1)
+        with self._latency_lock:
+            self._inflight_requests += 1
+        start_time = time.perf_counter()
+        outcome = "error"
+        response = None
         try:
             response = self.session.post(
-                self.config.API_URL,
+                endpoint.url,
                 json=payload,
+                headers={"Authorization": f"Bearer {endpoint.api_key}"},
                 timeout=self.config.TIMEOUT
             )
+            outcome = str(response.status_code)
             response.raise_for_status()
             result = response.json()
-            
-            if "choices" not in result or len(result["choices"]) == 0:
-                raise ValueError("API响应格式错误")
+            self._record_usage(result.get("usage") or {})
             return result
-            
-        except requests.exceptions.RequestException as e:
-            if retry_count < self.config.MAX_RETRIES:
-                wait_time = 2 ** retry_count
-                time.sleep(wait_time)
-                return self.call_api(prompt, retry_count + 1)
-            else:
-                raise Exception(f"API调用失败，已达最大重试次数: {e}")
+        finally:
+            latency = time.perf_counter() - start_time
+            if self._inflight_limit:
+                self._inflight_limit.release()
+            self.pool.release(endpoint, outcome == "200", latency, outcome, *self._rate_limit_headers(response))
+            metrics.add_gauge("api_inflight_requests", -1)
+            with self._latency_lock:
+                self._inflight_requests -= 1
+            metrics.observe("api_request_duration_seconds", latency, status=outcome)
+            metrics.inc("api_requests_total", status=outcome, endpoint=endpoint.name)
+            if outcome == "200":
+                with self._latency_lock:
+                    self._latencies.append(latency)
+    
+    def _send_hedged(self, payload: Dict) -> Dict:
+        """请求发出后超过近期耗时分位数仍未返回时再发一个相同请求，取先成功者。
+        落后的请求尚未发出时放弃；已发出的照常计费，其用量放在结果的 hedge_usage 中"""
+        primary_attempt = _Attempt()
+        primary = self._hedge_executor.submit(self._send, payload, primary_attempt)
+        delay = self.hedge_delay()
+        if delay is None:
+            return primary.result()
+        # 从请求实际发出时计时，等待并发额度与端点配额的时间不计入
+        primary_attempt.sent.wait()
+        if wait([primary], timeout=delay).done or not self._reserve_hedge():
+            return primary.result()
+        
+        metrics.inc("api_hedged_requests_total", result="sent")
+        hedge_attempt = _Attempt()
+        hedge = self._hedge_executor.submit(self._send, payload, hedge_attempt)
+        hedge.add_done_callback(lambda _: self._release_hedge())
+        attempts = {primary: (hedge, hedge_attempt), hedge: (primary, primary_attempt)}
+        error = None
+        for future in as_completed([primary, hedge]):
+            try:
+                result = future.result()
+            except requests.exceptions.RequestException as e:
+                error = e
+                continue
+            metrics.inc("api_hedged_requests_total", result="won" if future is hedge else "lost")
+            loser_usage = self._loser_usage(*attempts[future], result)
+            return dict(result, hedge_usage=loser_usage) if loser_usage else result
+        raise error
+    
+    @staticmethod
+    def _loser_usage(loser, attempt: "_Attempt", winner: Dict) -> Optional[Dict]:
+        """落后请求的用量：未发出则放弃且不计；已失败不计；仍在途时按同一请求的胜出者用量计"""
+        if attempt.abandon():
+            return None
+        if loser.done():
+            try:
+                return (loser.result() or {}).get("usage")
+            except requests.exceptions.RequestException:
+                return None
+        return winner.get("usage")
+    
+    def _reserve_hedge(self) -> bool:
+        """在途对冲请求数不超过在途请求数的 HEDGE_BUDGET 比例（至少允许一个）"""
+        with self._latency_lock:
+            allowed = max(1, int(self.config.HEDGE_BUDGET * self._inflight_requests))
+            if self._inflight_hedges >= allowed:
+                metrics.inc("api_hedged_requests_total", result="over_budget")
+                return False
+            self._inflight_hedges += 1
+            return True
+    
+    def _release_hedge(self):
+        with self._latency_lock:
+            self._inflight_hedges -= 1
+    
+    def hedge_delay(self) -> Optional[float]:
+        """对冲等待阈值：近期成功请求耗时的 HEDGE_PERCENTILE 分位数，不低于 HEDGE_MIN_DELAY；样本不足时返回 None"""
+        with self._latency_lock:
+            samples = sorted(self._latencies)
+        if len(samples) < max(1, self.config.HEDGE_MIN_SAMPLES):
+            return None
+        rank = math.ceil(self.config.HEDGE_PERCENTILE / 100 * len(samples))
+        return max(self.config.HEDGE_MIN_DELAY, samples[min(len(samples), max(rank, 1)) - 1])
+    
+    def endpoint_stats(self) -> List[Dict]:
+        """各端点的请求数、失败数、平均耗时与熔断状态"""
+        return self.pool.stats()
+    
+    @staticmethod
+    def _rate_limit_headers(response) -> Tuple[Optional[float], Optional[int]]:
+        if response is None:
+            return None, None
+        retry_after = response.headers.get("Retry-After") if response.status_code == 429 else None
+        remaining = response.headers.get("x-ratelimit-remaining-requests")
+        try:
+            return (float(retry_after) if retry_after else None,
+                    int(remaining) if remaining is not None else None)
+        except ValueError:
+            return None, None
+    
+    def _record_usage(self, usage: Dict):
+        for field in ("prompt_tokens", "completion_tokens", "prompt_cache_hit_tokens", "prompt_cache_miss_tokens"):
+            if usage.get(field):
+                metrics.inc("api_tokens_total", usage[field], kind=field.replace("_tokens", ""))
+    
+    @staticmethod
+    def is_truncated(response: Dict) -> bool:
+        """响应是否因达到 max_tokens 而被截断"""
+        return response["choices"][0].get("finish_reason") == "length"
     
     def extract_content(self, response: Dict) -> str:
         try:
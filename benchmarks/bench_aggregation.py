@@ -0,0 +1,60 @@
+"""
+结果聚合基准：逐条Python循环 vs NumPy矩阵聚合
+用法：python benchmarks/bench_aggregation.py --count 1000000 --documents 1000
+"""
+
+import argparse
+import time
+
+from common import make_requirements
+
+from aggregation import summarize_batch, summarize_document
+from models import RequirementTable, ValidationResult
+
+def loop_summary(requirements):
+    # 旧版 _calculate_results 的逐条累加实现
+    complete = sum(1 for req in requirements if not req.missing_elements)
+    score = sum(req.completeness_score for req in requirements) / max(len(requirements), 1)
+    missing_by_type = {}
+    for req in requirements:
+        if req.missing_elements:
+            req_type = req.req_type.value
+            if req_type not in missing_by_type:
+                missing_by_type[req_type] = {}
+            for elem in req.missing_elements:
+                missing_by_type[req_type][elem] = missing_by_type[req_type].get(elem, 0) + 1
+    return complete, score, missing_by_type
+
+def timed(label: str, func, *args):
+    start_time = time.perf_counter()
+    func(*args)
+    print(f"{label:28} {time.perf_counter() - start_time:>8.2f} 秒")
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="结果聚合基准")
+    arg_parser.add_argument("--count", type=int, default=1000000)
+    arg_parser.add_argument("--documents", type=int, default=1000)
+    args = arg_parser.parse_args()
+    
+    requirements = list(make_requirements(args.count))
+    table = RequirementTable(requirements)
+    print(f"需求数: {args.count}, 文档数: {args.documents}")
+    
+    timed("逐条循环(list)", loop_summary, requirements)
+    timed("矩阵聚合(list)", summarize_document, requirements)
+    timed("矩阵聚合(RequirementTable)", summarize_document, table)
+    
+    per_doc = args.count // args.documents
+    results = [
+        ValidationResult(
+            document_id=str(i), document_name=f"doc{i}.docx", total_requirements=per_doc,
+            complete_requirements=0, completeness_score=50.0, missing_elements_by_type={},
+            requirements_details=RequirementTable(requirements[i * per_doc:(i + 1) * per_doc]),
+            validation_time=1.0, generated_at=""
+        )
+        for i in range(args.documents)
+    ]
+    timed("批量统计(RequirementTable)", summarize_batch, results)
+
+if __name__ == "__main__":
+    main()
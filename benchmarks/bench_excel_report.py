@@ -0,0 +1,79 @@
+"""
+Excel报告生成基准：流式write-only写入 vs DataFrame写入
+用法：python benchmarks/bench_excel_report.py --sizes 1000 10000 50000
+每种模式在独立子进程中运行，以便分别统计峰值RSS。
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import time
+
+from common import bench_output_dir, make_result, peak_rss_mb
+
+def run_stream(count: int) -> dict:
+    from report_generator import ReportGenerator
+    
+    result = make_result(count)
+    baseline_rss = peak_rss_mb()
+    output_path = bench_output_dir() / f"excel_stream_{count}.xlsx"
+    
+    start_time = time.perf_counter()
+    ReportGenerator().generate_excel_report(result, str(output_path))
+    return {"seconds": time.perf_counter() - start_time, "peak_rss_mb": peak_rss_mb(),
+            "baseline_rss_mb": baseline_rss}
+
+def run_dataframe(count: int) -> dict:
+    # 旧实现：先构建DataFrame，再以普通模式写入
+    import pandas as pd
+    
+    result = make_result(count)
+    baseline_rss = peak_rss_mb()
+    output_path = bench_output_dir() / f"excel_dataframe_{count}.xlsx"
+    
+    start_time = time.perf_counter()
+    data = []
+    for req in result.requirements_details:
+        data.append({
+            "需求ID": req.id,
+            "需求类型": req.req_type.value,
+            "需求描述": req.text[:200],
+            "完整性得分": req.completeness_score,
+            "缺失要素": ", ".join(req.missing_elements) if req.missing_elements else "无",
+            "整改建议": ", ".join(req.improvement_suggestions) if req.improvement_suggestions else "无",
+            "所在片段": req.segment_id
+        })
+    df = pd.DataFrame(data)
+    with pd.ExcelWriter(str(output_path), engine='openpyxl') as writer:
+        df.to_excel(writer, sheet_name='需求明细', index=False)
+    return {"seconds": time.perf_counter() - start_time, "peak_rss_mb": peak_rss_mb(),
+            "baseline_rss_mb": baseline_rss}
+
+MODES = {"stream": run_stream, "dataframe": run_dataframe}
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Excel报告生成基准")
+    arg_parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 50000])
+    arg_parser.add_argument("--modes", nargs="+", choices=list(MODES), default=list(MODES))
+    arg_parser.add_argument("--child", nargs=2, metavar=("MODE", "SIZE"), help=argparse.SUPPRESS)
+    args = arg_parser.parse_args()
+    
+    if args.child:
+        mode, size = args.child
+        print(json.dumps(MODES[mode](int(size))))
+        return
+    
+    print(f"{'模式':10} {'需求数':>8} {'耗时(秒)':>10} {'峰值RSS(MB)':>12} {'增量RSS(MB)':>12}")
+    for size in args.sizes:
+        for mode in args.modes:
+            output = subprocess.run(
+                [sys.executable, __file__, "--child", mode, str(size)],
+                capture_output=True, text=True, check=True
+            ).stdout
+            stats = json.loads(output.strip().splitlines()[-1])
+            delta = stats["peak_rss_mb"] - stats["baseline_rss_mb"]
+            print(f"{mode:10} {size:>8} {stats['seconds']:>10.2f} {stats['peak_rss_mb']:>12.1f} {delta:>12.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+需求存储内存基准：普通dataclass vs slots dataclass vs 列式RequirementTable
+用法：python benchmarks/bench_requirement_memory.py --count 200000
+"""
+
+import argparse
+import gc
+import json
+import tracemalloc
+from dataclasses import dataclass
+from typing import Dict, List, Tuple
+
+from common import make_requirements
+
+from models import RequirementTable, RequirementType, intern_strings
+
+@dataclass
+class LegacyRequirement:
+    """未使用slots的旧版需求模型，仅用于对比"""
+    id: str
+    text: str
+    req_type: RequirementType
+    segment_id: str
+    position: Tuple[int, int]
+    elements: Dict[str, str] = None
+    completeness_score: float = 0.0
+    missing_elements: List[str] = None
+    improvement_suggestions: List[str] = None
+
+def decoded_requirements(count: int):
+    """模拟API响应经json解码后的需求：每个要素名都是独立的字符串对象"""
+    for req in make_requirements(count):
+        req.segment_id = json.loads(json.dumps(req.segment_id))
+        req.missing_elements = json.loads(json.dumps(req.missing_elements, ensure_ascii=False))
+        yield req
+
+def build_legacy(count: int):
+    return [
+        LegacyRequirement(
+            id=req.id, text=req.text, req_type=req.req_type, segment_id=req.segment_id,
+            position=req.position, elements={}, completeness_score=req.completeness_score,
+            missing_elements=req.missing_elements,
+            improvement_suggestions=req.improvement_suggestions
+        )
+        for req in decoded_requirements(count)
+    ]
+
+def build_slots(count: int):
+    requirements = []
+    for req in decoded_requirements(count):
+        req.missing_elements = intern_strings(req.missing_elements)
+        requirements.append(req)
+    return requirements
+
+def build_table(count: int):
+    return RequirementTable(decoded_requirements(count))
+
+def measure(builder, count: int):
+    gc.collect()
+    tracemalloc.start()
+    data = builder(count)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del data
+    return current, peak
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="需求存储内存基准")
+    arg_parser.add_argument("--count", type=int, default=100000)
+    args = arg_parser.parse_args()
+    
+    builders = {"legacy": build_legacy, "slots": build_slots, "table": build_table}
+    print(f"{'存储方式':10} {'总内存(MB)':>12} {'峰值(MB)':>10} {'每条(字节)':>12}")
+    for name, builder in builders.items():
+        current, peak = measure(builder, args.count)
+        print(f"{name:10} {current / 1e6:>12.1f} {peak / 1e6:>10.1f} {current / args.count:>12.0f}")
+
+if __name__ == "__main__":
+    main()
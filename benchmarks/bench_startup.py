@@ -0,0 +1,91 @@
+"""
+启动耗时与依赖加载基准
+用法：python benchmarks/bench_startup.py --repeat 5
+
+每个场景在独立子进程中运行，测量进程总耗时、导入耗时、峰值内存以及加载了哪些重量级依赖。
+"minimal" 场景以精简模式验证一个 .txt 文档（本地模拟服务）并输出JSON，
+若加载了 python-docx/openpyxl/PyPDF2/pandas 则退出码为1。
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+
+from common import ROOT_DIR
+
+HEAVY_MODULES = ["pandas", "numpy", "docx", "openpyxl", "PyPDF2", "lxml"]
+MINIMAL_FORBIDDEN = {"pandas", "docx", "openpyxl", "PyPDF2"}
+
+PRELUDE = f"""
+import json, resource, sys, time
+sys.path.insert(0, {str(ROOT_DIR)!r})
+_start = time.perf_counter()
+"""
+
+EPILOGUE = f"""
+_elapsed = time.perf_counter() - _start
+print(json.dumps({{
+    "import_seconds": _elapsed,
+    "rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024),
+    "loaded": [name for name in {HEAVY_MODULES!r} if name in sys.modules]
+}}))
+"""
+
+MINIMAL_RUN = """
+import tempfile
+from pathlib import Path
+from config import Config
+from mock_server import MockDeepSeekServer
+from validator import RequirementValidator
+work_dir = Path(tempfile.mkdtemp())
+doc = work_dir / "需求.txt"
+doc.write_text("第1章 登录\\n系统应支持用户登录，响应时间小于2秒。\\n", encoding="utf-8")
+with MockDeepSeekServer() as server:
+    config = Config(API_URL=server.url, OUTPUT_DIR=str(work_dir / "out"), CACHE_DIR=str(work_dir / "cache"),
+                    MINIMAL_MODE=True)
+    RequirementValidator(config).validate_files([doc])
+"""
+
+SCENARIOS = {
+    "import_validator": "import validator",
+    "import_all_reports": "import validator, report_generator",
+    "minimal": MINIMAL_RUN,
+}
+
+def run_scenario(code: str) -> dict:
+    start_time = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, "-c", PRELUDE + code + EPILOGUE],
+        capture_output=True, text=True, cwd=str(ROOT_DIR)
+    )
+    wall = time.perf_counter() - start_time
+    if completed.returncode != 0:
+        raise RuntimeError(completed.stderr.strip().splitlines()[-1] if completed.stderr else "子进程失败")
+    data = json.loads(completed.stdout.strip().splitlines()[-1])
+    data["wall_seconds"] = wall
+    return data
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="启动耗时与依赖加载基准")
+    arg_parser.add_argument("--repeat", type=int, default=5)
+    arg_parser.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS))
+    args = arg_parser.parse_args()
+
+    print(f"{'场景':20} {'进程耗时':>10} {'导入/运行':>10} {'峰值内存':>10}  已加载的重量级依赖")
+    exit_code = 0
+    for name in args.scenarios:
+        runs = [run_scenario(SCENARIOS[name]) for _ in range(args.repeat)]
+        loaded = runs[-1]["loaded"]
+        print(f"{name:20} {statistics.median(r['wall_seconds'] for r in runs):>9.3f}s "
+              f"{statistics.median(r['import_seconds'] for r in runs):>9.3f}s "
+              f"{max(r['rss_mb'] for r in runs):>8.1f}MB  {', '.join(loaded) or '-'}")
+        if name == "minimal" and MINIMAL_FORBIDDEN.intersection(loaded):
+            print(f"精简模式加载了不应加载的依赖: {sorted(MINIMAL_FORBIDDEN.intersection(loaded))}")
+            exit_code = 1
+    sys.exit(exit_code)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+"""
+Word报告生成基准：模板批量XML引擎 vs 逐单元格python-docx引擎
+用法：python benchmarks/bench_word_report.py --sizes 100 1000 5000 --full-details
+"""
+
+import argparse
+import time
+
+from common import bench_output_dir, make_result
+
+from report_generator import ReportGenerator
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Word报告生成基准")
+    arg_parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 5000])
+    arg_parser.add_argument("--engines", nargs="+", choices=ReportGenerator.WORD_ENGINES,
+                            default=list(ReportGenerator.WORD_ENGINES))
+    arg_parser.add_argument("--full-details", action="store_true", help="输出完整缺失清单")
+    args = arg_parser.parse_args()
+    
+    print(f"{'引擎':12} {'需求数':>8} {'耗时(秒)':>10}")
+    for size in args.sizes:
+        result = make_result(size)
+        # 让缺失要素分析表的行数随需求规模增长
+        result.missing_elements_by_type = {
+            f"类型{i % 50}": {f"要素{j}": j for j in range(size // 50 + 1)} for i in range(50)
+        }
+        for engine in args.engines:
+            generator = ReportGenerator(word_engine=engine, full_details=args.full_details)
+            output_path = bench_output_dir() / f"word_{engine}_{size}.docx"
+            
+            start_time = time.perf_counter()
+            generator.generate_word_report(result, str(output_path))
+            print(f"{engine:12} {size:>8} {time.perf_counter() - start_time:>10.2f}")
+
+if __name__ == "__main__":
+    main()
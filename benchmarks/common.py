@@ -0,0 +1,63 @@
+"""
+基准测试公共工具
+"""
+
+import os
+import sys
+import random
+import resource
+from pathlib import Path
+
+# 添加项目根目录到模块路径
+ROOT_DIR = Path(__file__).resolve().parent.parent
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from models import Requirement, RequirementType, ValidationResult
+
+def peak_rss_mb() -> float:
+    """当前进程峰值常驻内存（MB）"""
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux下单位为KB，macOS下为字节
+    if sys.platform == "darwin":
+        return usage / 1024 / 1024
+    return usage / 1024
+
+def make_requirements(count: int, seed: int = 42):
+    """生成合成需求条目"""
+    rng = random.Random(seed)
+    types = [RequirementType.FUNCTIONAL, RequirementType.NON_FUNCTIONAL, RequirementType.INTERFACE]
+    elements = ["触发条件", "处理逻辑", "输出结果", "验收标准", "异常处理", "量化指标", "测量场景"]
+    
+    for i in range(count):
+        missing = rng.sample(elements, rng.randint(0, 3))
+        yield Requirement(
+            id=f"REQ-{i:08d}",
+            text=f"系统应支持第{i}项业务功能，用户提交请求后在{rng.randint(1, 10)}秒内返回处理结果。" * 2,
+            req_type=rng.choice(types),
+            segment_id=f"bench.docx_ch{i // 50 + 1}",
+            position=(0, 0),
+            completeness_score=round(rng.uniform(0, 100), 2),
+            missing_elements=missing,
+            improvement_suggestions=[f"补充{elem}的具体描述" for elem in missing]
+        )
+
+def make_result(count: int, seed: int = 42) -> ValidationResult:
+    """生成包含指定数量需求的合成验证结果"""
+    requirements = list(make_requirements(count, seed))
+    return ValidationResult(
+        document_id=f"bench{count}",
+        document_name=f"bench_{count}.docx",
+        total_requirements=len(requirements),
+        complete_requirements=sum(1 for r in requirements if not r.missing_elements),
+        completeness_score=sum(r.completeness_score for r in requirements) / max(len(requirements), 1),
+        missing_elements_by_type={},
+        requirements_details=requirements,
+        validation_time=1.0,
+        generated_at="2024-01-01 00:00:00"
+    )
+
+def bench_output_dir() -> Path:
+    output_dir = Path(os.getenv("BENCH_OUTPUT_DIR", "bench_output"))
+    output_dir.mkdir(parents=True, exist_ok=True)
+    return output_dir
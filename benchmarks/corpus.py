@@ -0,0 +1,134 @@
+"""
+合成需求规格语料生成器
+用法：python benchmarks/corpus.py --output bench_corpus --count 20 --formats docx txt pdf --requirements 200 --cjk-ratio 0.8
+PDF使用内置Helvetica字体手写生成，不含中日韩字符（cjk-ratio仅作用于docx/txt）。
+"""
+
+import argparse
+import random
+from pathlib import Path
+from typing import List
+
+from common import ROOT_DIR  # noqa: F401  确保项目根目录在模块路径中
+
+CJK_TEMPLATES = [
+    "系统应支持{subject}，在{n}秒内返回处理结果。",
+    "用户需能够{action}，操作失败时系统须给出错误提示。",
+    "系统应保证{subject}的响应时间不超过{n}00毫秒。",
+    "{subject}接口需支持每秒{n}0次调用，输入参数为JSON格式。",
+    "管理员可以配置{subject}的阈值，默认值为{n}。",
+]
+CJK_SUBJECTS = ["用户登录", "文件上传", "订单查询", "报表导出", "消息推送", "权限管理", "数据备份", "日志审计"]
+CJK_ACTIONS = ["修改个人信息", "导出统计报表", "撤销已提交的申请", "批量导入数据", "订阅通知"]
+
+EN_TEMPLATES = [
+    "The system shall support {subject} and respond within {n} seconds.",
+    "Users must be able to {action}; on failure the system shall show an error.",
+    "The {subject} interface shall accept {n}0 requests per second with JSON input.",
+    "The system should keep {subject} latency below {n}00 ms at peak load.",
+]
+EN_SUBJECTS = ["user login", "file upload", "order lookup", "report export", "push notification", "data backup"]
+EN_ACTIONS = ["update their profile", "export reports", "cancel a request", "import data in bulk"]
+
+def generate_lines(rng: random.Random, requirements: int, cjk_ratio: float) -> List[str]:
+    """生成带章节编号的需求文本行"""
+    lines = ["Requirements Specification" if cjk_ratio == 0 else "需求规格说明书"]
+    per_section = 5
+    for i in range(requirements):
+        if i % per_section == 0:
+            chapter, section = i // (per_section * 10) + 1, i // per_section % 10 + 1
+            use_cjk = rng.random() < cjk_ratio
+            title = rng.choice(CJK_SUBJECTS if use_cjk else EN_SUBJECTS)
+            lines.append(f"{chapter}.{section} {title}")
+        if rng.random() < cjk_ratio:
+            template = rng.choice(CJK_TEMPLATES)
+            lines.append(template.format(subject=rng.choice(CJK_SUBJECTS),
+                                         action=rng.choice(CJK_ACTIONS), n=rng.randint(1, 9)))
+        else:
+            template = rng.choice(EN_TEMPLATES)
+            lines.append(template.format(subject=rng.choice(EN_SUBJECTS),
+                                         action=rng.choice(EN_ACTIONS), n=rng.randint(1, 9)))
+    return lines
+
+def write_txt(path: Path, lines: List[str]):
+    path.write_text("\n".join(lines), encoding="utf-8")
+
+def write_docx(path: Path, lines: List[str]):
+    from docx import Document
+
+    doc = Document()
+    for line in lines:
+        doc.add_paragraph(line)
+    doc.save(str(path))
+
+def _pdf_escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+def write_pdf(path: Path, lines: List[str], lines_per_page: int = 50):
+    """手写最小PDF（Helvetica，仅ASCII）"""
+    lines = [line.encode("ascii", "ignore").decode() for line in lines]
+    pages = [lines[i:i + lines_per_page] for i in range(0, len(lines), lines_per_page)] or [[]]
+
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None,
+               b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    page_ids = []
+    for page_lines in pages:
+        ops = ["BT", "/F1 10 Tf", "14 TL", "50 800 Td"]
+        for line in page_lines:
+            ops.append(f"({_pdf_escape(line)}) Tj T*")
+        ops.append("ET")
+        stream = "\n".join(ops).encode("latin-1")
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        content_id = len(objects)
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {content_id} 0 R >>".encode()
+        )
+        page_ids.append(len(objects))
+    kids = " ".join(f"{pid} 0 R" for pid in page_ids)
+    objects[1] = f"<< /Type /Pages /Kids [{kids}] /Count {len(page_ids)} >>".encode()
+
+    output = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for i, body in enumerate(objects, 1):
+        offsets.append(len(output))
+        output += f"{i} 0 obj\n".encode() + body + b"\nendobj\n"
+    xref_offset = len(output)
+    output += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    for offset in offsets:
+        output += f"{offset:010d} 00000 n \n".encode()
+    output += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref_offset}\n%%EOF\n".encode()
+    path.write_bytes(bytes(output))
+
+WRITERS = {"txt": write_txt, "docx": write_docx, "pdf": write_pdf}
+
+def generate_corpus(output_dir: str, count: int, formats: List[str], requirements: int = 100,
+                    cjk_ratio: float = 0.8, seed: int = 42) -> List[Path]:
+    output = Path(output_dir)
+    output.mkdir(parents=True, exist_ok=True)
+    rng = random.Random(seed)
+
+    files = []
+    for i in range(count):
+        fmt = formats[i % len(formats)]
+        lines = generate_lines(rng, requirements, 0.0 if fmt == "pdf" else cjk_ratio)
+        path = output / f"spec_{i:04d}.{fmt}"
+        WRITERS[fmt](path, lines)
+        files.append(path)
+    return files
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="合成需求规格语料生成器")
+    arg_parser.add_argument("--output", default="bench_corpus")
+    arg_parser.add_argument("--count", type=int, default=20)
+    arg_parser.add_argument("--formats", nargs="+", choices=list(WRITERS), default=["docx", "txt", "pdf"])
+    arg_parser.add_argument("--requirements", type=int, default=100, help="每个文档的需求条数")
+    arg_parser.add_argument("--cjk-ratio", type=float, default=0.8)
+    arg_parser.add_argument("--seed", type=int, default=42)
+    args = arg_parser.parse_args()
+
+    files = generate_corpus(args.output, args.count, args.formats, args.requirements, args.cjk_ratio, args.seed)
+    print(f"已生成 {len(files)} 个文档: {args.output}")
+
+if __name__ == "__main__":
+    main()
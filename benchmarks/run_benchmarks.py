@@ -0,0 +1,340 @@
+"""
+验证流水线端到端基准
+用法：
+  python benchmarks/run_benchmarks.py --count 12 --requirements 200 --latency lognormal:-3:0.4 --output bench_results.json
+  python benchmarks/run_benchmarks.py --baseline benchmarks/baseline.json --tolerance 0.2
+  python benchmarks/run_benchmarks.py --save-baseline benchmarks/baseline.json
+
+分阶段测量：抽取、清理、分段、API（本地模拟服务）、解析、聚合、报告渲染，
+并端到端运行 validate_batch 统计整体吞吐。结果以JSON输出，可与基线比较，出现回归时退出码为1。
+
+整个测量重复 --repeat 次：各阶段合并所有调用的耗时样本计算分位数与吞吐，端到端指标取中位数。与基线比较时：
+  - 负载参数（文档数、需求数、格式、延迟分布、并发、种子、重复次数）必须与基线一致，否则拒绝比较（退出码2）
+  - 耗时指标的相对变化超过容差且绝对变化超过 --min-delta-ms 才算回归，亚毫秒级阶段的抖动不计；
+    调用次数不足 MIN_P99_SAMPLES 的阶段不比较 p99
+  - 吞吐只比较基线墙钟时间不少于 --min-wall-seconds 的阶段
+标准输出只包含结果JSON，验证流程的进度信息写入标准错误。
+"""
+
+import argparse
+import json
+import platform
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import redirect_stdout
+from pathlib import Path
+from typing import Dict, List
+
+from common import peak_rss_mb
+from corpus import WRITERS, generate_corpus
+
+from config import Config
+from mock_server import MockDeepSeekServer
+from models import Requirement
+from prompts import compact_json
+from validator import RequirementValidator
+
+STAGES = ["extraction", "cleaning", "segmentation", "api", "parsing", "aggregation", "rendering"]
+
+# 决定负载的参数，与基线不一致时结果不可比
+WORKLOAD_PARAMETERS = ("count", "requirements", "formats", "cjk_ratio", "latency", "concurrency", "seed", "repeat")
+# 峰值内存的变化低于该值（MB）不计为回归
+MIN_RSS_DELTA_MB = 10.0
+# 调用次数少于该值时 p99 即为单次最大值，受偶发停顿影响过大，不参与比较
+MIN_P99_SAMPLES = 100
+
+class StageTimer:
+    """记录单个阶段每次调用的耗时"""
+
+    def __init__(self):
+        self.samples: List[float] = []
+        self.items = 0
+        self.wall_time = 0.0
+        self.peak_rss_mb = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float, items: int = 1):
+        with self._lock:
+            self.samples.append(seconds)
+            self.items += items
+
+    def merge(self, other: "StageTimer"):
+        """并入另一次运行的样本；墙钟时间累加，峰值内存取较大值"""
+        self.samples.extend(other.samples)
+        self.items += other.items
+        self.wall_time += other.wall_time
+        self.peak_rss_mb = max(self.peak_rss_mb, other.peak_rss_mb)
+
+    def summary(self) -> Dict:
+        samples = sorted(self.samples)
+        return {
+            "calls": len(samples),
+            "items": self.items,
+            "wall_seconds": round(self.wall_time, 4),
+            "throughput_per_sec": round(self.items / self.wall_time, 2) if self.wall_time else None,
+            "p50_ms": round(percentile(samples, 50) * 1000, 3),
+            "p99_ms": round(percentile(samples, 99) * 1000, 3),
+            "peak_rss_mb": round(self.peak_rss_mb, 1)
+        }
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+def timed(timer: StageTimer, func, *args, items: int = 1):
+    start_time = time.perf_counter()
+    value = func(*args)
+    timer.record(time.perf_counter() - start_time, items)
+    return value
+
+def run_stages(validator: RequirementValidator, files: List[Path], concurrency: int) -> Dict[str, StageTimer]:
+    timers = {stage: StageTimer() for stage in STAGES}
+    preprocessor = validator.preprocessor
+    api_client = validator.api_client
+
+    def phase(stage: str, func):
+        start_time = time.perf_counter()
+        value = func()
+        timers[stage].wall_time = time.perf_counter() - start_time
+        timers[stage].peak_rss_mb = peak_rss_mb()
+        return value
+
+    def extract(path: Path) -> str:
+        suffix = path.suffix.lower()
+        if suffix == ".pdf":
+            return preprocessor._extract_from_pdf(str(path))
+        if suffix in (".doc", ".docx"):
+            return preprocessor._extract_from_word(str(path))
+        return path.read_text(encoding="utf-8")
+
+    raw_texts = phase("extraction", lambda: [timed(timers["extraction"], extract, f) for f in files])
+    cleaned = phase("cleaning", lambda: [
+        timed(timers["cleaning"], preprocessor.text_cleaner.clean, text) for text in raw_texts
+    ])
+    documents = phase("segmentation", lambda: [
+        timed(timers["segmentation"], preprocessor._split_text, text, f.name)
+        for text, f in zip(cleaned, files)
+    ])
+
+    segments = [segment for document in documents for segment in document]
+
+    def call(prompt: List[Dict]) -> str:
+        response = timed(timers["api"], api_client.call_api, prompt)
+        return api_client.extract_content(response)
+
+    def parse_segment(segment) -> List[Requirement]:
+        content = call(api_client.generate_prompt("parse", segment.text))
+        requirements = timed(timers["parsing"], validator.parser.parse_requirements, content)
+        for req in requirements:
+            req.segment_id = segment.id
+        return requirements
+
+    def evaluate_segment(requirements: List[Requirement]) -> List[Requirement]:
+        if not requirements:
+            return requirements
+        eval_input = {
+            "requirements": [
+                {"id": r.id, "text": r.text, "type": r.req_type.value, "elements": r.elements}
+                for r in requirements
+            ]
+        }
+        prompt = api_client.generate_prompt("evaluate", compact_json(eval_input))
+        content = call(prompt)
+        return timed(timers["parsing"], validator.parser.parse_evaluation, content, requirements,
+                     items=len(requirements))
+
+    def api_phase():
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            parsed = list(executor.map(parse_segment, segments))
+            return list(executor.map(evaluate_segment, parsed))
+
+    evaluated = phase("api", api_phase)
+    # 解析阶段与API阶段交错执行，其墙钟时间取各次调用耗时之和
+    timers["parsing"].wall_time = sum(timers["parsing"].samples)
+    timers["parsing"].peak_rss_mb = peak_rss_mb()
+
+    by_document: Dict[str, List[Requirement]] = {}
+    for segment, requirements in zip(segments, evaluated):
+        by_document.setdefault(segment.original_file, []).extend(requirements)
+
+    def aggregate():
+        results = []
+        for name, requirements in by_document.items():
+            start_time = time.perf_counter()
+            requirements = validator._evaluate_requirements(requirements)
+            results.append(validator._calculate_results(name, requirements, 0.0))
+            timers["aggregation"].record(time.perf_counter() - start_time, len(requirements))
+        return results
+
+    results = phase("aggregation", aggregate)
+
+    output_dir = Path(validator.config.OUTPUT_DIR)
+
+    def render():
+        for result in results:
+            start_time = time.perf_counter()
+            validator.report_generator.generate_word_report(result, str(output_dir / f"{result.document_id}.docx"))
+            validator.report_generator.generate_excel_report(result, str(output_dir / f"{result.document_id}.xlsx"))
+            timers["rendering"].record(time.perf_counter() - start_time)
+
+    phase("rendering", render)
+    return timers
+
+def run_end_to_end(config: Config, input_dir: Path) -> Dict:
+    validator = RequirementValidator(config)
+    start_time = time.perf_counter()
+    results = validator.validate_batch(str(input_dir))
+    elapsed = time.perf_counter() - start_time
+    latencies = sorted(r.validation_time for r in results)
+    total_requirements = sum(r.total_requirements for r in results)
+    return {
+        "documents": len(results),
+        "requirements": total_requirements,
+        "wall_seconds": round(elapsed, 4),
+        "documents_per_sec": round(len(results) / elapsed, 3) if elapsed else None,
+        "requirements_per_sec": round(total_requirements / elapsed, 2) if elapsed else None,
+        "document_p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "document_p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "peak_rss_mb": round(peak_rss_mb(), 1)
+    }
+
+def median_summary(runs: List[Dict]) -> Dict:
+    """多次端到端运行的同名指标取中位数"""
+    merged = {}
+    for key, value in runs[0].items():
+        values = [run[key] for run in runs if run.get(key) is not None]
+        if isinstance(value, (int, float)) and values:
+            merged[key] = round(statistics.median(values), 4)
+        else:
+            merged[key] = value
+    return merged
+
+def parameter_mismatches(current: Dict, baseline: Dict) -> List[str]:
+    before = baseline.get("parameters", {})
+    now = current["parameters"]
+    return [f"{key}: {before.get(key)!r} -> {now.get(key)!r}"
+            for key in WORKLOAD_PARAMETERS if before.get(key) != now.get(key)]
+
+def compare_with_baseline(current: Dict, baseline: Dict, tolerance: float, min_delta_ms: float = 10.0,
+                          min_wall_seconds: float = 1.0) -> List[str]:
+    """返回超出容差的回归项；耗时类指标越大越差，吞吐类指标越小越差。
+    负载参数不一致时抛出 ValueError"""
+    mismatches = parameter_mismatches(current, baseline)
+    if mismatches:
+        raise ValueError(f"负载参数与基线不一致，结果不可比: {'; '.join(mismatches)}")
+    regressions = []
+
+    def check(label: str, now, before, higher_is_worse: bool, floor: float = 0.0):
+        if not now or not before:
+            return
+        change = (now - before) / before
+        if abs(now - before) <= floor:
+            return
+        if (change > tolerance) if higher_is_worse else (change < -tolerance):
+            regressions.append(f"{label}: {before} -> {now} ({change:+.1%})")
+
+    for stage, stats in current["stages"].items():
+        before = baseline.get("stages", {}).get(stage, {})
+        check(f"{stage}.p50_ms", stats["p50_ms"], before.get("p50_ms"), True, min_delta_ms)
+        if stats["calls"] >= MIN_P99_SAMPLES:
+            check(f"{stage}.p99_ms", stats["p99_ms"], before.get("p99_ms"), True, min_delta_ms)
+        if (before.get("wall_seconds") or 0) >= min_wall_seconds:
+            check(f"{stage}.throughput_per_sec", stats["throughput_per_sec"], before.get("throughput_per_sec"),
+                  False)
+
+    e2e, e2e_before = current["end_to_end"], baseline.get("end_to_end", {})
+    check("end_to_end.documents_per_sec", e2e["documents_per_sec"], e2e_before.get("documents_per_sec"), False)
+    check("end_to_end.peak_rss_mb", e2e["peak_rss_mb"], e2e_before.get("peak_rss_mb"), True, MIN_RSS_DELTA_MB)
+    return regressions
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="验证流水线端到端基准")
+    arg_parser.add_argument("--count", type=int, default=12, help="合成文档数量")
+    arg_parser.add_argument("--requirements", type=int, default=200, help="每个文档的需求条数")
+    arg_parser.add_argument("--formats", nargs="+", choices=list(WRITERS), default=["docx", "txt", "pdf"])
+    arg_parser.add_argument("--cjk-ratio", type=float, default=0.8)
+    arg_parser.add_argument("--latency", default="lognormal:-3:0.4", help="模拟服务延迟分布")
+    arg_parser.add_argument("--concurrency", type=int, default=5)
+    arg_parser.add_argument("--seed", type=int, default=42)
+    arg_parser.add_argument("--repeat", type=int, default=3, help="重复测量次数，各指标取中位数")
+    arg_parser.add_argument("--output", help="结果JSON文件路径（默认输出到标准输出）")
+    arg_parser.add_argument("--baseline", help="基线JSON文件，与之比较并报告回归")
+    arg_parser.add_argument("--tolerance", type=float, default=0.2, help="回归容差（相对变化）")
+    arg_parser.add_argument("--min-delta-ms", type=float, default=10.0, help="耗时指标计为回归所需的最小绝对变化")
+    arg_parser.add_argument("--min-wall-seconds", type=float, default=1.0,
+                            help="只比较基线墙钟时间不少于该值的阶段吞吐")
+    arg_parser.add_argument("--save-baseline", help="将本次结果保存为基线")
+    args = arg_parser.parse_args()
+
+    if args.repeat < 1:
+        arg_parser.error("--repeat 必须大于0")
+
+    excluded = ("output", "baseline", "save_baseline", "tolerance", "min_delta_ms", "min_wall_seconds")
+    parameters = {k: v for k, v in vars(args).items() if k not in excluded}
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        # 参数不一致时在测量之前退出
+        mismatches = parameter_mismatches({"parameters": parameters}, baseline)
+        if mismatches:
+            print(f"错误: 负载参数与基线不一致，结果不可比: {'; '.join(mismatches)}", file=sys.stderr)
+            sys.exit(2)
+
+    stage_timers = {stage: StageTimer() for stage in STAGES}
+    end_to_end_runs = []
+    # 验证流程的进度输出（调度效率、文档发现等）不能混入标准输出的JSON
+    with tempfile.TemporaryDirectory(prefix="autorv_bench_") as work_dir, \
+            MockDeepSeekServer(latency=args.latency, seed=args.seed) as mock_server, \
+            redirect_stdout(sys.stderr):
+        work = Path(work_dir)
+        files = generate_corpus(str(work / "corpus"), args.count, args.formats,
+                                args.requirements, args.cjk_ratio, args.seed)
+
+        for run in range(args.repeat):
+            config = Config()
+            config.API_URL = mock_server.url
+            config.BATCH_SIZE = args.concurrency
+            config.OUTPUT_DIR = str(work / f"reports_{run}")
+            config.CACHE_DIR = str(work / f"cache_stages_{run}")
+            timers = run_stages(RequirementValidator(config), files, args.concurrency)
+            for stage, timer in timers.items():
+                stage_timers[stage].merge(timer)
+
+            config.CACHE_DIR = str(work / f"cache_e2e_{run}")
+            end_to_end_runs.append(run_end_to_end(config, work / "corpus"))
+
+    report = {
+        "generated_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "environment": {"python": platform.python_version(), "platform": platform.platform()},
+        "parameters": parameters,
+        "stages": {stage: timer.summary() for stage, timer in stage_timers.items()},
+        "end_to_end": median_summary(end_to_end_runs)
+    }
+
+    regressions = []
+    if baseline is not None:
+        regressions = compare_with_baseline(report, baseline, args.tolerance, args.min_delta_ms,
+                                            args.min_wall_seconds)
+        report["regressions"] = regressions
+
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        Path(args.output).write_text(text, encoding="utf-8")
+    else:
+        print(text)
+    if args.save_baseline:
+        Path(args.save_baseline).write_text(text, encoding="utf-8")
+
+    for line in regressions:
+        print(f"性能回归: {line}", file=sys.stderr)
+    sys.exit(1 if regressions else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,670 @@
+# ==================== cli.py ====================
+"""
+需求完整性验证命令行入口（非交互，可脚本化）
+用法：
+  python cli.py validate 需求文档.docx --format word excel json
+  python cli.py batch input_docs --concurrency 8 --progress json
+  python cli.py batch input_docs --shard 2/4          # 4个节点确定性切分同一目录，本节点处理第2份
+  python cli.py batch input_docs --dry-run            # 仅预估请求数、token、费用与耗时
+  python cli.py batch input_docs --minimal            # 仅 .txt 输入、JSON输出，不加载 python-docx/openpyxl
+  python cli.py resume input_docs --shard 2/4         # 跳过该分片已完成且内容未变的文档
+  python cli.py watch input_docs --debounce 2        # 常驻监视目录，验证新增或修改的文档
+  python cli.py serve --port 8080 --workers 2         # HTTP验证服务，见 service.py
+  python cli.py coordinator input_docs --queue /shared/queue.sqlite   # 分段入队、等待并合并结果
+  python cli.py worker --queue /shared/queue.sqlite --api-key KEY2    # 在任意主机上启动工作者
+  python cli.py bench -- --count 12 --requirements 200
+  python cli.py cache stats | python cli.py cache clear
+
+退出码：0 全部成功；1 存在失败文档；2 参数或配置错误；3 未找到输入文档；130 被中断
+--progress json 时标准输出只包含逐行JSON事件，其余日志写入标准错误。
+"""
+
+import argparse
+import contextlib
+import hashlib
+import json
+import os
+import runpy
+import signal
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, TextIO, Tuple
+
+from config import Config
+from models import ValidationResult
+from scheduling import SCHEDULE_ORDERS
+
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_USAGE = 2
+EXIT_NO_INPUT = 3
+EXIT_INTERRUPTED = 130
+
+DEFAULT_API_KEY = "your-api-key-here"
+DEFAULT_API_URL = Config.API_URL
+
+class UsageError(Exception):
+    """命令行参数或配置错误"""
+
+class ProgressReporter:
+    """进度输出：text 为可读文本，json 为逐行JSON事件，none 不输出"""
+
+    MODES = ("text", "json", "none")
+
+    def __init__(self, mode: str = "text", stream: TextIO = None):
+        self.mode = mode
+        self.stream = stream or sys.stdout
+
+    def emit(self, event: str, **fields):
+        if self.mode == "none":
+            return
+        if self.mode == "json":
+            record = {"event": event, "ts": round(time.time(), 3), **fields}
+            self.stream.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+        else:
+            details = " ".join(f"{k}={v}" for k, v in fields.items() if not isinstance(v, (dict, list)))
+            self.stream.write(f"[{event}] {details}\n")
+        self.stream.flush()
+
+    def error(self, message: str):
+        """错误在 json 模式下作为事件输出，其余模式写入标准错误"""
+        if self.mode == "json":
+            self.emit("error", message=message)
+        else:
+            print(f"错误: {message}", file=sys.stderr)
+
+def result_summary(result: ValidationResult) -> Dict:
+    summary = {
+        "document": result.document_name,
+        "document_id": result.document_id,
+        "completeness_score": round(result.completeness_score, 2),
+        "total_requirements": result.total_requirements,
+        "complete_requirements": result.complete_requirements,
+        "validation_time": round(result.validation_time, 3),
+        "tokens": result.token_usage.total_tokens,
+        "cache_hit_ratio": round(result.token_usage.cache_hit_ratio, 4),
+        "estimated_cost": round(result.estimated_cost, 4),
+        "unfinished_segments": result.unfinished_segments
+    }
+    if result.sampling:
+        interval = result.sampling["completeness_score"]
+        summary["sampling"] = {
+            "coverage": result.sampling["coverage"],
+            "unsampled_segments": len(result.unfinished_segments),
+            "confidence": result.sampling["confidence"],
+            "completeness_interval": [round(interval["low"], 2), round(interval["high"], 2)],
+            "estimated_requirements": result.sampling["estimated_requirements"]
+        }
+    return summary
+
+def parse_fraction(value: str) -> float:
+    try:
+        fraction = float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"无效的比例: {value}")
+    if not 0 < fraction <= 1:
+        raise argparse.ArgumentTypeError(f"比例应在 (0, 1] 之间: {value}")
+    return fraction
+
+def parse_shard(value: str) -> Tuple[int, int]:
+    """解析 i/N（i 从1开始）"""
+    try:
+        index, count = (int(part) for part in value.split("/"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"分片格式应为 i/N: {value}")
+    if count < 1 or not 1 <= index <= count:
+        raise argparse.ArgumentTypeError(f"分片序号超出范围: {value}")
+    return index, count
+
+def select_shard(files: List[Path], shard: Optional[Tuple[int, int]], root: str) -> List[Path]:
+    """按相对输入目录的路径排序后轮转分配，各节点看到相同目录时得到互不重叠的均衡分片"""
+    if shard is None:
+        return files
+    from discovery import document_key
+    index, count = shard
+    ordered = sorted(files, key=lambda path: document_key(path, root))
+    return ordered[index - 1::count]
+
+class BatchState:
+    """批量任务断点：记录已完成文档的内容哈希与结果文件，供 resume 跳过
+
+    文档以相对输入目录的路径（discovery.document_key）为键，子目录中的同名文档各自记录。
+    """
+
+    def __init__(self, state_dir: Path):
+        self.state_dir = state_dir
+        self.results_dir = state_dir / "results"
+        self.state_file = state_dir / "state.json"
+        self.completed: Dict[str, Dict] = {}
+        self.failed: Dict[str, str] = {}
+
+    @classmethod
+    def for_batch(cls, output_dir: str, input_dir: str, shard: Optional[Tuple[int, int]]) -> "BatchState":
+        input_key = hashlib.md5(str(Path(input_dir).resolve()).encode()).hexdigest()[:8]
+        shard_tag = f"shard-{shard[0]}-of-{shard[1]}" if shard else "all"
+        return cls(Path(output_dir) / ".batch_state" / f"{input_key}_{shard_tag}")
+
+    def load(self) -> "BatchState":
+        if self.state_file.exists():
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self.completed = data.get("completed", {})
+            self.failed = data.get("failed", {})
+        return self
+
+    def is_done(self, key: str, digest: str) -> bool:
+        entry = self.completed.get(key)
+        return bool(entry) and entry["sha256"] == digest and (self.results_dir / entry["result_file"]).exists()
+
+    def mark_completed(self, key: str, digest: str, result: ValidationResult):
+        self.results_dir.mkdir(parents=True, exist_ok=True)
+        result_file = f"{result.document_id}.json"
+        with open(self.results_dir / result_file, 'w', encoding='utf-8') as f:
+            json.dump(result.to_dict(), f, ensure_ascii=False)
+        self.completed[key] = {"sha256": digest, "document_id": result.document_id,
+                               "result_file": result_file}
+        self.failed.pop(key, None)
+        self.save()
+
+    def mark_failed(self, key: str, error: str):
+        self.failed[key] = error
+        self.save()
+
+    def load_result(self, key: str) -> ValidationResult:
+        entry = self.completed[key]
+        with open(self.results_dir / entry["result_file"], 'r', encoding='utf-8') as f:
+            return ValidationResult.from_dict(json.load(f))
+
+    def save(self):
+        self.state_dir.mkdir(parents=True, exist_ok=True)
+        tmp_file = self.state_file.with_suffix(".tmp")
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump({"completed": self.completed, "failed": self.failed}, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_file, self.state_file)
+
+def build_config(args) -> Config:
+    config = Config()
+    if args.api_key:
+        config.API_KEY = args.api_key
+    if args.api_url:
+        config.API_URL = args.api_url
+    if args.model:
+        config.MODEL_NAME = args.model
+    if args.concurrency is not None:
+        if args.concurrency < 1:
+            raise UsageError("并发数必须大于0")
+        config.BATCH_SIZE = args.concurrency
+    if args.deadline is not None:
+        if args.deadline < 0:
+            raise UsageError("文档时限不能为负数")
+        config.DOCUMENT_DEADLINE = args.deadline
+    if args.hedge:
+        config.HEDGE_REQUESTS = True
+    config.SCHEDULE_ORDER = args.schedule
+    if args.output_dir:
+        config.OUTPUT_DIR = args.output_dir
+    if args.cache_dir:
+        config.CACHE_DIR = args.cache_dir
+    config.CACHE_BACKEND = args.cache_backend
+    config.API_TRANSPORT = args.transport
+    config.REPORT_MODE = args.report_mode
+    if args.format:
+        config.REPORT_FORMATS = list(dict.fromkeys(args.format))
+    if args.minimal:
+        if args.format and set(args.format) != {"json"}:
+            raise UsageError("--minimal 仅支持 --format json")
+        config.MINIMAL_MODE = True
+        config.REPORT_FORMATS = ["json"]
+    if args.metrics_export:
+        config.METRICS_EXPORT_PATH = args.metrics_export
+    if args.criteria:
+        config.COMPLETENESS_CRITERIA = load_criteria(args.criteria)
+    if args.endpoints:
+        config.API_ENDPOINTS = load_endpoints(args.endpoints)
+    if args.include:
+        config.DISCOVERY_INCLUDE = args.include
+    if args.exclude:
+        config.DISCOVERY_EXCLUDE = config.DISCOVERY_EXCLUDE + args.exclude
+    if args.flat:
+        config.DISCOVERY_RECURSIVE = False
+    if args.tables or args.columns:
+        config.TABLE_INPUT = True
+    if args.columns:
+        config.TABLE_COLUMNS = load_columns(args.columns)
+    return config
+
+def load_endpoints(path: str) -> List[Dict]:
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            endpoints = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        raise UsageError(f"无法读取端点配置文件 {path}: {e}")
+    if not isinstance(endpoints, list) or not all(isinstance(e, dict) and e.get("url") for e in endpoints):
+        raise UsageError(f"端点配置应为列表 [{{\"url\": ..., \"api_key\": ..., \"weight\": ...}}]: {path}")
+    return endpoints
+
+def load_columns(path: str) -> Dict:
+    from table_input import ColumnMapping
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            columns = json.load(f)
+        ColumnMapping.from_dict(columns)
+    except (OSError, json.JSONDecodeError, TypeError) as e:
+        raise UsageError(f"无法读取需求表列映射文件 {path}: {e}")
+    return columns
+
+def load_criteria(path: str) -> Dict[str, List[str]]:
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            criteria = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        raise UsageError(f"无法读取完整性标准文件 {path}: {e}")
+    if not isinstance(criteria, dict) or not all(
+            isinstance(v, list) and all(isinstance(e, str) for e in v) for v in criteria.values()):
+        raise UsageError(f"完整性标准文件格式应为 {{需求类型: [要素, ...]}}: {path}")
+    return criteria
+
+def require_api_access(config: Config):
+    if config.API_TRANSPORT == "replay" or config.API_URL != DEFAULT_API_URL or config.API_ENDPOINTS:
+        return
+    if not config.API_KEY or config.API_KEY == DEFAULT_API_KEY:
+        raise UsageError("未设置API密钥：请使用 --api-key 或环境变量 DEEPSEEK_API_KEY")
+
+def make_validator(config: Config):
+    # 延迟导入，cache/bench 子命令无需加载文档处理依赖
+    from validator import RequirementValidator
+    return RequirementValidator(config)
+
+def cmd_validate(args, progress: ProgressReporter) -> int:
+    path = Path(args.file)
+    if not path.is_file():
+        progress.error(f"文件不存在: {path}")
+        return EXIT_NO_INPUT
+
+    config = build_config(args)
+    require_api_access(config)
+    validator = make_validator(config)
+
+    progress.emit("document_started", file=str(path), index=1, total=1)
+    try:
+        if args.sample is not None:
+            refined_results = []
+
+            def on_update(refined: ValidationResult):
+                refined_results.append(refined)
+                progress.emit("estimate_refined", file=str(path), **result_summary(refined))
+
+            result = validator.sample_document(str(path), args.sample, refine=args.refine, on_update=on_update)
+            progress.emit("estimate_ready", file=str(path), **result_summary(result))
+            validator.wait_for_refinements()
+            result = refined_results[-1] if refined_results else result
+        else:
+            result = validator.validate_document(str(path))
+    except Exception as e:
+        progress.emit("document_failed", file=str(path), index=1, total=1, error=str(e))
+        return EXIT_FAILED
+    validator.wait_for_reports()
+    validator.export_metrics()
+    progress.emit("document_completed", file=str(path), index=1, total=1, **result_summary(result))
+    return EXIT_OK
+
+def cmd_batch(args, progress: ProgressReporter, resume: bool = False) -> int:
+    config = build_config(args)
+    input_dir = args.input_dir or config.INPUT_DIR
+    if not Path(input_dir).is_dir():
+        progress.error(f"目录不存在: {input_dir}")
+        return EXIT_NO_INPUT
+
+    if not args.dry_run:
+        require_api_access(config)
+    validator = make_validator(config)
+
+    doc_files = select_shard(validator.discover_documents(input_dir), args.shard, input_dir)
+    if not doc_files:
+        progress.error(f"未找到文档文件: {input_dir}")
+        return EXIT_NO_INPUT
+
+    if args.dry_run:
+        estimate = validator.estimate_batch(doc_files, root=input_dir)
+        progress.emit("estimate", **estimate.to_dict())
+        return EXIT_FAILED if estimate.failed_documents else EXIT_OK
+
+    from discovery import document_key
+    from validator import file_digest
+    state = BatchState.for_batch(config.OUTPUT_DIR, input_dir, args.shard)
+    if resume:
+        state.load()
+    digests = {path: file_digest(path) for path in doc_files}
+    keys = {path: document_key(path, input_dir) for path in doc_files}
+
+    pending, previous_results = [], []
+    for path in doc_files:
+        if resume and state.is_done(keys[path], digests[path]):
+            previous_results.append(state.load_result(keys[path]))
+            progress.emit("document_skipped", file=str(path))
+        else:
+            pending.append(path)
+
+    progress.emit("batch_started", input_dir=input_dir, shard=args.shard and "/".join(map(str, args.shard)),
+                  total=len(doc_files), pending=len(pending), skipped=len(previous_results))
+
+    failed = 0
+
+    def on_progress(event: str, file: str, index: int, total: int, result=None, error=None):
+        nonlocal failed
+        path = Path(file)
+        if event == "document_completed":
+            state.mark_completed(keys[path], digests[path], result)
+            progress.emit(event, file=file, index=index, total=total, **result_summary(result))
+        elif event == "document_failed":
+            failed += 1
+            state.mark_failed(keys[path], error)
+            progress.emit(event, file=file, index=index, total=total, error=error)
+        else:
+            progress.emit(event, file=file, index=index, total=total)
+
+    results = validator.validate_files(pending, progress=on_progress, previous_results=previous_results,
+                                       root=input_dir)
+
+    progress.emit("batch_completed", total=len(doc_files), completed=len(results), failed=failed,
+                  skipped=len(previous_results), state_dir=str(state.state_dir),
+                  endpoints=validator.api_client.endpoint_stats())
+    return EXIT_FAILED if failed else EXIT_OK
+
+def cmd_watch(args, progress: ProgressReporter) -> int:
+    config = build_config(args)
+    require_api_access(config)
+    validator = make_validator(config)
+
+    from watcher import FolderWatcher
+
+    def on_event(event: str, result: ValidationResult = None, **fields):
+        if result is not None:
+            fields.update(result_summary(result))
+        progress.emit(event, **fields)
+
+    watcher = FolderWatcher(validator, args.input_dir, debounce=args.debounce, backend=args.backend,
+                            poll_interval=args.poll_interval, on_event=on_event)
+    # SIGTERM（作业调度器/容器停止）与 Ctrl-C 都在当前文档完成后退出
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *_: watcher.stop())
+    watcher.run()
+    return EXIT_OK
+
+def cmd_serve(args, progress: ProgressReporter) -> int:
+    config = build_config(args)
+    require_api_access(config)
+    if args.workers is not None:
+        config.SERVICE_WORKERS = args.workers
+    if args.queue_size is not None:
+        config.SERVICE_QUEUE_SIZE = args.queue_size
+    if args.api_budget is not None:
+        config.API_MAX_CONCURRENCY = args.api_budget
+
+    from service import ValidationService
+    service = ValidationService(config).start(args.host, args.port)
+    progress.emit("service_started", url=service.url, workers=config.SERVICE_WORKERS,
+                  queue_size=config.SERVICE_QUEUE_SIZE)
+
+    stopped = threading.Event()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *_: stopped.set())
+    stopped.wait()
+    service.stop()
+    progress.emit("service_stopped")
+    return EXIT_OK
+
+def cmd_coordinator(args, progress: ProgressReporter) -> int:
+    config = build_config(args)
+    input_dir = args.input_dir or config.INPUT_DIR
+    if not Path(input_dir).is_dir():
+        progress.error(f"目录不存在: {input_dir}")
+        return EXIT_NO_INPUT
+    validator = make_validator(config)
+
+    from distributed import Coordinator, Worker, open_queue
+    queue = open_queue(config, args.queue)
+    coordinator = Coordinator(validator, queue)
+
+    doc_files = select_shard(validator.discover_documents(input_dir), args.shard, input_dir)
+    if not doc_files:
+        progress.error(f"未找到文档文件: {input_dir}")
+        return EXIT_NO_INPUT
+    batch_id = coordinator.submit(input_dir, doc_files)
+    progress.emit("batch_enqueued", batch_id=batch_id, documents=len(doc_files), queue=queue.path,
+                  **queue.counts(batch_id))
+
+    local_worker = None
+    if args.local_workers:
+        require_api_access(config)
+        local_worker = Worker(validator, queue, threads=args.local_workers, idle_exit=0)
+        threading.Thread(target=local_worker.run, name="local-worker", daemon=True).start()
+
+    counts = coordinator.wait(batch_id, args.poll_interval,
+                              on_progress=lambda counts: progress.emit("batch_progress", batch_id=batch_id, **counts))
+    if local_worker:
+        local_worker.stop()
+
+    results = coordinator.collect(batch_id)
+    progress.emit("batch_completed", batch_id=batch_id, documents=len(results), **counts)
+    return EXIT_FAILED if counts["failed"] else EXIT_OK
+
+def cmd_worker(args, progress: ProgressReporter) -> int:
+    config = build_config(args)
+    require_api_access(config)
+    validator = make_validator(config)
+
+    from distributed import Worker, open_queue
+    queue = open_queue(config, args.queue)
+    worker = Worker(validator, queue, threads=args.threads, idle_exit=args.idle_exit,
+                    on_task=lambda **fields: progress.emit("task_finished", **fields))
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *_: worker.stop())
+    progress.emit("worker_started", worker_id=worker.worker_id, threads=worker.threads, queue=queue.path)
+    worker.run()
+    progress.emit("worker_stopped", worker_id=worker.worker_id, processed=worker.processed)
+    return EXIT_OK
+
+def cmd_bench(args, progress: ProgressReporter) -> int:
+    script = Path(__file__).resolve().parent / "benchmarks" / "run_benchmarks.py"
+    bench_args = [a for a in args.bench_args if a != "--"]
+    sys.path.insert(0, str(script.parent))
+    saved_argv = sys.argv
+    sys.argv = [str(script)] + bench_args
+    try:
+        runpy.run_path(str(script), run_name="__main__")
+    except SystemExit as e:
+        return e.code if isinstance(e.code, int) else EXIT_FAILED
+    finally:
+        sys.argv = saved_argv
+    return EXIT_OK
+
+def evaluation_entries(path: Path) -> int:
+    if not path.is_file():
+        return 0
+    from result_cache import EvaluationCache
+    return sum(EvaluationCache(str(path)).stats().values())
+
+def cmd_rescore(args, progress: ProgressReporter) -> int:
+    config = build_config(args)
+    input_dir = args.input_dir or config.INPUT_DIR
+    if not Path(input_dir).is_dir():
+        progress.error(f"目录不存在: {input_dir}")
+        return EXIT_NO_INPUT
+    if config.CACHE_BACKEND == "none":
+        raise UsageError("rescore 依赖解析级缓存，不能与 --cache-backend none 同时使用")
+
+    require_api_access(config)
+    validator = make_validator(config)
+    doc_files = validator.discover_documents(input_dir)
+    if not doc_files:
+        progress.error(f"未找到文档文件: {input_dir}")
+        return EXIT_NO_INPUT
+
+    progress.emit("batch_started", input_dir=input_dir, total=len(doc_files), pending=len(doc_files), skipped=0)
+    failed = 0
+
+    def on_progress(event: str, file: str, index: int, total: int, result=None, error=None):
+        nonlocal failed
+        if event == "document_completed":
+            progress.emit(event, file=file, index=index, total=total, **result_summary(result))
+        elif event == "document_failed":
+            failed += 1
+            progress.emit(event, file=file, index=index, total=total, error=error)
+        else:
+            progress.emit(event, file=file, index=index, total=total)
+
+    results = validator.rescore(doc_files, progress=on_progress, root=input_dir)
+    progress.emit("batch_completed", total=len(doc_files), completed=len(results), failed=failed, skipped=0)
+    return EXIT_FAILED if failed else EXIT_OK
+
+def cmd_cache(args, progress: ProgressReporter) -> int:
+    cache_dir = Path(args.cache_dir or Config.CACHE_DIR)
+    # 顶层 *.json 为旧版合并缓存，parse/ 为解析级缓存
+    segment_files = list(cache_dir.glob("*.json")) if cache_dir.is_dir() else []
+    segment_files += list((cache_dir / "parse").glob("*.json")) if (cache_dir / "parse").is_dir() else []
+    evaluation_files = list(cache_dir.glob("evaluations.sqlite*")) if cache_dir.is_dir() else []
+    result_files = list((cache_dir / "results").glob("*.json")) if (cache_dir / "results").is_dir() else []
+    extraction_files = (list((cache_dir / "extraction").glob("*.seg"))
+                        if (cache_dir / "extraction").is_dir() else [])
+
+    if args.cache_command == "stats":
+        progress.emit("cache_stats", cache_dir=str(cache_dir),
+                      segment_entries=len(segment_files),
+                      segment_bytes=sum(f.stat().st_size for f in segment_files),
+                      evaluation_entries=evaluation_entries(cache_dir / "evaluations.sqlite"),
+                      evaluation_bytes=sum(f.stat().st_size for f in evaluation_files),
+                      extraction_entries=len(extraction_files),
+                      extraction_bytes=sum(f.stat().st_size for f in extraction_files),
+                      stored_results=len(result_files),
+                      stored_result_bytes=sum(f.stat().st_size for f in result_files))
+        return EXIT_OK
+
+    targets = segment_files + evaluation_files + extraction_files + (result_files if args.all else [])
+    for path in targets:
+        path.unlink()
+    progress.emit("cache_cleared", cache_dir=str(cache_dir), removed=len(targets))
+    return EXIT_OK
+
+def build_parser() -> argparse.ArgumentParser:
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--api-key", help="DeepSeek API密钥（默认读取 DEEPSEEK_API_KEY）")
+    common.add_argument("--api-url", help="chat-completions 接口地址")
+    common.add_argument("--model", help="模型名称")
+    common.add_argument("--endpoints", help="多密钥/多地址负载均衡配置JSON文件（见 Config.API_ENDPOINTS）")
+    common.add_argument("--concurrency", type=int, help="单文档内片段并发数（BATCH_SIZE）")
+    common.add_argument("--deadline", type=float, help="单文档处理时限（秒），超时输出部分结果并标记未完成片段")
+    common.add_argument("--hedge", action="store_true", help="请求耗时超过近期p95时发送对冲请求")
+    common.add_argument("--schedule", choices=SCHEDULE_ORDERS, default=Config.SCHEDULE_ORDER,
+                        help="片段调度顺序（分布式模式下跨文档）：largest 大任务优先（吞吐）、smallest 小任务优先（延迟）、document 原顺序")
+    common.add_argument("--output-dir", help="报告输出目录")
+    common.add_argument("--cache-dir", help="缓存目录")
+    common.add_argument("--cache-backend", choices=["file", "none"], default=Config.CACHE_BACKEND,
+                        help="片段结果缓存后端")
+    common.add_argument("--transport", choices=["live", "record", "replay"], default=Config.API_TRANSPORT,
+                        help="API传输方式（录制/回放见 RECORDINGS_DIR）")
+    common.add_argument("--format", nargs="+", choices=["word", "excel", "json"],
+                        help="单文档报告格式，可多选（默认 word excel）")
+    common.add_argument("--minimal", action="store_true",
+                        help="精简模式：仅处理 .txt 并输出JSON，不加载 python-docx/openpyxl/PyPDF2")
+    common.add_argument("--report-mode", choices=["sync", "background", "deferred", "none"],
+                        default=Config.REPORT_MODE, help="报告渲染方式")
+    common.add_argument("--criteria", help="完整性标准JSON文件 {需求类型: [要素, ...]}")
+    common.add_argument("--include", nargs="+", metavar="PATTERN", help="只验证匹配的文件（通配模式，含 / 时匹配相对路径）")
+    common.add_argument("--exclude", nargs="+", metavar="PATTERN", help="跳过匹配的文件或目录")
+    common.add_argument("--flat", action="store_true", help="只处理目录顶层，不遍历子目录")
+    common.add_argument("--tables", action="store_true",
+                        help="将 .xlsx/.csv 作为需求表读取（默认忽略表格文件；指定 --columns 时自动启用）")
+    common.add_argument("--columns", help="需求表（.xlsx/.csv）列映射JSON文件 {\"id\": 列名, \"text\": 列名, \"type\": 列名, ...}")
+    common.add_argument("--metrics-export", help="验证结束后导出指标JSON的路径")
+    common.add_argument("--progress", choices=ProgressReporter.MODES, default="text",
+                        help="进度输出格式（json 为逐行事件）")
+
+    arg_parser = argparse.ArgumentParser(prog="cli.py", description="需求完整性自动化验证")
+    subparsers = arg_parser.add_subparsers(dest="command", required=True)
+
+    validate_parser = subparsers.add_parser("validate", parents=[common], help="验证单个文档")
+    validate_parser.add_argument("file")
+    validate_parser.add_argument("--sample", type=parse_fraction, metavar="FRACTION",
+                                 help="抽样快速估计：按章节分层验证该比例的片段，输出带置信区间的估计")
+    validate_parser.add_argument("--refine", action="store_true", help="抽样估计后继续分轮验证剩余片段直至全覆盖")
+
+    for name, help_text in (("batch", "批量验证目录"), ("resume", "续跑中断的批量验证")):
+        batch_parser = subparsers.add_parser(name, parents=[common], help=help_text)
+        batch_parser.add_argument("input_dir", nargs="?", help="文档目录（默认 Config.INPUT_DIR）")
+        batch_parser.add_argument("--shard", type=parse_shard, help="仅处理第 i 份（共 N 份），如 2/4")
+        batch_parser.add_argument("--dry-run", action="store_true", help="只预估，不调用API")
+
+    watch_parser = subparsers.add_parser("watch", parents=[common], help="常驻监视目录并自动验证")
+    watch_parser.add_argument("input_dir", nargs="?", help="监视目录（默认 Config.INPUT_DIR）")
+    watch_parser.add_argument("--debounce", type=float, default=2.0, help="文件静默多少秒后视为写入完成")
+    watch_parser.add_argument("--backend", choices=["auto", "inotify", "polling"], default="auto")
+    watch_parser.add_argument("--poll-interval", type=float, default=2.0, help="轮询模式的扫描间隔（秒）")
+
+    serve_parser = subparsers.add_parser("serve", parents=[common], help="启动HTTP验证服务")
+    serve_parser.add_argument("--host", default=Config.SERVICE_HOST)
+    serve_parser.add_argument("--port", type=int, default=Config.SERVICE_PORT)
+    serve_parser.add_argument("--workers", type=int, help="同时验证的文档数")
+    serve_parser.add_argument("--queue-size", type=int, help="排队任务上限，超出时返回429")
+    serve_parser.add_argument("--api-budget", type=int, help="所有任务共享的API并发上限")
+
+    coordinator_parser = subparsers.add_parser("coordinator", parents=[common], help="分布式批量验证：入队并合并结果")
+    coordinator_parser.add_argument("input_dir", nargs="?", help="文档目录（默认 Config.INPUT_DIR）")
+    coordinator_parser.add_argument("--queue", help="共享队列SQLite文件（默认 Config.QUEUE_PATH）")
+    coordinator_parser.add_argument("--shard", type=parse_shard, help="仅入队第 i 份（共 N 份）")
+    coordinator_parser.add_argument("--poll-interval", type=float, default=2.0)
+    coordinator_parser.add_argument("--local-workers", type=int, default=0, help="协调者自身也处理任务的线程数")
+
+    worker_parser = subparsers.add_parser("worker", parents=[common], help="分布式批量验证：处理片段任务")
+    worker_parser.add_argument("--queue", help="共享队列SQLite文件（默认 Config.QUEUE_PATH）")
+    worker_parser.add_argument("--threads", type=int, help="并行处理的任务数（默认 BATCH_SIZE）")
+    worker_parser.add_argument("--idle-exit", type=float, default=30.0, help="队列空闲多少秒后退出（<=0 一直运行）")
+
+    rescore_parser = subparsers.add_parser("rescore", parents=[common],
+                                           help="按新的完整性标准（--criteria）重新评估已解析的文档，只发送评估请求")
+    rescore_parser.add_argument("input_dir", nargs="?", help="文档目录（默认 Config.INPUT_DIR）")
+
+    bench_parser = subparsers.add_parser("bench", help="运行端到端基准（参数透传给 run_benchmarks.py）")
+    bench_parser.add_argument("bench_args", nargs=argparse.REMAINDER)
+
+    cache_parser = subparsers.add_parser("cache", help="查看或清理解析、评估与抽取缓存")
+    cache_parser.add_argument("cache_command", choices=["stats", "clear"])
+    cache_parser.add_argument("--cache-dir", help="缓存目录")
+    cache_parser.add_argument("--all", action="store_true", help="同时清理已保存的验证结果")
+    cache_parser.add_argument("--progress", choices=ProgressReporter.MODES, default="text")
+
+    return arg_parser
+
+COMMANDS = {
+    "validate": cmd_validate,
+    "batch": cmd_batch,
+    "resume": lambda args, progress: cmd_batch(args, progress, resume=True),
+    "watch": cmd_watch,
+    "serve": cmd_serve,
+    "coordinator": cmd_coordinator,
+    "worker": cmd_worker,
+    "rescore": cmd_rescore,
+    "bench": cmd_bench,
+    "cache": cmd_cache
+}
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    progress = ProgressReporter(getattr(args, "progress", "text"))
+
+    # JSON进度独占标准输出，验证过程中的日志改写到标准错误
+    log_target = sys.stderr if progress.mode == "json" else sys.stdout
+    try:
+        with contextlib.redirect_stdout(log_target):
+            return COMMANDS[args.command](args, progress)
+    except UsageError as e:
+        progress.error(str(e))
+        return EXIT_USAGE
+    except KeyboardInterrupt:
+        progress.emit("interrupted")
+        return EXIT_INTERRUPTED
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -14,23 +14,99 @@ class Config:
     # API调用参数
     TEMPERATURE: float = 0.2
     TOP_P: float = 0.9
-    MAX_TOKENS: int = 2048
+    MAX_TOKENS: int = 2048  # 单次请求输出token上限
+    DYNAMIC_MAX_TOKENS: bool = True  # 按片段长度/需求条数估算每次请求的输出预算，不超过 MAX_TOKENS
+    MIN_OUTPUT_TOKENS: int = 256
+    OUTPUT_TOKEN_MARGIN: float = 1.5  # 输出预算 = 预估输出 × 余量
+    MAX_SPLIT_DEPTH: int = 3  # 输出被截断且预算已达上限时，输入对半拆分的最大层数
     TIMEOUT: int = 60
+    API_TRANSPORT: str = "live"  # live | record | replay
+    RECORDINGS_DIR: str = "recordings"
+    API_MAX_CONCURRENCY: int = 0  # >0 时限制进程内同时进行的API请求数（多个文档/任务共享）
+    # 多密钥/多地址负载均衡，每项 {"name", "url", "api_key", "model", "weight", "rpm"}，为空时仅使用 API_URL/API_KEY
+    API_ENDPOINTS: List[Dict] = None
+    BREAKER_FAILURE_THRESHOLD: int = 5  # 连续失败次数达到后熔断摘除端点
+    BREAKER_COOLDOWN: float = 30.0  # 熔断冷却时间（秒），探测失败时翻倍
+    BREAKER_LATENCY_THRESHOLD: float = 0.0  # >0 时超过该耗时的响应计为失败
+    HEDGE_REQUESTS: bool = False  # 请求耗时超过近期分位数时发送一个重复请求，取先返回者
+    HEDGE_PERCENTILE: float = 95.0
+    HEDGE_MIN_SAMPLES: int = 20  # 成功样本不足时不对冲
+    HEDGE_MIN_DELAY: float = 1.0  # 对冲等待时间下限（秒）
+    HEDGE_BUDGET: float = 0.1  # 在途对冲请求数不超过在途请求数的该比例（至少允许一个）
     
     # 文本处理配置
     MAX_SEGMENT_LENGTH: int = 30000
     BATCH_SIZE: int = 5
     MAX_RETRIES: int = 3
+    DOCUMENT_DEADLINE: float = 0.0  # >0 时单个文档的处理时限（秒），超时输出部分结果并标记未完成片段
+    SCHEDULE_ORDER: str = "largest"  # largest（批量吞吐）| smallest（交互延迟）| document，见 scheduling.py
+    SAMPLE_FRACTION: float = 0.1  # 抽样快速估计时每轮验证的片段比例（按章节分层）
+    SAMPLE_MIN_PER_STRATUM: int = 1
+    SAMPLE_CONFIDENCE: float = 0.95  # 置信区间的置信水平
+    SAMPLE_SEED: int = 0  # 固定种子使同一文档的抽样结果可复现
     
     # 路径配置
     INPUT_DIR: str = "input_docs"
     OUTPUT_DIR: str = "output_reports"
     CACHE_DIR: str = "cache"
+    DISCOVERY_RECURSIVE: bool = True  # 批量验证时遍历子目录
+    DISCOVERY_INCLUDE: List[str] = None  # 文件通配模式（含 / 时匹配相对路径），为空时接受所有支持的格式
+    DISCOVERY_EXCLUDE: List[str] = None  # 跳过的文件/目录模式，默认跳过 Office 临时文件与隐藏目录
+    DEDUPE_CONTENT: bool = True  # 内容完全相同的文档只验证一次，重复项记入文档发现清单
+    CACHE_BACKEND: str = "file"  # file | none
+    EXTRACTION_CACHE: bool = True  # 按文件内容哈希缓存抽取与分段结果（CACHE_DIR/extraction）
+    RESCORE_BATCH_SIZE: int = 40  # 重新评分与需求表评估时每个评估请求合并的需求条数
+    TABLE_INPUT: bool = False  # 将 .xlsx/.csv 作为需求表读取（每行一条需求）；关闭时批量验证忽略表格文件
+    TABLE_COLUMNS: Dict = None  # 需求表（.xlsx/.csv）列映射，见 table_input.ColumnMapping；None 时按常见表头识别
+    LOCAL_EXTRACTION: bool = True  # 编号条目/情态词明确的片段在本地拆分需求，不发送解析请求
+    LOCAL_EXTRACTION_MIN_CONFIDENCE: float = 0.7  # 本地抽取置信度低于该值的片段交给模型解析
+    
+    # 报告生成配置
+    REPORT_MODE: str = "sync"  # sync | background | deferred | none
+    REPORT_WORKERS: int = 2
+    WORD_REPORT_ENGINE: str = "template"  # template | python-docx
+    WORD_TEMPLATE_PATH: str = ""
+    REPORT_FULL_DETAILS: bool = False
+    REPORT_FORMATS: List[str] = None  # word | excel | json，默认 word + excel（精简模式下为 json）
+    MINIMAL_MODE: bool = False  # 仅处理 .txt 输入并输出JSON，不加载 python-docx/openpyxl/PyPDF2
+    
+    # 指标配置
+    METRICS_PORT: int = 0  # >0 时启动 /metrics 与 /metrics.json 端点
+    METRICS_HOST: str = "127.0.0.1"  # 指标端点监听地址，需要对外暴露时显式设为 0.0.0.0
+    METRICS_EXPORT_PATH: str = ""  # 非空时在验证完成后导出JSON指标
+    
+    # HTTP服务配置
+    SERVICE_HOST: str = "127.0.0.1"
+    SERVICE_PORT: int = 8080
+    SERVICE_WORKERS: int = 2
+    SERVICE_QUEUE_SIZE: int = 100  # 排队任务上限，超出时返回429
+    SERVICE_MAX_UPLOAD_MB: int = 50
+    SERVICE_RETAINED_JOBS: int = 1000
+    SERVICE_MAX_EVENTS: int = 10000  # 每个任务保留的事件条数上限，超出时丢弃最早的事件
+    
+    # 分布式队列配置
+    QUEUE_PATH: str = "cache/queue.sqlite"  # 协调者与各工作者共享的SQLite文件
+    QUEUE_LEASE_SECONDS: float = 120.0  # 工作者未续约超过该时间视为失联
+    QUEUE_MAX_ATTEMPTS: int = 3
+    
+    # 费用与预估配置（单价：元/百万token）
+    PRICE_INPUT_PER_1M: float = 2.0
+    PRICE_CACHE_HIT_PER_1M: float = 0.5
+    PRICE_OUTPUT_PER_1M: float = 8.0
+    ESTIMATED_API_LATENCY: float = 1.5  # 单次请求固定开销（秒）
+    ESTIMATED_OUTPUT_TOKENS_PER_SEC: float = 40.0
+    
+    # 结果存储配置
+    COMPACT_RESULTS: bool = False  # 以列式RequirementTable保存需求明细，降低大批量内存占用
     
     # 验证标准配置
     COMPLETENESS_CRITERIA: Dict[str, List[str]] = None
     
     def __post_init__(self):
+        if self.REPORT_FORMATS is None:
+            self.REPORT_FORMATS = ["json"] if self.MINIMAL_MODE else ["word", "excel"]
+        if self.DISCOVERY_EXCLUDE is None:
+            self.DISCOVERY_EXCLUDE = ["~$*", ".*"]
         if self.COMPLETENESS_CRITERIA is None:
             self.COMPLETENESS_CRITERIA = {
                 "功能需求": ["触发条件", "处理逻辑", "输出结果", "验收标准", "异常处理"],
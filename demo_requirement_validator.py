@@ -383,18 +383,24 @@ def demo_error_handling(config):
     if os.path.exists(empty_file):
         os.remove(empty_file)
     
-    # 测试3: 网络异常模拟（通过无效API密钥）
+    # 测试3: 网络异常模拟（本地模拟服务对每个请求都返回500）
     print("\n测试3: 模拟API调用失败")
-    invalid_config = Config()
-    invalid_config.API_KEY = "invalid_key_123456"
-    invalid_config.MAX_RETRIES = 1  # 减少重试次数
+    from mock_server import MockDeepSeekServer
     
-    try:
-        invalid_validator = RequirementValidator(invalid_config)
-        result = invalid_validator.validate_document("sample_docs/智能办公系统需求.docx")
-        print("✗ 预期API调用失败但未失败")
-    except Exception as e:
-        print(f"✓ 预期API错误: {type(e).__name__}")
+    with MockDeepSeekServer(error_rate=1.0) as server:
+        failing_config = Config()
+        failing_config.API_URL = server.url
+        failing_config.API_KEY = "mock"
+        failing_config.MAX_RETRIES = 1  # 减少重试次数
+        
+        try:
+            failing_validator = RequirementValidator(failing_config)
+            failing_validator.api_client.call_api(
+                failing_validator.api_client.generate_prompt("parse", "系统应支持用户登录。")
+            )
+            print("✗ 预期API调用失败但未失败")
+        except Exception as e:
+            print(f"✓ 预期API错误: {type(e).__name__}（模拟服务共收到 {server.stats['requests']} 次请求）")
     
     print("\n✓ 错误处理演示完成")
 
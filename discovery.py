@@ -0,0 +1,140 @@
+# ==================== discovery.py ====================
+"""
+文档发现
+os.scandir 单次遍历目录树，按后缀（不区分大小写）与 include/exclude 通配模式筛选，
+并去除重复：
+  same_file     同一文件的多个路径（大小写不敏感的挂载、硬链接、符号链接），按 (st_dev, st_ino) 判定
+  same_content  内容完全相同的副本，只对大小相同的文件计算内容哈希
+保留排序后的第一个路径，其余记入清单，不再重复验证。
+"""
+
+import fnmatch
+import json
+import os
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+from metrics import metrics
+from preprocessor import file_digest
+
+@dataclass
+class Duplicate:
+    path: str
+    duplicate_of: str
+    reason: str  # same_file | same_content
+
+@dataclass
+class DiscoveryResult:
+    root: str
+    documents: List[Path] = field(default_factory=list)
+    duplicates: List[Duplicate] = field(default_factory=list)
+    excluded: int = 0
+
+    def to_dict(self) -> Dict:
+        return {
+            "root": self.root,
+            "documents": [str(path) for path in self.documents],
+            "duplicates": [vars(duplicate) for duplicate in self.duplicates],
+            "excluded": self.excluded
+        }
+
+    def write_manifest(self, output_dir: str) -> Path:
+        timestamp = time.strftime("%Y%m%d_%H%M%S")
+        manifest_path = Path(output_dir) / f"文档发现清单_{timestamp}.json"
+        with open(manifest_path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+        return manifest_path
+
+def document_key(path: Path, root: Optional[str] = None) -> str:
+    """文档标识：相对 root 的路径（以 / 分隔），递归发现时不同子目录中的同名文档互不冲突；
+    未给出 root 或不在 root 之下时为文件名"""
+    path = Path(path)
+    if root is not None:
+        for candidate, base in ((path, Path(root)), (path.resolve(), Path(root).resolve())):
+            try:
+                return candidate.relative_to(base).as_posix()
+            except ValueError:
+                continue
+    return path.name
+
+def _matches(relative: str, name: str, patterns: Sequence[str]) -> bool:
+    """模式含 / 时匹配相对路径，否则只匹配文件名或目录名"""
+    return any(fnmatch.fnmatch(relative if '/' in pattern else name, pattern) for pattern in patterns)
+
+def discover(root: str, extensions: Sequence[str], include: Optional[Sequence[str]] = None,
+             exclude: Sequence[str] = (), recursive: bool = True, dedupe_content: bool = True,
+             skip_dirs: Sequence[str] = ()) -> DiscoveryResult:
+    """遍历 root 下的文档；结果按相对路径排序，保证多次运行及多节点分片时顺序一致
+
+    exclude 同时作用于目录（整棵子树跳过）与文件；include 为空时接受所有支持的后缀。
+    skip_dirs 为不进入的目录（如位于输入目录内的输出与缓存目录）。不跟随目录符号链接，避免循环。
+    """
+    result = DiscoveryResult(root=str(root))
+    skip_dirs = {os.path.realpath(directory) for directory in skip_dirs}
+    extensions = tuple(ext.lower() for ext in extensions)
+    candidates = []  # (相对路径, 路径, stat)
+
+    stack = [(str(root), "")]
+    while stack:
+        directory, prefix = stack.pop()
+        try:
+            entries = list(os.scandir(directory))
+        except OSError as e:
+            print(f"无法读取目录 {directory}: {e}")
+            continue
+        for entry in entries:
+            relative = f"{prefix}{entry.name}"
+            if _matches(relative, entry.name, exclude):
+                result.excluded += 1
+                continue
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    if recursive and os.path.realpath(entry.path) not in skip_dirs:
+                        stack.append((entry.path, f"{relative}/"))
+                    continue
+                if not entry.is_file():
+                    continue
+                if os.path.splitext(entry.name)[1].lower() not in extensions:
+                    continue
+                if include and not _matches(relative, entry.name, include):
+                    result.excluded += 1
+                    continue
+                candidates.append((relative, Path(entry.path), entry.stat()))
+            except OSError as e:
+                print(f"无法读取文件 {entry.path}: {e}")
+
+    candidates.sort(key=lambda item: item[0])
+
+    seen_files: Dict[object, Path] = {}
+    unique = []
+    for relative, path, stat in candidates:
+        # Windows 上 scandir 返回的 st_ino 为0，退回到规范化的真实路径
+        key = (stat.st_dev, stat.st_ino) if stat.st_ino else os.path.normcase(os.path.realpath(path))
+        if key in seen_files:
+            result.duplicates.append(Duplicate(str(path), str(seen_files[key]), "same_file"))
+            continue
+        seen_files[key] = path
+        unique.append((path, stat))
+
+    if dedupe_content:
+        size_counts: Dict[int, int] = {}
+        for _, stat in unique:
+            size_counts[stat.st_size] = size_counts.get(stat.st_size, 0) + 1
+        seen_digests: Dict[str, Path] = {}
+        for path, stat in unique:
+            # 大小唯一的文件不可能与其他文件内容相同，无需读取
+            if size_counts[stat.st_size] > 1:
+                digest = file_digest(path)
+                if digest in seen_digests:
+                    result.duplicates.append(Duplicate(str(path), str(seen_digests[digest]), "same_content"))
+                    continue
+                seen_digests[digest] = path
+            result.documents.append(path)
+    else:
+        result.documents = [path for path, _ in unique]
+
+    for duplicate in result.duplicates:
+        metrics.inc("discovery_duplicates_total", reason=duplicate.reason)
+    return result
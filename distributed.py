@@ -0,0 +1,404 @@
+# ==================== distributed.py ====================
+"""
+协调者/工作者模式的分布式批量验证
+共享介质为一个SQLite文件（放在各主机都能访问的目录），无需外部消息中间件：
+
+  协调者：抽取并分段全部文档，以片段为单位写入任务表，等待完成后合并结果、生成报告与批量汇总
+  工作者：租约式领取任务（超时未续约视为工作者失联，任务重新可领），结果写回任务表
+
+各工作者可使用不同的API密钥与并发数，吞吐随工作者数近似线性增长，直到触及API限流。
+"""
+
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from config import Config
+from discovery import document_key
+from metrics import metrics
+from models import DocumentSegment, Requirement, TokenUsage, ValidationResult
+from tokens import estimate_cost
+from validator import RequirementValidator
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS batches (
+    id TEXT PRIMARY KEY,
+    input_dir TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    status TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS documents (
+    batch_id TEXT NOT NULL,
+    document_name TEXT NOT NULL,
+    file_path TEXT NOT NULL,
+    segment_count INTEGER NOT NULL,
+    enqueued_at REAL NOT NULL,
+    PRIMARY KEY (batch_id, document_name)
+);
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    batch_id TEXT NOT NULL,
+    document_name TEXT NOT NULL,
+    segment TEXT NOT NULL,
+    priority REAL NOT NULL DEFAULT 0,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    lease_owner TEXT,
+    lease_expires REAL,
+    result TEXT,
+    usage TEXT,
+    error TEXT,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks (status, lease_expires);
+CREATE INDEX IF NOT EXISTS idx_tasks_batch ON tasks (batch_id, document_name);
+"""
+
+class TaskQueue:
+    """SQLite任务表：pending -> leased -> done | failed
+
+    领取与续约都在 BEGIN IMMEDIATE 事务内完成；租约过期的任务放回 pending 供其他工作者重新领取，
+    超过最大尝试次数后标记为 failed。结果只接受当前租约持有者的写入。
+    文档以 document_name（相对输入目录的路径，见 discovery.document_key）区分。
+    """
+
+    def __init__(self, path: str, lease_seconds: float = 120.0, max_attempts: int = 3):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self._local = threading.local()
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        conn = self._conn()
+        conn.executescript(SCHEMA)
+        # 早期版本创建的队列文件没有 priority 列
+        if "priority" not in {row["name"] for row in conn.execute("PRAGMA table_info(tasks)")}:
+            conn.execute("ALTER TABLE tasks ADD COLUMN priority REAL NOT NULL DEFAULT 0")
+
+    def _conn(self) -> sqlite3.Connection:
+        # sqlite3连接不跨线程共享，每个线程一个连接
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=60, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+        return conn
+
+    def _transaction(self):
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        return conn
+
+    def create_batch(self, input_dir: str) -> str:
+        batch_id = time.strftime("%Y%m%d_%H%M%S_") + uuid.uuid4().hex[:6]
+        self._conn().execute(
+            "INSERT INTO batches (id, input_dir, created_at, status) VALUES (?, ?, ?, 'open')",
+            (batch_id, input_dir, time.time())
+        )
+        return batch_id
+
+    def add_document(self, batch_id: str, file_path: str, segments: List[DocumentSegment],
+                     priorities: Optional[List[float]] = None, document_name: Optional[str] = None):
+        """priorities 与 segments 一一对应，数值大的任务先被领取；document_name 默认为文件名"""
+        document_name = document_name or Path(file_path).name
+        priorities = priorities or [0.0] * len(segments)
+        conn = self._transaction()
+        try:
+            conn.execute(
+                "INSERT INTO documents (batch_id, document_name, file_path, segment_count, enqueued_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (batch_id, document_name, str(file_path), len(segments), time.time())
+            )
+            conn.executemany(
+                "INSERT INTO tasks (batch_id, document_name, segment, priority) VALUES (?, ?, ?, ?)",
+                [(batch_id, document_name, json.dumps(self._segment_to_dict(s), ensure_ascii=False), priority)
+                 for s, priority in zip(segments, priorities)]
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def lease(self, owner: str) -> Optional[sqlite3.Row]:
+        """领取一个待处理的任务（先回收租约已过期的任务）"""
+        now = time.time()
+        conn = self._transaction()
+        try:
+            self._expire_leases(conn, now)
+            row = conn.execute(
+                "SELECT * FROM tasks WHERE status = 'pending' ORDER BY priority DESC, id LIMIT 1"
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            conn.execute(
+                "UPDATE tasks SET status = 'leased', lease_owner = ?, lease_expires = ?, attempts = attempts + 1 "
+                "WHERE id = ?",
+                (owner, now + self.lease_seconds, row["id"])
+            )
+            conn.execute("COMMIT")
+            return row
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def expire_leases(self):
+        """回收租约已过期的任务；协调者轮询时调用，不依赖仍在运行的工作者"""
+        conn = self._transaction()
+        try:
+            self._expire_leases(conn, time.time())
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _expire_leases(self, conn: sqlite3.Connection, now: float):
+        """租约过期：已用尽重试次数的判定失败，其余放回 pending"""
+        conn.execute(
+            "UPDATE tasks SET status = 'failed', error = COALESCE(error, '租约超时'), finished_at = ?, "
+            "lease_owner = NULL, lease_expires = NULL "
+            "WHERE status = 'leased' AND lease_expires < ? AND attempts >= ?",
+            (now, now, self.max_attempts)
+        )
+        cursor = conn.execute(
+            "UPDATE tasks SET status = 'pending', lease_owner = NULL, lease_expires = NULL "
+            "WHERE status = 'leased' AND lease_expires < ?",
+            (now,)
+        )
+        if cursor.rowcount > 0:
+            metrics.inc("queue_lease_expired_total", cursor.rowcount)
+
+    def outstanding(self) -> int:
+        """所有批次中尚未结束（pending 或 leased）的任务数"""
+        return self._conn().execute(
+            "SELECT COUNT(*) FROM tasks WHERE status IN ('pending', 'leased')"
+        ).fetchone()[0]
+
+    def renew(self, task_id: int, owner: str) -> bool:
+        cursor = self._conn().execute(
+            "UPDATE tasks SET lease_expires = ? WHERE id = ? AND status = 'leased' AND lease_owner = ?",
+            (time.time() + self.lease_seconds, task_id, owner)
+        )
+        return cursor.rowcount == 1
+
+    def complete(self, task_id: int, owner: str, requirements: List[Requirement], usage: TokenUsage) -> bool:
+        cursor = self._conn().execute(
+            "UPDATE tasks SET status = 'done', result = ?, usage = ?, finished_at = ?, error = NULL "
+            "WHERE id = ? AND status = 'leased' AND lease_owner = ?",
+            (json.dumps([r.to_dict() for r in requirements], ensure_ascii=False),
+             json.dumps(usage.to_dict()), time.time(), task_id, owner)
+        )
+        return cursor.rowcount == 1
+
+    def fail(self, task_id: int, owner: str, error: str):
+        """本次尝试失败：未用尽重试次数时放回队列"""
+        self._conn().execute(
+            "UPDATE tasks SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+            "error = ?, lease_owner = NULL, lease_expires = NULL, "
+            "finished_at = CASE WHEN attempts >= ? THEN ? ELSE NULL END "
+            "WHERE id = ? AND status = 'leased' AND lease_owner = ?",
+            (self.max_attempts, error, self.max_attempts, time.time(), task_id, owner)
+        )
+
+    def counts(self, batch_id: str) -> Dict[str, int]:
+        rows = self._conn().execute(
+            "SELECT status, COUNT(*) AS n FROM tasks WHERE batch_id = ? GROUP BY status", (batch_id,)
+        ).fetchall()
+        counts = {"pending": 0, "leased": 0, "done": 0, "failed": 0}
+        counts.update({row["status"]: row["n"] for row in rows})
+        return counts
+
+    def documents(self, batch_id: str) -> List[sqlite3.Row]:
+        return self._conn().execute(
+            "SELECT * FROM documents WHERE batch_id = ? ORDER BY rowid", (batch_id,)
+        ).fetchall()
+
+    def document_tasks(self, batch_id: str, document_name: str) -> List[sqlite3.Row]:
+        return self._conn().execute(
+            "SELECT * FROM tasks WHERE batch_id = ? AND document_name = ? ORDER BY id",
+            (batch_id, document_name)
+        ).fetchall()
+
+    def close_batch(self, batch_id: str):
+        self._conn().execute("UPDATE batches SET status = 'closed' WHERE id = ?", (batch_id,))
+
+    @staticmethod
+    def _segment_to_dict(segment: DocumentSegment) -> Dict:
+        return {"id": segment.id, "text": segment.text, "original_file": segment.original_file,
+                "page_range": list(segment.page_range) if segment.page_range else None}
+
+    @staticmethod
+    def segment_from_json(data: str) -> DocumentSegment:
+        fields = json.loads(data)
+        if fields.get("page_range"):
+            fields["page_range"] = tuple(fields["page_range"])
+        return DocumentSegment(**fields)
+
+class Coordinator:
+    """入队、等待并合并分布式批量任务"""
+
+    def __init__(self, validator: RequirementValidator, queue: TaskQueue):
+        self.validator = validator
+        self.queue = queue
+
+    def submit(self, input_dir: str, doc_files: List[Path] = None) -> str:
+        doc_files = doc_files if doc_files is not None else self.validator.discover_documents(input_dir)
+        batch_id = self.queue.create_batch(input_dir)
+        # 任务按预估耗时跨文档排序领取：largest 为正、smallest 为负、document 全为0（按入队顺序）
+        sign = {"largest": 1.0, "smallest": -1.0}.get(self.validator.config.SCHEDULE_ORDER, 0.0)
+        for doc_file in doc_files:
+            document_name = document_key(doc_file, input_dir)
+            try:
+                with metrics.span("preprocessing", document=document_name):
+                    segments = self.validator.preprocessor.process_document(str(doc_file))
+                estimator = self.validator.segment_estimator()
+                priorities = [sign * estimator.estimate_segment(s).seconds for s in segments] if sign else None
+                self.queue.add_document(batch_id, str(doc_file), segments, priorities, document_name)
+            except Exception as e:
+                metrics.record_error("document", e)
+                print(f"文档预处理失败 {doc_file}: {e}")
+        return batch_id
+
+    def wait(self, batch_id: str, poll_interval: float = 2.0, on_progress=None) -> Dict[str, int]:
+        """轮询直到批次中没有 pending/leased 任务；失联工作者的过期租约在此回收，
+        用尽重试次数的任务判定失败，其余放回队列等待存活的工作者领取"""
+        while True:
+            self.queue.expire_leases()
+            counts = self.queue.counts(batch_id)
+            if on_progress:
+                on_progress(counts)
+            if counts["pending"] == 0 and counts["leased"] == 0:
+                return counts
+            time.sleep(poll_interval)
+
+    def collect(self, batch_id: str) -> List[ValidationResult]:
+        """合并各文档的片段结果，生成单文档报告与批量汇总"""
+        results = []
+        for document in self.queue.documents(batch_id):
+            tasks = self.queue.document_tasks(batch_id, document["document_name"])
+            requirements: List[Requirement] = []
+            segment_usage: Dict[str, TokenUsage] = {}
+            finished_at = document["enqueued_at"]
+
+            for task in tasks:
+                segment = TaskQueue.segment_from_json(task["segment"])
+                finished_at = max(finished_at, task["finished_at"] or finished_at)
+                if task["status"] != "done":
+                    print(f"片段处理失败 {segment.id}: {task['error']}")
+                    continue
+                for data in json.loads(task["result"]):
+                    req = Requirement.from_dict(data)
+                    req.segment_id = segment.id
+                    requirements.append(req)
+                usage = TokenUsage.from_dict(json.loads(task["usage"]))
+                if usage.requests:
+                    segment_usage[segment.id] = usage
+
+            result = self.validator._calculate_results(
+                document_name=document["document_name"],
+                requirements=self.validator._evaluate_requirements(requirements),
+                validation_time=finished_at - document["enqueued_at"]
+            )
+            for usage in segment_usage.values():
+                result.token_usage.add(usage)
+            result.segment_token_usage = segment_usage
+            result.estimated_cost = estimate_cost(result.token_usage, self.validator.config)
+
+            self.validator._generate_reports(result, document["document_name"])
+            results.append(result)
+
+        if results:
+            self.validator._generate_batch_report(results)
+        self.validator.wait_for_reports()
+        self.validator.export_metrics()
+        self.queue.close_batch(batch_id)
+        return results
+
+class Worker:
+    """领取并处理片段任务的工作者，threads 个线程并行"""
+
+    def __init__(self, validator: RequirementValidator, queue: TaskQueue, threads: int = None,
+                 idle_exit: float = 30.0, on_task=None):
+        self.validator = validator
+        self.queue = queue
+        self.threads = threads or validator.config.BATCH_SIZE
+        self.idle_exit = idle_exit
+        self.on_task = on_task
+        self.worker_id = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:4]}"
+        self.processed = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def run(self):
+        """运行直到 stop() 或队列空闲超过 idle_exit 秒（idle_exit<=0 时一直运行）
+
+        仍有其他工作者持有租约的任务时不算空闲：持有者失联后租约过期，任务由存活的工作者接手。
+        """
+        threads = [
+            threading.Thread(target=self._loop, args=(f"{self.worker_id}/{i + 1}",), name=f"queue-worker-{i + 1}")
+            for i in range(self.threads)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.validator.export_metrics()
+
+    def stop(self):
+        self._stop.set()
+
+    def _loop(self, owner: str):
+        idle_since = time.monotonic()
+        while not self._stop.is_set():
+            task = self.queue.lease(owner)
+            if task is None:
+                if self.queue.outstanding():
+                    idle_since = time.monotonic()
+                elif self.idle_exit > 0 and time.monotonic() - idle_since > self.idle_exit:
+                    return
+                self._stop.wait(1.0)
+                continue
+            idle_since = time.monotonic()
+            self._process(task, owner)
+
+    def _process(self, task: sqlite3.Row, owner: str):
+        segment = TaskQueue.segment_from_json(task["segment"])
+        usage = TokenUsage()
+        heartbeat_stop = threading.Event()
+
+        def heartbeat():
+            while not heartbeat_stop.wait(self.queue.lease_seconds / 3):
+                if not self.queue.renew(task["id"], owner):
+                    return
+
+        heartbeat_thread = threading.Thread(target=heartbeat, name=f"lease-{task['id']}", daemon=True)
+        heartbeat_thread.start()
+        try:
+            requirements = self.validator.process_segment(segment, usage)
+        except Exception as e:
+            metrics.record_error("segment", e)
+            self.queue.fail(task["id"], owner, str(e))
+            status = "failed"
+        else:
+            accepted = self.queue.complete(task["id"], owner, requirements, usage)
+            status = "done" if accepted else "lease_lost"
+        finally:
+            heartbeat_stop.set()
+            heartbeat_thread.join()
+
+        metrics.inc("queue_tasks_total", status=status)
+        with self._lock:
+            self.processed += 1
+        if self.on_task:
+            self.on_task(task_id=task["id"], segment_id=segment.id, status=status, attempt=task["attempts"] + 1)
+
+def open_queue(config: Config, path: str = None) -> TaskQueue:
+    return TaskQueue(path or config.QUEUE_PATH, config.QUEUE_LEASE_SECONDS, config.QUEUE_MAX_ATTEMPTS)
+
+metrics.describe("queue_tasks_total", "分布式工作者处理的片段任务数（按结果）")
+metrics.describe("queue_lease_expired_total", "因租约过期被重新领取的任务数")
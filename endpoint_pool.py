@@ -0,0 +1,193 @@
+# ==================== endpoint_pool.py ====================
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Deque, Dict, List, Optional
+
+from config import Config
+from metrics import metrics
+
+@dataclass
+class Endpoint:
+    """单个API密钥/地址组合及其运行状态"""
+    name: str
+    url: str
+    api_key: str
+    model: Optional[str] = None
+    weight: float = 1.0
+    rpm: int = 0  # 每分钟请求上限，0 表示不限
+
+    state: str = "closed"  # closed | open | half_open
+    consecutive_failures: int = 0
+    open_until: float = 0.0
+    cooldown: float = 0.0
+    current_weight: float = 0.0
+    probing: bool = False
+    remaining_requests: Optional[int] = None  # 来自 x-ratelimit-remaining-requests 响应头
+    sent: Deque[float] = field(default_factory=deque)
+
+    requests: int = 0
+    successes: int = 0
+    failures: int = 0
+    slow_responses: int = 0
+    ejections: int = 0
+    total_latency: float = 0.0
+    last_error: str = ""
+
+    def to_dict(self) -> Dict:
+        return {
+            "name": self.name,
+            "url": self.url,
+            "weight": self.weight,
+            "state": self.state,
+            "requests": self.requests,
+            "successes": self.successes,
+            "failures": self.failures,
+            "slow_responses": self.slow_responses,
+            "ejections": self.ejections,
+            "mean_latency": round(self.total_latency / self.requests, 4) if self.requests else None,
+            "requests_last_minute": len(self.sent),
+            "remaining_requests": self.remaining_requests,
+            "last_error": self.last_error
+        }
+
+class EndpointPool:
+    """多密钥/多地址的客户端负载均衡
+
+    按权重做平滑加权轮询，权重再乘以剩余配额比例；每分钟请求数达到 rpm 的端点暂不参与。
+    连续失败（含限流与超过 BREAKER_LATENCY_THRESHOLD 的慢响应）达到阈值时熔断，
+    冷却后放行一个探测请求，成功则恢复，失败则冷却时间翻倍。所有端点都熔断时选冷却最早结束的端点，
+    避免单端点配置下请求被阻塞。
+    """
+
+    WINDOW = 60.0
+    MAX_COOLDOWN = 600.0
+
+    def __init__(self, config: Config):
+        self.config = config
+        specs = config.API_ENDPOINTS or [{"name": "default", "url": config.API_URL, "api_key": config.API_KEY}]
+        self.endpoints: List[Endpoint] = [
+            Endpoint(
+                name=spec.get("name") or f"endpoint-{i + 1}",
+                url=spec.get("url", config.API_URL),
+                api_key=spec.get("api_key", config.API_KEY),
+                model=spec.get("model"),
+                weight=float(spec.get("weight", 1.0)),
+                rpm=int(spec.get("rpm", 0))
+            )
+            for i, spec in enumerate(specs)
+        ]
+        self._lock = threading.Lock()
+
+    def acquire(self) -> Endpoint:
+        """选择一个端点；所有端点都触及配额时等待最早的配额释放"""
+        while True:
+            with self._lock:
+                now = time.time()
+                endpoint = self._select(now)
+                if endpoint is not None:
+                    endpoint.sent.append(now)
+                    return endpoint
+                wait = self._quota_wait(now)
+            time.sleep(wait)
+
+    def release(self, endpoint: Endpoint, ok: bool, latency: float, status: str = "",
+                retry_after: Optional[float] = None, remaining_requests: Optional[int] = None):
+        slow = (ok and self.config.BREAKER_LATENCY_THRESHOLD > 0
+                and latency > self.config.BREAKER_LATENCY_THRESHOLD)
+        with self._lock:
+            endpoint.probing = False
+            endpoint.requests += 1
+            endpoint.total_latency += latency
+            if remaining_requests is not None:
+                endpoint.remaining_requests = remaining_requests
+            if ok:
+                endpoint.successes += 1
+            else:
+                endpoint.failures += 1
+                endpoint.last_error = status
+            if slow:
+                endpoint.slow_responses += 1
+
+            if ok and not slow:
+                endpoint.consecutive_failures = 0
+                if endpoint.state != "closed":
+                    endpoint.state = "closed"
+                    endpoint.cooldown = 0.0
+                    metrics.set_gauge("api_endpoint_open", 0, endpoint=endpoint.name)
+            else:
+                endpoint.consecutive_failures += 1
+                # 限流响应按服务端给出的 Retry-After 立即熔断
+                if (endpoint.state == "half_open" or retry_after
+                        or endpoint.consecutive_failures >= self.config.BREAKER_FAILURE_THRESHOLD):
+                    self._open(endpoint, retry_after)
+
+        metrics.observe("api_endpoint_latency_seconds", latency, endpoint=endpoint.name)
+
+    def stats(self) -> List[Dict]:
+        with self._lock:
+            return [endpoint.to_dict() for endpoint in self.endpoints]
+
+    def _open(self, endpoint: Endpoint, retry_after: Optional[float]):
+        if endpoint.state == "half_open":
+            endpoint.cooldown = min(self.MAX_COOLDOWN, max(endpoint.cooldown, 1.0) * 2)
+        else:
+            endpoint.cooldown = self.config.BREAKER_COOLDOWN
+            endpoint.ejections += 1
+            metrics.inc("api_endpoint_ejections_total", endpoint=endpoint.name)
+        endpoint.state = "open"
+        endpoint.open_until = time.time() + max(endpoint.cooldown, retry_after or 0.0)
+        metrics.set_gauge("api_endpoint_open", 1, endpoint=endpoint.name)
+
+    def _select(self, now: float) -> Optional[Endpoint]:
+        candidates = []
+        ejected = []
+        for endpoint in self.endpoints:
+            while endpoint.sent and now - endpoint.sent[0] > self.WINDOW:
+                endpoint.sent.popleft()
+            if endpoint.rpm and len(endpoint.sent) >= endpoint.rpm:
+                continue
+            if endpoint.state == "open":
+                if now < endpoint.open_until:
+                    ejected.append(endpoint)
+                    continue
+                endpoint.state = "half_open"
+            if endpoint.state == "half_open" and endpoint.probing:
+                continue
+            candidates.append(endpoint)
+
+        if not candidates:
+            if not ejected:
+                return None
+            return min(ejected, key=lambda e: e.open_until)
+
+        # 平滑加权轮询，有效权重 = 配置权重 × 剩余配额比例
+        total = 0.0
+        for endpoint in candidates:
+            effective = endpoint.weight * self._headroom(endpoint)
+            endpoint.current_weight += effective
+            total += effective
+        chosen = max(candidates, key=lambda e: e.current_weight)
+        chosen.current_weight -= total
+        if chosen.state == "half_open":
+            chosen.probing = True
+        return chosen
+
+    def _headroom(self, endpoint: Endpoint) -> float:
+        if endpoint.remaining_requests is not None and endpoint.remaining_requests <= 0:
+            return 0.05
+        if not endpoint.rpm:
+            return 1.0
+        return max(0.05, 1 - len(endpoint.sent) / endpoint.rpm)
+
+    def _quota_wait(self, now: float) -> float:
+        waits = [
+            endpoint.sent[0] + self.WINDOW - now
+            for endpoint in self.endpoints if endpoint.rpm and endpoint.sent
+        ]
+        return max(0.05, min(waits)) if waits else 0.05
+
+metrics.describe("api_endpoint_latency_seconds", "各端点请求耗时")
+metrics.describe("api_endpoint_open", "端点熔断状态（1为已摘除）")
+metrics.describe("api_endpoint_ejections_total", "端点被熔断摘除的次数")
@@ -0,0 +1,173 @@
+# ==================== extractor.py ====================
+"""
+本地启发式需求抽取
+按行识别编号条目与含情态词（应/须/需要/支持…）的语句，拆分为带片段内字符偏移的需求，
+按关键词判定需求类型，按要素线索词识别已描述的完整性要素。
+
+每个片段给出置信度 = 需求语句覆盖的正文比例 × 类型判定的平均置信度；
+低于阈值（大段无法归类的叙述、类型判定冲突较多）的片段交给模型解析。
+"""
+
+import hashlib
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from models import Requirement, RequirementType
+
+# “需求”“应用”“响应”不是情态用法
+MODAL = re.compile(
+    r'应当|应该|(?<!响)应(?![用答])|必须|须|需要|需(?!求)|要求|能够|支持|不得|禁止|允许|shall|must|should',
+    re.IGNORECASE
+)
+HEADING = re.compile(r'^(第[一二三四五六七八九十百\d]+[章节]|\d+(\.\d+)*|[A-Z](\.\d+)+)[\s、.]')
+ITEM_LABEL = re.compile(r'^\s*(\d+(\.\d+)*[.、)）]?|[（(]\d+[)）]|[a-zA-Z][.)）]|[-•*·])\s*')
+SUB_ITEM = re.compile(r'^\s*([（(][\da-zA-Z]+[)）]|[a-z][.)）]|[-•*·])')
+SENTENCE_END = re.compile(r'[。；;]')
+
+INTERFACE_CUES = re.compile(r'接口|API|协议|报文|对接|第三方|HTTP|REST|SDK|上游|下游|webservice', re.IGNORECASE)
+NON_FUNCTIONAL_CUES = re.compile(
+    r'性能|响应时间|时延|延迟|并发|吞吐|QPS|TPS|可用性|可靠|容灾|安全|加密|脱敏|兼容|可维护|可扩展|易用|毫秒|\d+\s*ms',
+    re.IGNORECASE
+)
+
+# 默认完整性标准中各要素的线索词；自定义要素以要素名本身出现为准。
+# 线索须描述要素本身（条件从句、阈值数值、具名接口等），只出现功能动词或“接口”“返回”等泛称不算
+ELEMENT_CUES = {
+    "触发条件": r'当[^，。；]{1,30}时|如果|假如|若(?!干)|一旦|触发|(收到|点击|提交|登录|上传|审批|保存)[^，。；]{0,20}(后|时)',
+    "处理逻辑": r'校验|验证|计算|判断|转换|去重|排序|汇总|(按|根据|依据)[^，。；]{1,20}(规则|条件|顺序|算法|策略)',
+    "输出结果": r'返回|输出|显示|展示|提示|通知|发送|导出|生成[^，。；]{0,10}(报表|报告|文件|单据|记录|列表)',
+    "验收标准": r'验收|准确率|成功率|通过率|(不低于|不超过|达到)\s*\d|\d+(\.\d+)?\s*%',
+    "异常处理": r'异常|失败|错误|超时|重试|回滚|告警|降级',
+    "量化指标": r'\d+(\.\d+)?\s*(秒|s\b|ms|毫秒|%|次|个|MB|GB|TPS|QPS|小时|分钟|用户)',
+    "测量场景": r'在[^，。；]{1,20}(情况|场景|条件|负载|环境)下|峰值|高峰|\d+\s*个?并发',
+    "达标条件": r'(不低于|不超过|不高于|小于|大于|低于|高于|至少|≥|≤|<|>)\s*\d|\d+(\.\d+)?\s*\S{0,3}以内',
+    "接口名称": (r'/[a-zA-Z][\w/{}.-]*|[A-Za-z][A-Za-z0-9_.]*(API|Api|Service)'
+                 r'|(?<![A-Za-z0-9_])(?!(HTTPS?|REST|SDK|API|WEB)\s*接口)[A-Za-z][A-Za-z0-9_]*\s*接口'
+                 r'|[“"《「][^”"》」]{1,30}[”"》」]\s*接口'),
+    "输入参数": r'参数|入参|字段|输入项|请求体',
+    "输出格式": r'JSON|XML|CSV|出参|格式为|(返回|响应|输出)(格式|结构|报文|字段)',
+    "调用频率": r'每秒|每分钟|每小时|每天|次/|频率|QPS|TPS'
+}
+
+@dataclass
+class Extraction:
+    """一个片段的本地抽取结果"""
+    requirements: List[Requirement] = field(default_factory=list)
+    confidence: float = 0.0
+    covered_chars: int = 0
+    content_chars: int = 0
+
+class HeuristicExtractor:
+    """确定性的需求拆分、类型判定与要素识别"""
+
+    def __init__(self, criteria: Dict[str, List[str]]):
+        self.element_patterns = {
+            name: re.compile(ELEMENT_CUES.get(name, re.escape(name)), re.IGNORECASE)
+            for elements in criteria.values() for name in elements
+        }
+        self.criteria = criteria
+
+    def extract(self, text: str) -> Extraction:
+        extraction = Extraction()
+        type_confidences = []
+        current: Optional[List] = None  # 最近一条需求 [start, end, statement]
+        statements: List[List] = []
+        previous_line = ""
+
+        offset = 0
+        for raw_line in text.split('\n'):
+            line_start = offset
+            offset += len(raw_line) + 1
+            line = raw_line.strip()
+            if not line:
+                continue
+            start = line_start + raw_line.index(line)
+            end = start + len(line)
+            has_modal = MODAL.search(line) is not None
+
+            if not has_modal and HEADING.match(line) and len(line) <= 40:
+                current = None
+                previous_line = line
+                continue
+
+            extraction.content_chars += len(line)
+            # 子条目或冒号后的列举并入上一条需求
+            if current is not None and not has_modal and (
+                    SUB_ITEM.match(line) or previous_line.endswith(('：', ':'))):
+                current[1] = end
+                current[2] += "\n" + line
+                extraction.covered_chars += len(line)
+            elif has_modal:
+                statements.extend(self._split_statements(line, start))
+                current = statements[-1]
+                extraction.covered_chars += len(line)
+            else:
+                current = None
+            previous_line = line
+
+        for start, end, statement in statements:
+            req_type, type_confidence = self.classify(statement)
+            type_confidences.append(type_confidence)
+            extraction.requirements.append(Requirement(
+                id=f"REQ-{hashlib.md5(f'{start}:{statement}'.encode()).hexdigest()[:8]}",
+                text=statement,
+                req_type=req_type,
+                segment_id="",
+                position=(start, end),
+                elements=self.detect_elements(req_type, statement)
+            ))
+
+        if extraction.content_chars == 0:
+            extraction.confidence = 1.0
+        elif type_confidences:
+            coverage = extraction.covered_chars / extraction.content_chars
+            extraction.confidence = coverage * sum(type_confidences) / len(type_confidences)
+        return extraction
+
+    @staticmethod
+    def _split_statements(line: str, start: int) -> List[List]:
+        """一行内多个各自含情态词的句子拆为多条需求；句中不含情态词的部分并入前一句"""
+        label = ITEM_LABEL.match(line)
+        body_start = label.end() if label and MODAL.search(line, label.end()) else 0
+        pieces = []
+        piece_start = body_start
+        for match in SENTENCE_END.finditer(line, body_start):
+            pieces.append((piece_start, match.end()))
+            piece_start = match.end()
+        if piece_start < len(line):
+            pieces.append((piece_start, len(line)))
+
+        statements = []
+        for piece_start, piece_end in pieces:
+            piece = line[piece_start:piece_end].strip()
+            if not piece:
+                continue
+            if statements and not MODAL.search(piece):
+                previous = statements[-1]
+                previous[1] = start + piece_end
+                previous[2] = line[previous[0] - start:piece_end].strip()
+                continue
+            statements.append([start + piece_start, start + piece_end, piece])
+        return statements
+
+    @staticmethod
+    def classify(statement: str) -> Tuple[RequirementType, float]:
+        """按线索词计数判定类型；两类线索数量相同视为不确定"""
+        interface = len(INTERFACE_CUES.findall(statement))
+        non_functional = len(NON_FUNCTIONAL_CUES.findall(statement))
+        if not interface and not non_functional:
+            return RequirementType.FUNCTIONAL, 0.9
+        if interface == non_functional:
+            return RequirementType.INTERFACE, 0.5
+        req_type = RequirementType.INTERFACE if interface > non_functional else RequirementType.NON_FUNCTIONAL
+        return req_type, 1.0 if min(interface, non_functional) == 0 else 0.75
+
+    def detect_elements(self, req_type: RequirementType, statement: str) -> Dict[str, str]:
+        """识别该类型标准要素在语句中的线索，值为命中的原文片段"""
+        elements = {}
+        for name in self.criteria.get(req_type.value, []):
+            match = self.element_patterns[name].search(statement)
+            if match:
+                elements[name] = match.group(0)
+        return elements
@@ -99,4 +99,9 @@ def main():
         print("无效选择")
 
 if __name__ == "__main__":
+    import sys
+    if len(sys.argv) > 1:
+        # 带参数时走非交互命令行入口，见 cli.py
+        from cli import main as cli_main
+        sys.exit(cli_main())
     main()
\ No newline at end of file
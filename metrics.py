@@ -0,0 +1,266 @@
+# ==================== metrics.py ====================
+import json
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# 默认直方图桶（秒），覆盖毫秒级本地阶段到分钟级LLM调用
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+def _label_key(labels: Dict[str, object]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+def _escape_label(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _format_labels(key: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(key) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape_label(v)}"' for k, v in pairs) + "}"
+
+class Histogram:
+    """累计直方图"""
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """按桶上界近似分位数"""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        cumulative = 0
+        for i, bucket_count in enumerate(self.counts):
+            cumulative += bucket_count
+            if cumulative >= target:
+                return self.buckets[i] if i < len(self.buckets) else float("inf")
+        return float("inf")
+
+class MetricsRegistry:
+    """进程内指标注册表：计数器、仪表、直方图与阶段span
+
+    可导出为Prometheus文本格式或JSON文件，也可启动HTTP端点供抓取。
+    """
+
+    def __init__(self, max_spans: int = 10000):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[LabelKey, float]] = {}
+        self._gauges: Dict[str, Dict[LabelKey, float]] = {}
+        self._histograms: Dict[str, Dict[LabelKey, Histogram]] = {}
+        self._help: Dict[str, str] = {}
+        self.spans: deque = deque(maxlen=max_spans)
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    def describe(self, name: str, help_text: str):
+        self._help[name] = help_text
+
+    def inc(self, name: str, value: float = 1.0, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + value
+
+    def set_gauge(self, name: str, value: float, **labels):
+        with self._lock:
+            self._gauges.setdefault(name, {})[_label_key(labels)] = value
+
+    def add_gauge(self, name: str, delta: float, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            series = self._gauges.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + delta
+
+    def observe(self, name: str, value: float, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = Histogram()
+            histogram.observe(value)
+
+    @contextmanager
+    def span(self, stage: str, **labels) -> Iterator[Dict]:
+        """记录一个阶段的耗时，同时写入 stage_duration_seconds 直方图与span列表"""
+        record = {"stage": stage, "labels": {k: str(v) for k, v in labels.items()},
+                  "thread": threading.current_thread().name, "start": time.time()}
+        start_time = time.perf_counter()
+        status = "ok"
+        try:
+            yield record
+        except Exception:
+            status = "error"
+            raise
+        finally:
+            duration = time.perf_counter() - start_time
+            record["duration"] = duration
+            record["status"] = status
+            self.observe("stage_duration_seconds", duration, stage=stage)
+            if status == "error":
+                self.inc("stage_errors_total", stage=stage)
+            with self._lock:
+                self.spans.append(record)
+
+    def record_error(self, stage: str, error: Exception):
+        self.inc("errors_total", stage=stage, type=type(error).__name__)
+
+    def counter_value(self, name: str, **labels) -> float:
+        with self._lock:
+            series = self._counters.get(name, {})
+            if labels:
+                return series.get(_label_key(labels), 0.0)
+            return sum(series.values())
+
+    def cache_hit_ratio(self) -> Optional[float]:
+        hits = self.counter_value("segment_cache_requests_total", result="hit")
+        misses = self.counter_value("segment_cache_requests_total", result="miss")
+        total = hits + misses
+        return hits / total if total else None
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._histograms.clear()
+            self.spans.clear()
+
+    def to_dict(self, include_spans: bool = False) -> Dict:
+        def labels_of(key: LabelKey) -> Dict[str, str]:
+            return dict(key)
+
+        with self._lock:
+            data = {
+                "counters": {
+                    name: [{"labels": labels_of(k), "value": v} for k, v in series.items()]
+                    for name, series in self._counters.items()
+                },
+                "gauges": {
+                    name: [{"labels": labels_of(k), "value": v} for k, v in series.items()]
+                    for name, series in self._gauges.items()
+                },
+                "histograms": {
+                    name: [
+                        {
+                            "labels": labels_of(k),
+                            "count": h.count,
+                            "sum": h.sum,
+                            "p50": h.quantile(0.5),
+                            "p95": h.quantile(0.95),
+                            "p99": h.quantile(0.99)
+                        }
+                        for k, h in series.items()
+                    ]
+                    for name, series in self._histograms.items()
+                }
+            }
+            spans = list(self.spans) if include_spans else None
+
+        data["cache_hit_ratio"] = self.cache_hit_ratio()
+        if spans is not None:
+            data["spans"] = spans
+        return data
+
+    def export_json(self, path: str, include_spans: bool = True):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(include_spans), f, ensure_ascii=False, indent=2, default=str)
+
+    def to_prometheus(self) -> str:
+        lines: List[str] = []
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                self._append_header(lines, name, "counter")
+                for key, value in series.items():
+                    lines.append(f"{name}{_format_labels(key)} {value}")
+            for name, series in sorted(self._gauges.items()):
+                self._append_header(lines, name, "gauge")
+                for key, value in series.items():
+                    lines.append(f"{name}{_format_labels(key)} {value}")
+            for name, series in sorted(self._histograms.items()):
+                self._append_header(lines, name, "histogram")
+                for key, histogram in series.items():
+                    cumulative = 0
+                    for bound, bucket_count in zip(histogram.buckets, histogram.counts):
+                        cumulative += bucket_count
+                        lines.append(f"{name}_bucket{_format_labels(key, ('le', str(bound)))} {cumulative}")
+                    lines.append(f"{name}_bucket{_format_labels(key, ('le', '+Inf'))} {histogram.count}")
+                    lines.append(f"{name}_sum{_format_labels(key)} {histogram.sum}")
+                    lines.append(f"{name}_count{_format_labels(key)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def _append_header(self, lines: List[str], name: str, metric_type: str):
+        if name in self._help:
+            lines.append(f"# HELP {name} {self._help[name]}")
+        lines.append(f"# TYPE {name} {metric_type}")
+
+    def serve(self, port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+        """启动 /metrics（Prometheus文本）与 /metrics.json 端点，重复调用返回同一服务"""
+        if self._server is not None:
+            return self._server
+
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                if self.path.startswith("/metrics.json"):
+                    body = json.dumps(registry.to_dict(), ensure_ascii=False, default=str).encode("utf-8")
+                    content_type = "application/json; charset=utf-8"
+                elif self.path.startswith("/metrics"):
+                    body = registry.to_prometheus().encode("utf-8")
+                    content_type = "text/plain; version=0.0.4; charset=utf-8"
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name="metrics-server", daemon=True).start()
+        return self._server
+
+metrics = MetricsRegistry()
+
+metrics.describe("stage_duration_seconds", "各处理阶段耗时")
+metrics.describe("api_request_duration_seconds", "单次API请求耗时（含失败）")
+metrics.describe("api_requests_total", "API请求次数（按结果）")
+metrics.describe("api_retries_total", "API重试次数")
+metrics.describe("api_tokens_total", "API token用量（按类别）")
+metrics.describe("api_inflight_requests", "进行中的API请求数")
+metrics.describe("segment_cache_requests_total", "片段解析级缓存查询次数（hit/miss）")
+metrics.describe("evaluation_cache_requests_total", "需求评估级缓存查询次数（hit/miss）")
+metrics.describe("local_extraction_total", "本地抽取结果（accepted 直接采用 / fallback 交给模型解析）")
+metrics.describe("discovery_duplicates_total", "文档发现时跳过的重复文档（same_file/same_content）")
+metrics.describe("sampled_segments_total", "抽样估计验证的片段数（含后台补全）")
+metrics.describe("table_requirements_total", "从需求表（xlsx/csv）直接读取的需求条数")
+metrics.describe("rescore_unparsed_segments_total", "重新评分时尚未解析、需先调用解析接口的片段数")
+metrics.describe("segment_queue_depth", "待处理片段数")
+metrics.describe("extraction_cache_requests_total", "抽取缓存查询次数（hit/miss）")
+metrics.describe("schedule_efficiency", "片段调度效率（理想完成时间下界 / 实际完成时间）")
+metrics.describe("api_truncated_responses_total", "因达到max_tokens被截断的响应数")
+metrics.describe("segment_splits_total", "输出截断后拆分输入的次数")
+metrics.describe("api_hedged_requests_total", "对冲请求次数（sent/won/lost/over_budget）")
+metrics.describe("document_deadline_exceeded_total", "超出文档时限的文档数")
+metrics.describe("segments_unfinished_total", "因文档时限未等待完成的片段数")
+metrics.describe("report_queue_depth", "待渲染报告数")
+metrics.describe("errors_total", "各阶段失败次数")
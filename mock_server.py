@@ -0,0 +1,361 @@
+# ==================== mock_server.py ====================
+"""
+本地DeepSeek兼容模拟服务，用于离线压测与回归测试
+用法：python mock_server.py --port 8765 --latency lognormal:-1.5:0.5 --error-rate 0.02 --rate-limit-rate 0.05
+然后设置 Config.API_URL = "http://127.0.0.1:8765/v1/chat/completions"
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+from tokens import estimate_tokens
+
+DEFAULT_CRITERIA = {
+    "功能需求": ["触发条件", "处理逻辑", "输出结果", "验收标准", "异常处理"],
+    "非功能需求": ["量化指标", "测量场景", "达标条件"],
+    "接口需求": ["接口名称", "输入参数", "输出格式", "调用频率"]
+}
+
+REQUIREMENT_MARKERS = ("应", "需", "须", "支持", "要求", "shall", "must", "should")
+NON_FUNCTIONAL_MARKERS = ("性能", "安全", "可用", "响应时间", "并发", "加密", "可靠")
+
+class LatencyModel:
+    """延迟分布：fixed:秒 | uniform:下限:上限 | normal:均值:标准差 | lognormal:mu:sigma"""
+
+    def __init__(self, spec: str = "fixed:0", seed: Optional[int] = None):
+        parts = spec.split(":")
+        self.kind = parts[0]
+        self.params = [float(p) for p in parts[1:]]
+        self.rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+        expected = {"fixed": 1, "uniform": 2, "normal": 2, "lognormal": 2}
+        if self.kind not in expected or len(self.params) != expected[self.kind]:
+            raise ValueError(f"无效的延迟分布: {spec}")
+
+    def sample(self) -> float:
+        with self._lock:
+            if self.kind == "fixed":
+                return self.params[0]
+            if self.kind == "uniform":
+                return self.rng.uniform(*self.params)
+            if self.kind == "normal":
+                return max(0.0, self.rng.gauss(*self.params))
+            return self.rng.lognormvariate(*self.params)
+
+class PrefixCache:
+    """模拟服务端上下文缓存：以固定长度的前缀块为单位记录见过的请求前缀，返回命中的前缀长度"""
+
+    BLOCK_CHARS = 64
+
+    def __init__(self, capacity: int = 100000):
+        self.capacity = capacity
+        self._blocks: "OrderedDict[bytes, None]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def lookup(self, text: str) -> int:
+        digest = hashlib.sha1()
+        keys = []
+        for end in range(self.BLOCK_CHARS, len(text) + 1, self.BLOCK_CHARS):
+            digest.update(text[end - self.BLOCK_CHARS:end].encode("utf-8"))
+            keys.append((end, digest.digest()))
+
+        hit = 0
+        with self._lock:
+            for end, key in keys:
+                if key not in self._blocks:
+                    break
+                hit = end
+            for _, key in keys:
+                self._blocks[key] = None
+                self._blocks.move_to_end(key)
+            while len(self._blocks) > self.capacity:
+                self._blocks.popitem(last=False)
+        return hit
+
+class MockResponder:
+    """根据提示内容生成确定性的解析/评估响应"""
+
+    def respond(self, messages: List[Dict]) -> str:
+        prompt = "\n".join(str(m.get("content", "")) for m in messages)
+        eval_input = None if "文档片段：" in prompt else self._find_evaluation_input(prompt)
+        if eval_input is not None:
+            criteria = eval_input.get("criteria") or self._find_criteria(prompt)
+            return json.dumps(self._evaluate(eval_input, criteria), ensure_ascii=False)
+        return json.dumps(self._parse(prompt), ensure_ascii=False)
+
+    def _find_evaluation_input(self, prompt: str) -> Optional[Dict]:
+        decoder = json.JSONDecoder()
+        for match in re.finditer(r'\{', prompt):
+            try:
+                data, _ = decoder.raw_decode(prompt, match.start())
+            except json.JSONDecodeError:
+                continue
+            reqs = data.get("requirements") if isinstance(data, dict) else None
+            if isinstance(reqs, list) and reqs and isinstance(reqs[0], dict) and "text" in reqs[0]:
+                return data
+        return None
+
+    def _find_criteria(self, prompt: str) -> Optional[Dict]:
+        marker = "完整性评估标准："
+        start = prompt.find("{", prompt.find(marker)) if marker in prompt else -1
+        if start < 0:
+            return None
+        try:
+            data, _ = json.JSONDecoder().raw_decode(prompt, start)
+        except json.JSONDecodeError:
+            return None
+        return data if isinstance(data, dict) and all(isinstance(v, list) for v in data.values()) else None
+
+    def _parse(self, prompt: str) -> Dict:
+        text = prompt
+        if "文档片段：" in prompt:
+            text = prompt.rsplit("文档片段：", 1)[1]
+        text = text.replace("请开始解析：", "")
+
+        requirements = []
+        for line in text.split("\n"):
+            line = line.strip()
+            if len(line) < 6 or not any(marker in line for marker in REQUIREMENT_MARKERS):
+                continue
+            if "接口" in line:
+                req_type = "接口需求"
+            elif any(marker in line for marker in NON_FUNCTIONAL_MARKERS):
+                req_type = "非功能需求"
+            else:
+                req_type = "功能需求"
+            digest = hashlib.md5(line.encode()).hexdigest()
+            requirements.append({
+                "id": f"REQ-{digest[:8]}",
+                "text": line,
+                "type": req_type,
+                "elements": self._present_elements(req_type, digest)
+            })
+        return {"requirements": requirements}
+
+    def _present_elements(self, req_type: str, digest: str) -> Dict[str, str]:
+        elements = DEFAULT_CRITERIA.get(req_type, [])
+        bits = int(digest[8:16], 16)
+        return {elem: "已描述" for i, elem in enumerate(elements) if bits >> i & 1}
+
+    def _evaluate(self, eval_input: Dict, criteria: Optional[Dict] = None) -> Dict:
+        criteria = criteria or DEFAULT_CRITERIA
+        evaluated = []
+        for req in eval_input["requirements"]:
+            expected = criteria.get(req.get("type", ""), [])
+            present = req.get("elements") or {}
+            missing = [elem for elem in expected if elem not in present]
+            digest = int(hashlib.md5(str(req.get("id", "")).encode()).hexdigest()[:8], 16)
+            score = 100.0 if not expected else round((1 - len(missing) / len(expected)) * 100, 1)
+            evaluated.append({
+                "id": req.get("id"),
+                "completeness_score": max(0.0, score - digest % 10),
+                "missing_elements": missing,
+                "improvement_suggestions": [f"补充{elem}的具体描述" for elem in missing]
+            })
+        return {"requirements": evaluated}
+
+class MockDeepSeekServer:
+    """DeepSeek chat-completions 兼容的本地模拟服务"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency: str = "fixed:0",
+                 error_rate: float = 0.0, rate_limit_rate: float = 0.0, seed: Optional[int] = None,
+                 prefix_cache: bool = True, output_tokens_per_sec: float = 0.0):
+        self.latency = LatencyModel(latency, seed)
+        self.output_tokens_per_sec = output_tokens_per_sec
+        self.prefix_cache = PrefixCache() if prefix_cache else None
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.responder = MockResponder()
+        self.rng = random.Random(seed)
+        self.stats = {"requests": 0, "errors": 0, "rate_limited": 0, "streamed": 0}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+        handler = self._make_handler()
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.httpd.daemon_threads = True
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/v1/chat/completions"
+
+    def start(self) -> "MockDeepSeekServer":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="mock-deepseek", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self._thread:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+        return False
+
+    def _draw_fault(self) -> Optional[int]:
+        with self._lock:
+            self.stats["requests"] += 1
+            roll = self.rng.random()
+            if roll < self.rate_limit_rate:
+                self.stats["rate_limited"] += 1
+                return 429
+            if roll < self.rate_limit_rate + self.error_rate:
+                self.stats["errors"] += 1
+                return 500
+        return None
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # 头部与正文分两次写出，关闭Nagle避免与延迟ACK叠加出约40ms的额外延迟
+            disable_nagle_algorithm = True
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                try:
+                    payload = json.loads(self.rfile.read(length) or b"{}")
+                except json.JSONDecodeError:
+                    self._send_json(400, {"error": {"message": "invalid json"}})
+                    return
+
+                time.sleep(server.latency.sample())
+
+                fault = server._draw_fault()
+                if fault == 429:
+                    self._send_json(429, {"error": {"message": "rate limit"}}, {"Retry-After": "1"})
+                    return
+                if fault == 500:
+                    self._send_json(500, {"error": {"message": "injected failure"}})
+                    return
+
+                messages = payload.get("messages", [])
+                content = server.responder.respond(messages)
+                prompt = "".join(str(m.get("content", "")) for m in messages)
+                prompt_tokens = estimate_tokens(prompt)
+                completion_tokens = estimate_tokens(content)
+                finish_reason = "stop"
+                max_tokens = payload.get("max_tokens")
+                if max_tokens and completion_tokens > max_tokens:
+                    # 与真实服务一致：输出在 max_tokens 处截断，JSON通常不完整
+                    content = content[:len(content) * max_tokens // completion_tokens]
+                    completion_tokens = estimate_tokens(content)
+                    finish_reason = "length"
+                if server.output_tokens_per_sec > 0:
+                    # 生成耗时随输出长度增长
+                    time.sleep(completion_tokens / server.output_tokens_per_sec)
+                cached_chars = server.prefix_cache.lookup(prompt) if server.prefix_cache else 0
+                cache_hit_tokens = min(prompt_tokens, estimate_tokens(prompt[:cached_chars]))
+                usage = {
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": completion_tokens,
+                    "total_tokens": prompt_tokens + completion_tokens,
+                    "prompt_cache_hit_tokens": cache_hit_tokens,
+                    "prompt_cache_miss_tokens": prompt_tokens - cache_hit_tokens
+                }
+
+                if payload.get("stream"):
+                    with server._lock:
+                        server.stats["streamed"] += 1
+                    self._send_stream(payload, content, usage)
+                else:
+                    self._send_json(200, {
+                        "id": f"mock-{uuid.uuid4().hex}",
+                        "object": "chat.completion",
+                        "created": int(time.time()),
+                        "model": payload.get("model", "deepseek-chat"),
+                        "choices": [{
+                            "index": 0,
+                            "message": {"role": "assistant", "content": content},
+                            "finish_reason": finish_reason
+                        }],
+                        "usage": usage
+                    })
+
+            def _send_json(self, status: int, body: Dict, headers: Dict[str, str] = None):
+                data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _send_stream(self, payload: Dict, content: str, usage: Dict):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Cache-Control", "no-cache")
+                self.send_header("Connection", "close")
+                self.end_headers()
+
+                chunk_id = f"mock-{uuid.uuid4().hex}"
+                pieces = [content[i:i + 32] for i in range(0, len(content), 32)] or [""]
+                for i, piece in enumerate(pieces):
+                    chunk = {
+                        "id": chunk_id,
+                        "object": "chat.completion.chunk",
+                        "model": payload.get("model", "deepseek-chat"),
+                        "choices": [{
+                            "index": 0,
+                            "delta": {"content": piece},
+                            "finish_reason": "stop" if i == len(pieces) - 1 else None
+                        }]
+                    }
+                    if i == len(pieces) - 1:
+                        chunk["usage"] = usage
+                    self.wfile.write(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode("utf-8"))
+                    self.wfile.flush()
+                self.wfile.write(b"data: [DONE]\n\n")
+                self.wfile.flush()
+                self.close_connection = True
+
+        return Handler
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="本地DeepSeek模拟服务")
+    arg_parser.add_argument("--host", default="127.0.0.1")
+    arg_parser.add_argument("--port", type=int, default=8765)
+    arg_parser.add_argument("--latency", default="fixed:0", help="fixed:s | uniform:a:b | normal:m:sd | lognormal:mu:sigma")
+    arg_parser.add_argument("--error-rate", type=float, default=0.0)
+    arg_parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    arg_parser.add_argument("--seed", type=int, default=None)
+    arg_parser.add_argument("--output-tokens-per-sec", type=float, default=0.0,
+                            help=">0 时按输出token数追加生成耗时")
+    arg_parser.add_argument("--no-prefix-cache", action="store_true", help="不模拟上下文缓存（缓存命中token恒为0）")
+    args = arg_parser.parse_args()
+
+    server = MockDeepSeekServer(args.host, args.port, args.latency,
+                                args.error_rate, args.rate_limit_rate, args.seed,
+                                prefix_cache=not args.no_prefix_cache,
+                                output_tokens_per_sec=args.output_tokens_per_sec)
+    print(f"模拟服务已启动: {server.url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+if __name__ == "__main__":
+    main()
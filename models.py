@@ -1,6 +1,8 @@
 # ==================== models.py ====================
-from dataclasses import dataclass
-from typing import List, Dict, Tuple, Optional
+import sys
+from array import array
+from dataclasses import dataclass, field, fields
+from typing import List, Dict, Tuple, Optional, Iterator, Iterable, Sequence, Union
 from enum import Enum
 
 class RequirementType(Enum):
@@ -9,7 +11,13 @@ class RequirementType(Enum):
     INTERFACE = "接口需求"
     UNKNOWN = "未知类型"
 
-@dataclass
+def intern_strings(values: Optional[Iterable[str]]) -> List[str]:
+    """驻留要素名等高重复字符串，使大量需求共享同一个字符串对象"""
+    if not values:
+        return []
+    return [sys.intern(v) if isinstance(v, str) else v for v in values]
+
+@dataclass(slots=True)
 class Requirement:
     """需求项数据模型"""
     id: str
@@ -30,8 +38,28 @@ class Requirement:
             self.missing_elements = []
         if self.improvement_suggestions is None:
             self.improvement_suggestions = []
+    
+    def to_dict(self) -> Dict:
+        return {
+            "id": self.id,
+            "text": self.text,
+            "req_type": self.req_type.value,
+            "segment_id": self.segment_id,
+            "position": list(self.position),
+            "elements": self.elements,
+            "completeness_score": self.completeness_score,
+            "missing_elements": self.missing_elements,
+            "improvement_suggestions": self.improvement_suggestions
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict) -> "Requirement":
+        data = dict(data)
+        data["req_type"] = RequirementType(data.get("req_type", RequirementType.UNKNOWN.value))
+        data["position"] = tuple(data.get("position", (0, 0)))
+        return cls(**data)
 
-@dataclass
+@dataclass(slots=True)
 class DocumentSegment:
     """文档片段"""
     id: str
@@ -44,7 +72,227 @@ class DocumentSegment:
         if self.requirements is None:
             self.requirements = []
 
-@dataclass
+class RequirementView:
+    """RequirementTable中单行的只读/可写视图，属性接口与Requirement一致
+
+    注意：missing_elements等列表属性每次访问返回新列表，原地修改不会写回，需整体赋值。
+    """
+    
+    __slots__ = ("_table", "_row")
+    
+    def __init__(self, table: "RequirementTable", row: int):
+        self._table = table
+        self._row = row
+    
+    @property
+    def id(self) -> str:
+        return self._table.ids[self._row]
+    
+    @id.setter
+    def id(self, value: str):
+        self._table.ids[self._row] = value
+    
+    @property
+    def text(self) -> str:
+        return self._table.texts[self._row]
+    
+    @text.setter
+    def text(self, value: str):
+        self._table.texts[self._row] = value
+    
+    @property
+    def req_type(self) -> RequirementType:
+        return RequirementTable.TYPES[self._table.type_codes[self._row]]
+    
+    @req_type.setter
+    def req_type(self, value: RequirementType):
+        self._table.type_codes[self._row] = RequirementTable.TYPE_CODES[value]
+    
+    @property
+    def segment_id(self) -> str:
+        return self._table.segment_ids[self._row]
+    
+    @segment_id.setter
+    def segment_id(self, value: str):
+        self._table.segment_ids[self._row] = sys.intern(value)
+    
+    @property
+    def position(self) -> Tuple[int, int]:
+        return (self._table.starts[self._row], self._table.ends[self._row])
+    
+    @position.setter
+    def position(self, value: Tuple[int, int]):
+        self._table.starts[self._row], self._table.ends[self._row] = value
+    
+    @property
+    def elements(self) -> Dict[str, str]:
+        return self._table.elements[self._row] or {}
+    
+    @elements.setter
+    def elements(self, value: Dict[str, str]):
+        self._table.elements[self._row] = value or None
+    
+    @property
+    def completeness_score(self) -> float:
+        return self._table.scores[self._row]
+    
+    @completeness_score.setter
+    def completeness_score(self, value: float):
+        self._table.scores[self._row] = value
+    
+    @property
+    def missing_elements(self) -> List[str]:
+        return list(self._table.missing_vocab[self._table.missing_codes[self._row]])
+    
+    @missing_elements.setter
+    def missing_elements(self, value: List[str]):
+        self._table.missing_codes[self._row] = self._table._missing_code(value)
+    
+    @property
+    def improvement_suggestions(self) -> List[str]:
+        return list(self._table.suggestions[self._row])
+    
+    @improvement_suggestions.setter
+    def improvement_suggestions(self, value: List[str]):
+        self._table.suggestions[self._row] = tuple(value or ())
+    
+    def to_requirement(self) -> Requirement:
+        return Requirement(
+            id=self.id,
+            text=self.text,
+            req_type=self.req_type,
+            segment_id=self.segment_id,
+            position=self.position,
+            elements=dict(self.elements),
+            completeness_score=self.completeness_score,
+            missing_elements=self.missing_elements,
+            improvement_suggestions=self.improvement_suggestions
+        )
+    
+    def to_dict(self) -> Dict:
+        return self.to_requirement().to_dict()
+    
+    def __repr__(self) -> str:
+        return f"RequirementView(id={self.id!r}, req_type={self.req_type}, score={self.completeness_score})"
+
+class RequirementTable(Sequence):
+    """列式需求存储
+
+    每列一个list/array，类型编码为单字节，缺失要素组合去重后以下标引用，
+    片段ID与要素名驻留共享。按下标或迭代访问时返回RequirementView。
+    """
+    
+    TYPES: Tuple[RequirementType, ...] = tuple(RequirementType)
+    TYPE_CODES: Dict[RequirementType, int] = {t: i for i, t in enumerate(TYPES)}
+    
+    def __init__(self, requirements: Iterable[Requirement] = ()):
+        self.ids: List[str] = []
+        self.texts: List[str] = []
+        self.type_codes = array('B')
+        self.segment_ids: List[str] = []
+        self.starts = array('q')
+        self.ends = array('q')
+        self.scores = array('d')
+        self.elements: List[Optional[Dict[str, str]]] = []
+        self.missing_codes = array('I')
+        self.missing_vocab: List[Tuple[str, ...]] = [()]
+        self._missing_index: Dict[Tuple[str, ...], int] = {(): 0}
+        self.suggestions: List[Tuple[str, ...]] = []
+        
+        for req in requirements:
+            self.append(req)
+    
+    def append(self, req: Union[Requirement, RequirementView]):
+        start, end = req.position
+        self.ids.append(req.id)
+        self.texts.append(req.text)
+        self.type_codes.append(self.TYPE_CODES[req.req_type])
+        self.segment_ids.append(sys.intern(req.segment_id))
+        self.starts.append(start)
+        self.ends.append(end)
+        self.scores.append(float(req.completeness_score))
+        self.elements.append(req.elements or None)
+        self.missing_codes.append(self._missing_code(req.missing_elements))
+        self.suggestions.append(tuple(req.improvement_suggestions or ()))
+    
+    def to_requirements(self) -> List[Requirement]:
+        return [view.to_requirement() for view in self]
+    
+    def _missing_code(self, missing: Optional[Iterable[str]]) -> int:
+        key = tuple(intern_strings(missing))
+        code = self._missing_index.get(key)
+        if code is None:
+            code = len(self.missing_vocab)
+            self.missing_vocab.append(key)
+            self._missing_index[key] = code
+        return code
+    
+    def __len__(self) -> int:
+        return len(self.ids)
+    
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [RequirementView(self, i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("RequirementTable index out of range")
+        return RequirementView(self, index)
+    
+    def __iter__(self) -> Iterator[RequirementView]:
+        for i in range(len(self)):
+            yield RequirementView(self, i)
+
+@dataclass(slots=True)
+class TokenUsage:
+    """API token用量累计"""
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cache_hit_tokens: int = 0
+    cache_miss_tokens: int = 0
+    requests: int = 0
+    
+    @property
+    def total_tokens(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+    
+    @property
+    def cache_hit_ratio(self) -> float:
+        """输入token中命中服务端前缀缓存的比例"""
+        return self.cache_hit_tokens / self.prompt_tokens if self.prompt_tokens else 0.0
+    
+    def add(self, other: "TokenUsage") -> "TokenUsage":
+        self.prompt_tokens += other.prompt_tokens
+        self.completion_tokens += other.completion_tokens
+        self.cache_hit_tokens += other.cache_hit_tokens
+        self.cache_miss_tokens += other.cache_miss_tokens
+        self.requests += other.requests
+        return self
+    
+    @classmethod
+    def from_api(cls, usage: Optional[Dict]) -> "TokenUsage":
+        """由API响应中的usage字段构造，记为一次请求"""
+        usage = usage or {}
+        return cls(
+            prompt_tokens=usage.get("prompt_tokens", 0),
+            completion_tokens=usage.get("completion_tokens", 0),
+            cache_hit_tokens=usage.get("prompt_cache_hit_tokens", 0),
+            cache_miss_tokens=usage.get("prompt_cache_miss_tokens", 0),
+            requests=1
+        )
+    
+    def to_dict(self) -> Dict:
+        data = {f.name: getattr(self, f.name) for f in fields(self)}
+        data["total_tokens"] = self.total_tokens
+        data["cache_hit_ratio"] = round(self.cache_hit_ratio, 4)
+        return data
+    
+    @classmethod
+    def from_dict(cls, data: Optional[Dict]) -> "TokenUsage":
+        data = data or {}
+        return cls(**{f.name: data.get(f.name, 0) for f in fields(cls)})
+
+@dataclass(slots=True)
 class ValidationResult:
     """验证结果"""
     document_id: str
@@ -53,6 +301,47 @@ class ValidationResult:
     complete_requirements: int
     completeness_score: float
     missing_elements_by_type: Dict[str, Dict[str, int]]
-    requirements_details: List[Requirement]
+    requirements_details: Union[List[Requirement], RequirementTable]
     validation_time: float
-    generated_at: str
\ No newline at end of file
+    generated_at: str
+    stage_timings: Dict[str, float] = field(default_factory=dict)
+    token_usage: TokenUsage = field(default_factory=TokenUsage)
+    segment_token_usage: Dict[str, TokenUsage] = field(default_factory=dict)
+    estimated_cost: float = 0.0
+    unfinished_segments: List[str] = field(default_factory=list)
+    schedule: Dict[str, float] = field(default_factory=dict)
+    sampling: Dict = field(default_factory=dict)
+    
+    @property
+    def partial(self) -> bool:
+        """是否因文档时限或抽样估计未覆盖全部片段"""
+        return bool(self.unfinished_segments)
+    
+    @property
+    def partial_note(self) -> Tuple[str, str]:
+        """报告“文档基本信息”中说明结果不完整的一行"""
+        if self.sampling:
+            interval = self.sampling["completeness_score"]
+            return ('抽样估计', f"已验证 {self.sampling['sampled_segments']}/{self.sampling['total_segments']} 个片段，"
+                                f"完整性得分 {self.sampling['confidence']:.0%} 置信区间 "
+                                f"{interval['low']:.2f}% ~ {interval['high']:.2f}%")
+        return ('未完成片段', f"{len(self.unfinished_segments)} 个（超出文档时限，结果不完整）")
+    
+    def to_dict(self) -> Dict:
+        data = {field.name: getattr(self, field.name) for field in fields(self)}
+        data["requirements_details"] = [req.to_dict() for req in self.requirements_details]
+        data["token_usage"] = self.token_usage.to_dict()
+        data["segment_token_usage"] = {k: v.to_dict() for k, v in self.segment_token_usage.items()}
+        return data
+    
+    @classmethod
+    def from_dict(cls, data: Dict) -> "ValidationResult":
+        data = dict(data)
+        data["requirements_details"] = [
+            Requirement.from_dict(req) for req in data.get("requirements_details", [])
+        ]
+        data["token_usage"] = TokenUsage.from_dict(data.get("token_usage"))
+        data["segment_token_usage"] = {
+            k: TokenUsage.from_dict(v) for k, v in (data.get("segment_token_usage") or {}).items()
+        }
+        return cls(**data)
\ No newline at end of file
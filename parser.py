@@ -1,10 +1,12 @@
 # ==================== parser.py ====================
 import json
 import re
+import sys
 import hashlib
 from typing import List, Dict, Optional
 
-from models import Requirement, RequirementType
+from models import Requirement, RequirementType, intern_strings
+from metrics import metrics
 
 class ResultParser:
     """结果解析器"""
@@ -13,12 +15,25 @@ class ResultParser:
         self.criteria = criteria
         
     def parse_requirements(self, api_response: str) -> List[Requirement]:
+        with metrics.span("parsing", kind="requirements"):
+            return self._parse_requirements(api_response)
+    
+    def parse_evaluation(self, api_response: str, requirements: List[Requirement],
+                         matched: Optional[set] = None) -> List[Requirement]:
+        """将评估结果写回需求；matched 不为 None 时收集响应中实际包含评估的需求ID"""
+        with metrics.span("parsing", kind="evaluation"):
+            return self._parse_evaluation(api_response, requirements, matched)
+    
+    def _parse_requirements(self, api_response: str) -> List[Requirement]:
         try:
             data = json.loads(api_response)
             requirements = []
             
             for req_data in data.get("requirements", []):
                 req_type = self._map_requirement_type(req_data.get("type", "未知类型"))
+                elements = req_data.get("elements", {})
+                if isinstance(elements, dict):
+                    elements = {sys.intern(str(k)): v for k, v in elements.items()}
                 
                 requirement = Requirement(
                     id=req_data.get("id", f"REQ-{hashlib.md5(str(req_data).encode()).hexdigest()[:8]}"),
@@ -26,7 +41,7 @@ class ResultParser:
                     req_type=req_type,
                     segment_id="",
                     position=(0, 0),
-                    elements=req_data.get("elements", {})
+                    elements=elements
                 )
                 
                 requirements.append(requirement)
@@ -35,10 +50,13 @@ class ResultParser:
         except json.JSONDecodeError:
             fixed_json = self._fix_json_format(api_response)
             if fixed_json:
-                return self.parse_requirements(fixed_json)
+                metrics.inc("parser_json_repairs_total", result="fixed")
+                return self._parse_requirements(fixed_json)
+            metrics.inc("parser_json_repairs_total", result="failed")
             return []
     
-    def parse_evaluation(self, api_response: str, requirements: List[Requirement]) -> List[Requirement]:
+    def _parse_evaluation(self, api_response: str, requirements: List[Requirement],
+                          matched: Optional[set] = None) -> List[Requirement]:
         try:
             data = json.loads(api_response)
             eval_map = {}
@@ -48,7 +66,7 @@ class ResultParser:
                 if req_id:
                     eval_map[req_id] = {
                         "score": eval_data.get("completeness_score", 0),
-                        "missing": eval_data.get("missing_elements", []),
+                        "missing": intern_strings(eval_data.get("missing_elements", [])),
                         "suggestions": eval_data.get("improvement_suggestions", [])
                     }
             
@@ -58,9 +76,12 @@ class ResultParser:
                     requirement.completeness_score = eval_result["score"]
                     requirement.missing_elements = eval_result["missing"]
                     requirement.improvement_suggestions = eval_result["suggestions"]
+                    if matched is not None:
+                        matched.add(requirement.id)
             
             return requirements
-        except Exception:
+        except Exception as e:
+            metrics.record_error("parsing", e)
             return requirements
     
     def _map_requirement_type(self, type_str: str) -> RequirementType:
@@ -1,12 +1,110 @@
 # ==================== preprocessor.py ====================
+import hashlib
+import os
 import re
+import struct
+import threading
+import zlib
 from pathlib import Path
-from typing import List
-import docx
-from docx import Document
-import PyPDF2
+from typing import Dict, List, Optional, Tuple
 
 from models import DocumentSegment
+from metrics import metrics
+
+# 抽取、清理或分段逻辑变化时递增，使旧的抽取缓存失效
+PREPROCESSOR_VERSION = 1
+
+_digest_memo: Dict[Tuple[str, int, int], str] = {}
+_digest_lock = threading.Lock()
+
+def file_digest(path: Path) -> str:
+    """文件内容的sha256，用于判断文档是否变化；同一进程内路径、大小与修改时间不变时复用上次结果"""
+    stat = os.stat(path)
+    memo_key = (str(path), stat.st_size, stat.st_mtime_ns)
+    with _digest_lock:
+        if memo_key in _digest_memo:
+            return _digest_memo[memo_key]
+    
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    
+    with _digest_lock:
+        if len(_digest_memo) >= 4096:
+            _digest_memo.clear()
+        _digest_memo[memo_key] = digest.hexdigest()
+    return digest.hexdigest()
+
+class ExtractionCache:
+    """预处理结果缓存
+
+    键为文件内容哈希 + 预处理参数，与文件名无关；片段ID与来源以文件名为前缀，
+    存储时只保留前缀之后的部分，读取时按当前文件名还原。
+    值为 zlib 压缩的二进制记录：片段数，随后每个片段依次为 ID后缀、来源后缀、正文（均为长度前缀的UTF-8）。
+    """
+    
+    MAGIC = b"RQSEG1"
+    
+    def __init__(self, cache_dir: str):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+    
+    def path_for(self, digest: str, settings: str) -> Path:
+        key = hashlib.sha256(f"{digest}:{settings}".encode()).hexdigest()[:32]
+        return self.cache_dir / f"{key}.seg"
+    
+    def load(self, path: Path, filename: str) -> Optional[List[DocumentSegment]]:
+        """读取缓存；文件不存在或格式不符时返回 None，损坏的文件（截断、写坏）同时删除"""
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        if not data.startswith(self.MAGIC):
+            return None
+        
+        try:
+            return self._decode(zlib.decompress(data[len(self.MAGIC):]), filename)
+        except (zlib.error, struct.error, ValueError) as e:
+            metrics.record_error("extraction_cache", e)
+            path.unlink(missing_ok=True)
+            return None
+    
+    @staticmethod
+    def _decode(payload: bytes, filename: str) -> List[DocumentSegment]:
+        (count,) = struct.unpack_from("<I", payload, 0)
+        offset = 4
+        segments = []
+        for _ in range(count):
+            fields = []
+            for _ in range(3):
+                (length,) = struct.unpack_from("<I", payload, offset)
+                offset += 4
+                if offset + length > len(payload):
+                    raise ValueError("片段记录超出缓存数据长度")
+                fields.append(payload[offset:offset + length].decode("utf-8"))
+                offset += length
+            id_suffix, source_suffix, text = fields
+            segments.append(DocumentSegment(
+                id=filename + id_suffix,
+                text=text,
+                original_file=filename + source_suffix
+            ))
+        return segments
+    
+    def store(self, path: Path, filename: str, segments: List[DocumentSegment]):
+        parts = [struct.pack("<I", len(segments))]
+        for segment in segments:
+            for value in (segment.id[len(filename):], segment.original_file[len(filename):], segment.text):
+                encoded = value.encode("utf-8")
+                parts.append(struct.pack("<I", len(encoded)))
+                parts.append(encoded)
+        
+        tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp_path, 'wb') as f:
+            f.write(self.MAGIC + zlib.compress(b"".join(parts), 6))
+        os.replace(tmp_path, path)
 
 class TextCleaner:
     """文本清理工具类"""
@@ -46,28 +144,55 @@ class TextCleaner:
 class DocumentPreprocessor:
     """文档预处理类"""
     
-    def __init__(self, max_segment_length: int = 30000):
+    def __init__(self, max_segment_length: int = 30000, cache_dir: Optional[str] = None):
         self.max_segment_length = max_segment_length
         self.text_cleaner = TextCleaner()
+        self.cache = ExtractionCache(cache_dir) if cache_dir else None
         
     def process_document(self, file_path: str) -> List[DocumentSegment]:
+        """抽取、清理并分段；配置了缓存目录时，内容与参数未变的文档直接读取缓存的片段"""
+        if self.cache is None:
+            return self._process_document(file_path)
+        
+        filename = Path(file_path).name
+        cache_path = self.cache.path_for(
+            file_digest(Path(file_path)), f"{PREPROCESSOR_VERSION}:{self.max_segment_length}"
+        )
+        segments = self.cache.load(cache_path, filename)
+        if segments is not None:
+            metrics.inc("extraction_cache_requests_total", result="hit")
+            return segments
+        
+        metrics.inc("extraction_cache_requests_total", result="miss")
+        segments = self._process_document(file_path)
+        # 分段ID均以文件名为前缀，不满足时（理论上不会出现）不写缓存
+        if all(s.id.startswith(filename) and s.original_file.startswith(filename) for s in segments):
+            self.cache.store(cache_path, filename, segments)
+        return segments
+    
+    def _process_document(self, file_path: str) -> List[DocumentSegment]:
         file_ext = Path(file_path).suffix.lower()
         
-        if file_ext == '.pdf':
-            text = self._extract_from_pdf(file_path)
-        elif file_ext in ['.doc', '.docx']:
-            text = self._extract_from_word(file_path)
-        elif file_ext == '.txt':
-            with open(file_path, 'r', encoding='utf-8') as f:
-                text = f.read()
-        else:
-            raise ValueError(f"不支持的文件格式: {file_ext}")
-        
-        cleaned_text = self.text_cleaner.clean(text)
-        segments = self._split_text(cleaned_text, Path(file_path).name)
+        with metrics.span("extraction", format=file_ext.lstrip('.')):
+            if file_ext == '.pdf':
+                text = self._extract_from_pdf(file_path)
+            elif file_ext in ['.doc', '.docx']:
+                text = self._extract_from_word(file_path)
+            elif file_ext == '.txt':
+                with open(file_path, 'r', encoding='utf-8') as f:
+                    text = f.read()
+            else:
+                raise ValueError(f"不支持的文件格式: {file_ext}")
+        
+        with metrics.span("cleaning"):
+            cleaned_text = self.text_cleaner.clean(text)
+        with metrics.span("segmentation"):
+            segments = self._split_text(cleaned_text, Path(file_path).name)
         return segments
     
     def _extract_from_pdf(self, file_path: str) -> str:
+        import PyPDF2
+        
         text = ""
         with open(file_path, 'rb') as file:
             pdf_reader = PyPDF2.PdfReader(file)
@@ -80,6 +205,8 @@ class DocumentPreprocessor:
         return text
     
     def _extract_from_word(self, file_path: str) -> str:
+        from docx import Document
+        
         text = ""
         doc = Document(file_path)
         for para in doc.paragraphs:
@@ -0,0 +1,120 @@
+# ==================== prompts.py ====================
+"""
+提示模板
+system 消息与用户消息的说明部分逐字节固定，评估标准只在构造时紧凑序列化一次，
+可变内容（文档片段、待评估需求）始终放在用户消息末尾，
+使重复请求共享尽可能长的前缀以命中服务端上下文缓存（usage.prompt_cache_hit_tokens）。
+"""
+
+import json
+from typing import Dict, List, Optional
+
+PARSE_TEXT_LIMIT = 5000
+
+PARSE_SYSTEM = "你是一位资深需求工程师，负责从需求文档中提取需求条目。只输出JSON，不输出其他内容。"
+
+PARSE_INSTRUCTIONS = """请解析需求文档片段，提取所有需求条目并按类别分类：
+- 功能需求
+- 非功能需求
+- 接口需求
+
+输出JSON格式：
+{
+  "requirements": [
+    {
+      "id": "自动生成的唯一ID",
+      "text": "需求描述文本",
+      "type": "功能需求|非功能需求|接口需求",
+      "elements": {}
+    }
+  ]
+}
+
+文档片段：
+"""
+
+EVALUATE_SYSTEM = "你是一位资深需求工程师，负责评估需求条目的完整性。只输出JSON，不输出其他内容。"
+
+EVALUATE_INSTRUCTIONS = """按完整性评估标准评估输入数据中每条需求的完整性。
+
+完整性评估标准：
+{criteria}
+
+输出JSON格式：
+{{
+  "requirements": [
+    {{
+      "id": "需求ID",
+      "completeness_score": 85.5,
+      "missing_elements": ["验收标准", "异常处理"],
+      "improvement_suggestions": ["具体建议"]
+    }}
+  ]
+}}
+
+输入数据：
+"""
+
+REPORT_SYSTEM = "你是一位资深需求工程师，负责撰写需求完整性评审报告。"
+
+REPORT_INSTRUCTIONS = """根据需求完整性验证结果撰写评审摘要，包括：
+1. 总体完整性评价
+2. 各类需求的主要缺失要素
+3. 优先改进的需求条目与改进建议
+
+验证结果：
+"""
+
+def compact_json(data) -> str:
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+
+def prompt_text(messages: List[Dict]) -> str:
+    """拼接所有消息内容，用于token估算"""
+    return "".join(message["content"] for message in messages)
+
+class PromptTemplate:
+    """固定的 system 消息 + 固定的用户消息前缀，可变内容追加在末尾"""
+
+    def __init__(self, name: str, system: str, prefix: str):
+        self.name = name
+        self.system = system
+        self.prefix = prefix
+
+    @property
+    def static_text(self) -> str:
+        """所有请求共享的前缀内容（system 消息 + 用户消息固定部分）"""
+        return self.system + self.prefix
+
+    def render(self, variable: str) -> List[Dict]:
+        return [
+            {"role": "system", "content": self.system},
+            {"role": "user", "content": self.prefix + variable}
+        ]
+
+class PromptLibrary:
+    """按提示类型生成消息列表；默认评估标准的模板在构造时生成并复用"""
+
+    def __init__(self, criteria: Dict[str, List[str]]):
+        self.criteria = criteria
+        self.parse = PromptTemplate("parse", PARSE_SYSTEM, PARSE_INSTRUCTIONS)
+        self.evaluate = self._evaluate_template(criteria)
+        self.report = PromptTemplate("report", REPORT_SYSTEM, REPORT_INSTRUCTIONS)
+
+    def render(self, prompt_type: str, text: str, context: Optional[Dict] = None) -> List[Dict]:
+        """返回 [system, user] 消息列表；需要单个字符串时用 prompt_text() 拼接"""
+        if prompt_type == "parse":
+            return self.parse.render(text[:PARSE_TEXT_LIMIT])
+        if prompt_type == "evaluate":
+            criteria = (context or {}).get("criteria", self.criteria)
+            # 与默认标准是同一对象时直接复用，避免每次调用重新序列化
+            template = self.evaluate if criteria is self.criteria else self._evaluate_template(criteria)
+            return template.render(text)
+        if prompt_type == "report":
+            return self.report.render(text)
+        raise ValueError(f"未知的提示类型: {prompt_type}")
+
+    @staticmethod
+    def _evaluate_template(criteria: Dict[str, List[str]]) -> PromptTemplate:
+        return PromptTemplate(
+            "evaluate", EVALUATE_SYSTEM, EVALUATE_INSTRUCTIONS.format(criteria=compact_json(criteria))
+        )
@@ -0,0 +1,189 @@
+# ==================== report_dispatcher.py ====================
+import atexit
+import json
+import queue
+import re
+import threading
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+from config import Config
+from models import ValidationResult
+from metrics import metrics
+
+if TYPE_CHECKING:
+    from report_generator import ReportGenerator, RequirementExcelWriter
+
+class ReportDispatcher:
+    """报告渲染调度器
+
+    sync: 在验证线程内同步渲染
+    background: 交由后台工作线程池从队列中取结果渲染
+    deferred: 仅保存结果，调用 render() 时再渲染
+    none: 不渲染报告
+
+    ReportGenerator（python-docx/openpyxl）在首次渲染Word或Excel报告时才导入。
+    """
+
+    MODES = ("sync", "background", "deferred", "none")
+
+    def __init__(self, config: Config, report_generator: Optional["ReportGenerator"] = None):
+        if config.REPORT_MODE not in self.MODES:
+            raise ValueError(f"未知的报告模式: {config.REPORT_MODE}")
+
+        self.config = config
+        self.mode = config.REPORT_MODE
+        self._report_generator = report_generator
+        self.store_dir = Path(config.CACHE_DIR) / "results"
+
+        self.report_paths: Dict[str, List[str]] = {}
+        self.errors: Dict[str, str] = {}
+        self._stored: Dict[str, Tuple[ValidationResult, str]] = {}
+        self._lock = threading.Lock()
+        self._queue: "queue.Queue[Optional[Tuple[ValidationResult, str, str, Optional[Dict]]]]" = queue.Queue()
+        self._workers: List[threading.Thread] = []
+
+        if self.mode == "background":
+            self._start_workers()
+        if self.mode == "deferred":
+            self.store_dir.mkdir(parents=True, exist_ok=True)
+
+    @property
+    def report_generator(self) -> "ReportGenerator":
+        if self._report_generator is None:
+            with self._lock:
+                if self._report_generator is None:
+                    from report_generator import ReportGenerator
+                    self._report_generator = ReportGenerator(
+                        word_engine=self.config.WORD_REPORT_ENGINE,
+                        full_details=self.config.REPORT_FULL_DETAILS,
+                        template_path=self.config.WORD_TEMPLATE_PATH or None
+                    )
+        return self._report_generator
+
+    def open_detail_stream(self, base_name: str) -> Optional["RequirementExcelWriter"]:
+        """sync/background 模式且输出Excel时打开需求明细流，供验证过程逐片段写入；
+        写完后以 submit(..., streamed={"excel": writer.output_path}) 跳过该格式的渲染。其余情况返回 None"""
+        if self.mode not in ("sync", "background") or "excel" not in self.config.REPORT_FORMATS:
+            return None
+        excel_path = self._report_path(base_name, "excel", time.strftime("%Y%m%d_%H%M%S"))
+        return self.report_generator.open_detail_stream(str(excel_path))
+
+    def submit(self, result: ValidationResult, base_name: str, streamed: Optional[Dict[str, str]] = None):
+        """streamed 为验证过程中已流式写出的报告（格式 -> 路径），渲染时不再重复生成"""
+        timestamp = time.strftime("%Y%m%d_%H%M%S")
+
+        if self.mode == "sync":
+            self._render(result, base_name, timestamp, streamed)
+        elif self.mode == "background":
+            self._queue.put((result, base_name, timestamp, streamed))
+            metrics.set_gauge("report_queue_depth", self._queue.qsize())
+        elif self.mode == "deferred":
+            self._store(result, base_name)
+
+    def render(self, document_id: str) -> List[str]:
+        """按需渲染已保存的验证结果，返回报告路径"""
+        with self._lock:
+            if document_id in self.report_paths:
+                return self.report_paths[document_id]
+            stored = self._stored.get(document_id)
+
+        if stored is None:
+            stored = self._load(document_id)
+        result, base_name = stored
+        return self._render(result, base_name, time.strftime("%Y%m%d_%H%M%S"))
+
+    def join(self):
+        """等待后台队列中的报告全部渲染完成"""
+        if self._workers:
+            self._queue.join()
+
+    def shutdown(self):
+        if not self._workers:
+            return
+        self.join()
+        for _ in self._workers:
+            self._queue.put(None)
+        for worker in self._workers:
+            worker.join()
+        self._workers = []
+
+    def pending_count(self) -> int:
+        return self._queue.qsize()
+
+    def _start_workers(self):
+        for i in range(max(1, self.config.REPORT_WORKERS)):
+            worker = threading.Thread(
+                target=self._worker_loop, name=f"report-worker-{i + 1}", daemon=True
+            )
+            worker.start()
+            self._workers.append(worker)
+        # 守护线程在解释器退出前需要先排空队列，避免丢失报告
+        atexit.register(self.join)
+
+    def _worker_loop(self):
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                self._render(*item)
+            finally:
+                self._queue.task_done()
+                metrics.set_gauge("report_queue_depth", self._queue.qsize())
+
+    def _report_path(self, base_name: str, report_format: str, timestamp: str) -> Path:
+        base_name_clean = re.sub(r'[^\w\-_\. ]', '_', base_name)
+        suffix = {"word": "验证报告_{}.docx", "excel": "详细清单_{}.xlsx", "json": "验证结果_{}.json"}
+        if report_format not in suffix:
+            raise ValueError(f"未知的报告格式: {report_format}")
+        return Path(self.config.OUTPUT_DIR) / f"{base_name_clean}_{suffix[report_format].format(timestamp)}"
+
+    def _render(self, result: ValidationResult, base_name: str, timestamp: str,
+                streamed: Optional[Dict[str, str]] = None) -> List[str]:
+        streamed = streamed or {}
+        paths = []
+        try:
+            for report_format in self.config.REPORT_FORMATS:
+                if report_format in streamed:
+                    paths.append(streamed[report_format])
+                    continue
+                path = self._report_path(base_name, report_format, timestamp)
+                if report_format == "word":
+                    self.report_generator.generate_word_report(result, str(path))
+                elif report_format == "excel":
+                    self.report_generator.generate_excel_report(result, str(path))
+                else:
+                    with open(path, 'w', encoding='utf-8') as f:
+                        json.dump(result.to_dict(), f, ensure_ascii=False, indent=2)
+                paths.append(str(path))
+        except Exception as e:
+            metrics.record_error("rendering", e)
+            with self._lock:
+                self.errors[result.document_id] = str(e)
+            if self.mode == "sync":
+                raise
+            print(f"报告生成失败 {result.document_name}: {e}")
+            return []
+        
+        with self._lock:
+            self.report_paths[result.document_id] = paths
+        return paths
+
+    def _store(self, result: ValidationResult, base_name: str):
+        with self._lock:
+            self._stored[result.document_id] = (result, base_name)
+
+        store_file = self.store_dir / f"{result.document_id}.json"
+        with open(store_file, 'w', encoding='utf-8') as f:
+            json.dump({"base_name": base_name, "result": result.to_dict()}, f, ensure_ascii=False)
+
+    def _load(self, document_id: str) -> Tuple[ValidationResult, str]:
+        store_file = self.store_dir / f"{document_id}.json"
+        if not store_file.exists():
+            raise KeyError(f"未找到已保存的验证结果: {document_id}")
+
+        with open(store_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return ValidationResult.from_dict(data["result"]), data["base_name"]
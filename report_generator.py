@@ -1,16 +1,172 @@
 # ==================== report_generator.py ====================
-import pandas as pd
+import os
+from typing import Iterable, List, Optional
+
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
 from docx import Document
 from docx.shared import RGBColor
 from docx.enum.text import WD_ALIGN_PARAGRAPH
 from docx.enum.table import WD_TABLE_ALIGNMENT
 
-from models import ValidationResult
+from models import Requirement, ValidationResult
+from aggregation import BatchStatistics
+from metrics import metrics
+from word_template import DEFAULT_DETAIL_LIMIT, WordTemplateReportBuilder
+
+DETAIL_SHEET_NAME = '需求明细'
+DETAIL_COLUMNS = ["需求ID", "需求类型", "需求描述", "完整性得分", "缺失要素", "整改建议", "所在片段"]
+
+BATCH_SHEET_NAME = '批量汇总'
+BATCH_COLUMNS = ["文档名称", "总需求数", "完整需求数", "完整性得分(%)", "验证耗时(秒)",
+                 "API请求数", "输入token", "输出token", "缓存命中token", "预估费用(元)", "未完成片段", "生成时间"]
+STATISTICS_SHEET_NAME = '批量统计'
+
+class ExcelStreamWriter:
+    """流式Excel写入器（write-only工作表，逐行落盘）
+
+    先保存到同目录的临时文件，成功后再替换为 output_path；写入过程出错时丢弃，
+    不会留下截断的工作簿。
+    """
+    
+    def __init__(self, output_path: str, sheet_name: str, columns: List[str]):
+        self.output_path = output_path
+        self.workbook = Workbook(write_only=True)
+        self.sheet = self.workbook.create_sheet(sheet_name)
+        self.sheet.append(columns)
+        self.rows_written = 0
+        self._closed = False
+    
+    def append(self, row: list):
+        self.sheet.append(row)
+        self.rows_written += 1
+    
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        temp_path = f"{self.output_path}.partial"
+        try:
+            self.workbook.save(temp_path)
+            os.replace(temp_path, self.output_path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+    
+    def discard(self):
+        """放弃写入，不生成文件；write-only 工作表的行缓存临时文件一并删除"""
+        if self._closed:
+            return
+        self._closed = True
+        for sheet in self.workbook.worksheets:
+            sheet.close()
+            if os.path.exists(sheet._writer.out):
+                os.remove(sheet._writer.out)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.discard()
+        return False
+
+class RequirementExcelWriter(ExcelStreamWriter):
+    """需求明细流式写入器"""
+    
+    def __init__(self, output_path: str):
+        super().__init__(output_path, DETAIL_SHEET_NAME, DETAIL_COLUMNS)
+    
+    def write_requirement(self, req: Requirement):
+        self.append([
+            req.id,
+            req.req_type.value,
+            req.text[:200],
+            req.completeness_score,
+            ", ".join(req.missing_elements) if req.missing_elements else "无",
+            ", ".join(req.improvement_suggestions) if req.improvement_suggestions else "无",
+            req.segment_id
+        ])
+
+class BatchSummaryExcelWriter(ExcelStreamWriter):
+    """批量汇总流式写入器"""
+    
+    def __init__(self, output_path: str):
+        super().__init__(output_path, BATCH_SHEET_NAME, BATCH_COLUMNS)
+    
+    def write_result(self, result: ValidationResult):
+        # 得分与耗时写为数值，便于在Excel中排序筛选
+        self.append([
+            result.document_name,
+            result.total_requirements,
+            result.complete_requirements,
+            self._number_cell(result.completeness_score),
+            self._number_cell(result.validation_time),
+            result.token_usage.requests,
+            result.token_usage.prompt_tokens,
+            result.token_usage.completion_tokens,
+            result.token_usage.cache_hit_tokens,
+            self._number_cell(result.estimated_cost, precision=4),
+            len(result.unfinished_segments),
+            result.generated_at
+        ])
+    
+    def write_statistics(self, stats: BatchStatistics):
+        sheet = self.workbook.create_sheet(STATISTICS_SHEET_NAME)
+        sheet.append(["统计项", "指标", "数值"])
+        sheet.append(["总体", "文档数", stats.document_count])
+        sheet.append(["总体", "需求数", stats.requirement_count])
+        sheet.append(["总体", "API请求数", stats.token_usage.requests])
+        sheet.append(["总体", "输入token", stats.token_usage.prompt_tokens])
+        sheet.append(["总体", "输出token", stats.token_usage.completion_tokens])
+        sheet.append(["总体", "缓存命中token", stats.token_usage.cache_hit_tokens])
+        sheet.append(["总体", "缓存命中率", self._number_cell(stats.token_usage.cache_hit_ratio, sheet, 4)])
+        sheet.append(["总体", "预估费用(元)", self._number_cell(stats.estimated_cost, sheet, precision=4)])
+        for name, value in stats.document_score_percentiles.items():
+            sheet.append(["文档得分分布", name, self._number_cell(value, sheet)])
+        for name, value in stats.requirement_score_percentiles.items():
+            sheet.append(["需求得分分布", name, self._number_cell(value, sheet)])
+        for bucket, count in stats.score_histogram:
+            sheet.append(["需求得分直方图", bucket, count])
+        for type_name, type_stats in stats.type_statistics.items():
+            sheet.append([type_name, "需求数", type_stats["count"]])
+            sheet.append([type_name, "平均得分", self._number_cell(type_stats["mean_score"], sheet)])
+            sheet.append([type_name, "完整比例(%)", self._number_cell(type_stats["complete_ratio"] * 100, sheet)])
+        for element, count in stats.top_missing_elements:
+            sheet.append(["高频缺失要素", element, count])
+    
+    def _number_cell(self, value: float, sheet=None, precision: int = 2) -> WriteOnlyCell:
+        cell = WriteOnlyCell(sheet or self.sheet, value=round(float(value), precision))
+        cell.number_format = '0.' + '0' * precision
+        return cell
 
 class ReportGenerator:
     """报告生成器"""
     
+    WORD_ENGINES = ("template", "python-docx")
+    
+    def __init__(self, word_engine: str = "template", full_details: bool = False,
+                 template_path: Optional[str] = None):
+        if word_engine not in self.WORD_ENGINES:
+            raise ValueError(f"未知的Word报告引擎: {word_engine}")
+        self.word_engine = word_engine
+        self.detail_limit = None if full_details else DEFAULT_DETAIL_LIMIT
+        self.template_path = template_path
+        self._template_builder = None
+    
     def generate_word_report(self, result: ValidationResult, output_path: str):
+        with metrics.span("rendering", format="word", engine=self.word_engine):
+            if self.word_engine == "template":
+                if self._template_builder is None:
+                    self._template_builder = WordTemplateReportBuilder(self.template_path)
+                self._template_builder.render(result, output_path, self.detail_limit)
+            else:
+                self._generate_word_report_docx(result, output_path)
+    
+    def _generate_word_report_docx(self, result: ValidationResult, output_path: str):
         doc = Document()
         self._add_title(doc, "需求完整性验证报告")
         self._add_document_info(doc, result)
@@ -21,21 +177,25 @@ class ReportGenerator:
         doc.save(output_path)
     
     def generate_excel_report(self, result: ValidationResult, output_path: str):
-        data = []
-        for req in result.requirements_details:
-            data.append({
-                "需求ID": req.id,
-                "需求类型": req.req_type.value,
-                "需求描述": req.text[:200],
-                "完整性得分": req.completeness_score,
-                "缺失要素": ", ".join(req.missing_elements) if req.missing_elements else "无",
-                "整改建议": ", ".join(req.improvement_suggestions) if req.improvement_suggestions else "无",
-                "所在片段": req.segment_id
-            })
-        
-        df = pd.DataFrame(data)
-        with pd.ExcelWriter(output_path, engine='openpyxl') as writer:
-            df.to_excel(writer, sheet_name='需求明细', index=False)
+        with metrics.span("rendering", format="excel"), self.open_detail_stream(output_path) as writer:
+            for req in result.requirements_details:
+                writer.write_requirement(req)
+    
+    def generate_batch_excel_report(self, results: Iterable[ValidationResult], output_path: str,
+                                    stats: Optional[BatchStatistics] = None):
+        with self.open_batch_stream(output_path) as writer:
+            for result in results:
+                writer.write_result(result)
+            if stats is not None:
+                writer.write_statistics(stats)
+    
+    def open_detail_stream(self, output_path: str) -> RequirementExcelWriter:
+        """打开需求明细流，需求到达时即可逐条写入"""
+        return RequirementExcelWriter(output_path)
+    
+    def open_batch_stream(self, output_path: str) -> BatchSummaryExcelWriter:
+        """打开批量汇总流，每完成一个文档写入一行"""
+        return BatchSummaryExcelWriter(output_path)
     
     def _add_title(self, doc: Document, title: str):
         title_para = doc.add_heading(title, level=0)
@@ -44,15 +204,17 @@ class ReportGenerator:
     
     def _add_document_info(self, doc: Document, result: ValidationResult):
         doc.add_heading('一、文档基本信息', level=1)
-        table = doc.add_table(rows=3, cols=2)
-        table.style = 'Light Grid Accent 1'
-        table.alignment = WD_TABLE_ALIGNMENT.CENTER
-        
         rows = [
             ('文档名称', result.document_name),
             ('文档ID', result.document_id),
             ('验证耗时', f"{result.validation_time:.2f} 秒")
         ]
+        if result.partial:
+            rows.append(result.partial_note)
+        
+        table = doc.add_table(rows=len(rows), cols=2)
+        table.style = 'Light Grid Accent 1'
+        table.alignment = WD_TABLE_ALIGNMENT.CENTER
         
         for i, (key, value) in enumerate(rows):
             table.cell(i, 0).text = key
@@ -105,7 +267,10 @@ class ReportGenerator:
             doc.add_paragraph("无缺失要素需求。")
             return
         
-        for i, req in enumerate(incomplete_reqs[:10], 1):
+        if self.detail_limit is not None:
+            incomplete_reqs = incomplete_reqs[:self.detail_limit]
+        
+        for i, req in enumerate(incomplete_reqs, 1):
             doc.add_paragraph(f"{i}. 需求ID: {req.id}", style='List Bullet')
             doc.add_paragraph(f"   描述: {req.text[:100]}...")
             doc.add_paragraph(f"   缺失要素: {', '.join(req.missing_elements)}")
@@ -0,0 +1,111 @@
+# ==================== result_cache.py ====================
+"""
+两级结果缓存
+解析级：片段正文 → 抽取出的需求（与完整性标准无关），CACHE_DIR/parse/*.json
+评估级：需求（类型、正文、要素）+ 标准指纹 → 得分、缺失要素与建议，CACHE_DIR/evaluations.sqlite
+
+修改 COMPLETENESS_CRITERIA 只会使评估级缓存失效，已解析的片段无需重新调用解析接口。
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from models import DocumentSegment, Requirement, intern_strings
+from prompts import compact_json
+
+def criteria_fingerprint(criteria: Dict[str, List[str]]) -> str:
+    """完整性标准的指纹，与字典顺序无关"""
+    canonical = json.dumps(criteria, ensure_ascii=False, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:16]
+
+def requirement_key(requirement: Requirement, fingerprint: str) -> str:
+    """评估结果只取决于需求内容与标准，与需求ID及所在片段无关"""
+    content = compact_json([fingerprint, requirement.req_type.value, requirement.text,
+                            sorted(requirement.elements.items())])
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+class ParseCache:
+    """片段解析结果（评估前的需求列表），键为解析提示固定部分与片段正文的哈希"""
+
+    def __init__(self, cache_dir: str, prompt_fingerprint: str):
+        self.cache_dir = Path(cache_dir)
+        self.prompt_fingerprint = prompt_fingerprint
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def path_for(self, segment: DocumentSegment) -> Path:
+        digest = hashlib.sha256(f"{self.prompt_fingerprint}\0{segment.text}".encode("utf-8")).hexdigest()[:32]
+        return self.cache_dir / f"{digest}.json"
+
+    def contains(self, segment: DocumentSegment) -> bool:
+        return self.path_for(segment).exists()
+
+    def get(self, segment: DocumentSegment) -> Optional[List[Requirement]]:
+        try:
+            with open(self.path_for(segment), 'r', encoding='utf-8') as f:
+                return [Requirement.from_dict(data) for data in json.load(f)]
+        except FileNotFoundError:
+            return None
+
+    def put(self, segment: DocumentSegment, requirements: List[Requirement]):
+        path = self.path_for(segment)
+        tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump([req.to_dict() for req in requirements], f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+class EvaluationCache:
+    """需求评估结果的键值表；sqlite连接不跨线程共享，每个线程一个连接"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn().execute(
+            "CREATE TABLE IF NOT EXISTS evaluations (key TEXT PRIMARY KEY, criteria TEXT NOT NULL, result TEXT NOT NULL)"
+        )
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=60, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def get_many(self, keys: List[str]) -> Dict[str, Dict]:
+        found = {}
+        # sqlite 单条语句的参数个数有限，分批查询
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            rows = self._conn().execute(
+                f"SELECT key, result FROM evaluations WHERE key IN ({','.join('?' * len(chunk))})", chunk
+            )
+            found.update((key, json.loads(result)) for key, result in rows)
+        return found
+
+    def put_many(self, fingerprint: str, items: Iterable[Tuple[str, Dict]]):
+        self._conn().executemany(
+            "INSERT OR REPLACE INTO evaluations (key, criteria, result) VALUES (?, ?, ?)",
+            [(key, fingerprint, json.dumps(result, ensure_ascii=False)) for key, result in items]
+        )
+
+    def stats(self) -> Dict[str, int]:
+        rows = self._conn().execute("SELECT criteria, COUNT(*) FROM evaluations GROUP BY criteria").fetchall()
+        return {criteria: count for criteria, count in rows}
+
+def evaluation_of(requirement: Requirement) -> Dict:
+    return {
+        "score": requirement.completeness_score,
+        "missing": requirement.missing_elements,
+        "suggestions": requirement.improvement_suggestions
+    }
+
+def apply_evaluation(requirement: Requirement, evaluation: Dict):
+    requirement.completeness_score = evaluation["score"]
+    requirement.missing_elements = intern_strings(evaluation["missing"])
+    requirement.improvement_suggestions = list(evaluation["suggestions"])
@@ -0,0 +1,178 @@
+# ==================== sampling.py ====================
+"""
+分层抽样快速估计
+片段按章节分层（“第N章”或编号标题的首级序号；没有章节结构时按位置均分为若干层），
+各层按片段数比例抽取（每层至少 min_per_stratum 个），抽中的片段完整验证。
+
+片段是需求的整群，完整性得分与各类型要素缺失率都是“比值”（需求得分之和 / 需求数），
+按分层比率估计量计算点估计，方差用线性化（残差 d = y - R·x）加有限总体校正；
+只抽到1个片段的层用全部样本的合并残差方差代替。置信区间按正态近似。
+"""
+
+import math
+import random
+import re
+from dataclasses import dataclass, field
+from statistics import NormalDist
+from typing import Dict, List, Sequence, Tuple
+
+from models import DocumentSegment, Requirement
+
+_CHAPTER = re.compile(r'^\s*(?:第([一二三四五六七八九十百\d]+)章|(\d+)(?=[\s.、]))')
+_CHINESE_DIGITS = {c: i for i, c in enumerate("零一二三四五六七八九")}
+
+# 没有章节结构时的分层数
+POSITION_STRATA = 10
+
+def chapter_strata(segments: Sequence[DocumentSegment]) -> List[List[int]]:
+    """按章节分层，返回每层的片段下标；不以章节标题开头的片段（长章节的后续部分）归入前一章"""
+    strata: Dict[str, List[int]] = {}
+    current = None
+    for index, segment in enumerate(segments):
+        match = _CHAPTER.match(segment.text)
+        if match:
+            current = _chapter_number(match.group(1) or match.group(2))
+        if current is None:
+            continue
+        strata.setdefault(current, []).append(index)
+
+    covered = sum(len(members) for members in strata.values())
+    if len(strata) < 2 or covered < len(segments) / 2:
+        size = max(1, math.ceil(len(segments) / POSITION_STRATA))
+        return [list(range(start, min(start + size, len(segments)))) for start in range(0, len(segments), size)]
+
+    # 第一个章节标题之前的片段（封面、目录等）单独成层
+    leading = list(range(0, min(members[0] for members in strata.values())))
+    return ([leading] if leading else []) + list(strata.values())
+
+def _chapter_number(label: str) -> str:
+    """“第三章”与“3.1”归入同一章：中文数字转为阿拉伯数字"""
+    if label.isdigit():
+        return str(int(label))
+    if "百" in label:
+        return label
+    tens, _, ones = label.rpartition("十")
+    if "十" not in label:
+        return str(_CHINESE_DIGITS.get(label, label))
+    return str(_CHINESE_DIGITS.get(tens, 1) * 10 + _CHINESE_DIGITS.get(ones, 0))
+
+def allocate(strata: Sequence[Sequence[int]], fraction: float, min_per_stratum: int = 1) -> List[int]:
+    """比例分配：每层 round(N_h × fraction)，至少 min_per_stratum 个且不超过层大小"""
+    return [min(len(members), max(min_per_stratum, round(len(members) * fraction))) for members in strata]
+
+def stratified_sample(strata: Sequence[Sequence[int]], fraction: float, rng: random.Random,
+                      min_per_stratum: int = 1) -> List[int]:
+    """各层不放回随机抽取，返回抽中的片段下标（升序）"""
+    chosen = []
+    for members, count in zip(strata, allocate(strata, fraction, min_per_stratum)):
+        chosen.extend(rng.sample(list(members), count))
+    return sorted(chosen)
+
+@dataclass
+class Interval:
+    value: float
+    low: float
+    high: float
+    stderr: float
+
+    def to_dict(self) -> Dict:
+        return {"value": round(self.value, 4), "low": round(self.low, 4), "high": round(self.high, 4),
+                "stderr": round(self.stderr, 4)}
+
+@dataclass
+class SampleEstimate:
+    """抽样估计结果；missing_rates 为 {需求类型: {要素: 缺失比例(0-1)}}"""
+    total_segments: int
+    sampled_segments: int
+    strata: int
+    confidence: float
+    completeness_score: Interval
+    estimated_requirements: float
+    missing_rates: Dict[str, Dict[str, Interval]] = field(default_factory=dict)
+
+    @property
+    def coverage(self) -> float:
+        return self.sampled_segments / self.total_segments if self.total_segments else 1.0
+
+    def to_dict(self) -> Dict:
+        return {
+            "total_segments": self.total_segments,
+            "sampled_segments": self.sampled_segments,
+            "coverage": round(self.coverage, 4),
+            "strata": self.strata,
+            "confidence": self.confidence,
+            "completeness_score": self.completeness_score.to_dict(),
+            "estimated_requirements": round(self.estimated_requirements, 1),
+            "missing_rates": {
+                req_type: {elem: interval.to_dict() for elem, interval in rates.items()}
+                for req_type, rates in self.missing_rates.items()
+            }
+        }
+
+def ratio_estimate(strata: Sequence[Sequence[int]], y: Dict[int, float], x: Dict[int, float],
+                   confidence: float, clip: Tuple[float, float]) -> Interval:
+    """分层比率估计 Σ N_h·ȳ_h / Σ N_h·x̄_h；y、x 只含已抽中片段"""
+    y_total = x_total = 0.0
+    for members in strata:
+        sampled = [i for i in members if i in x]
+        if sampled:
+            y_total += len(members) * sum(y[i] for i in sampled) / len(sampled)
+            x_total += len(members) * sum(x[i] for i in sampled) / len(sampled)
+    if x_total <= 0:
+        return Interval(0.0, clip[0], clip[1], 0.0)
+    ratio = y_total / x_total
+
+    residuals = {i: y[i] - ratio * x[i] for i in x}
+    pooled = _sample_variance(list(residuals.values()))
+    variance = 0.0
+    for members in strata:
+        sampled = [residuals[i] for i in members if i in residuals]
+        n, big_n = len(sampled), len(members)
+        if not n or n == big_n:
+            continue
+        s2 = _sample_variance(sampled) if n > 1 else pooled
+        variance += big_n ** 2 * (1 - n / big_n) * s2 / n
+    stderr = math.sqrt(variance) / x_total
+    z = NormalDist().inv_cdf((1 + confidence) / 2)
+    return Interval(ratio, max(clip[0], ratio - z * stderr), min(clip[1], ratio + z * stderr), stderr)
+
+def estimate(segments: Sequence[DocumentSegment], strata: Sequence[Sequence[int]],
+             processed: Dict[int, List[Requirement]], criteria: Dict[str, List[str]],
+             confidence: float) -> SampleEstimate:
+    """processed 为 {片段下标: 已评估的需求}；未处理或失败的片段不在其中"""
+    counts = {i: float(len(reqs)) for i, reqs in processed.items()}
+    scores = {i: float(sum(req.completeness_score for req in reqs)) for i, reqs in processed.items()}
+
+    estimated_requirements = 0.0
+    for members in strata:
+        sampled = [i for i in members if i in counts]
+        if sampled:
+            estimated_requirements += len(members) * sum(counts[i] for i in sampled) / len(sampled)
+
+    result = SampleEstimate(
+        total_segments=len(segments),
+        sampled_segments=len(processed),
+        strata=len(strata),
+        confidence=confidence,
+        completeness_score=ratio_estimate(strata, scores, counts, confidence, (0.0, 100.0)),
+        estimated_requirements=estimated_requirements
+    )
+    for req_type, elements in criteria.items():
+        typed = {i: [req for req in reqs if req.req_type.value == req_type] for i, reqs in processed.items()}
+        type_counts = {i: float(len(reqs)) for i, reqs in typed.items()}
+        if not any(type_counts.values()):
+            continue
+        result.missing_rates[req_type] = {
+            elem: ratio_estimate(
+                strata, {i: float(sum(elem in req.missing_elements for req in reqs)) for i, reqs in typed.items()},
+                type_counts, confidence, (0.0, 1.0)
+            )
+            for elem in elements
+        }
+    return result
+
+def _sample_variance(values: Sequence[float]) -> float:
+    if len(values) < 2:
+        return 0.0
+    mean = sum(values) / len(values)
+    return sum((v - mean) ** 2 for v in values) / (len(values) - 1)
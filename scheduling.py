@@ -0,0 +1,52 @@
+# ==================== scheduling.py ====================
+"""
+按预估工作量排序片段
+largest：大任务优先（LPT），减少末尾单个大任务拖长整体耗时，适合批量吞吐
+smallest：小任务优先，先完成的结果更早可见，适合交互场景
+document：保持文档原始顺序
+"""
+
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Sequence, TypeVar
+
+T = TypeVar("T")
+
+SCHEDULE_ORDERS = ("largest", "smallest", "document")
+
+def order_by_cost(items: Sequence[T], cost: Callable[[T], float], order: str) -> List[T]:
+    """按预估耗时排序；相同耗时保持原顺序"""
+    if order not in SCHEDULE_ORDERS:
+        raise ValueError(f"未知的调度顺序: {order}")
+    if order == "document":
+        return list(items)
+    return sorted(items, key=cost, reverse=(order == "largest"))
+
+def makespan_lower_bound(durations: Sequence[float], workers: int) -> float:
+    """任意调度都无法低于的完成时间：max(最长任务, 总工作量 / 并发数)"""
+    if not durations:
+        return 0.0
+    return max(max(durations), sum(durations) / max(1, workers))
+
+@dataclass
+class ScheduleReport:
+    """一次调度的实际完成时间与理想下界"""
+    order: str
+    workers: int
+    tasks: int
+    makespan: float
+    lower_bound: float
+
+    @property
+    def efficiency(self) -> float:
+        """理想下界 / 实际完成时间，1.0 为最优"""
+        return self.lower_bound / self.makespan if self.makespan > 0 else 1.0
+
+    def to_dict(self) -> Dict:
+        return {
+            "order": self.order,
+            "workers": self.workers,
+            "tasks": self.tasks,
+            "makespan": round(self.makespan, 3),
+            "lower_bound": round(self.lower_bound, 3),
+            "efficiency": round(self.efficiency, 4)
+        }
@@ -0,0 +1,520 @@
+# ==================== service.py ====================
+"""
+内嵌HTTP验证服务
+所有客户端共享一个 RequirementValidator（API会话、并发预算、片段缓存），
+任务进入有界优先级队列，队列满时返回 429 并附带 Retry-After。
+
+  POST   /jobs?filename=需求.docx&priority=5   上传文档（原始字节或 multipart/form-data），返回 job_id
+  GET    /jobs/{id}                            任务状态与结果摘要
+  GET    /jobs/{id}/events                     逐行JSON流：每条需求的评估结果，任务结束时关闭（结束后只保留结束事件）
+  GET    /jobs/{id}/report?format=word|excel|json  按需渲染并下载报告
+  DELETE /jobs/{id}                            取消排队中的任务
+  GET    /health                               队列深度与工作线程状态
+"""
+
+import copy
+import heapq
+import itertools
+import json
+import re
+import shutil
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from email.parser import BytesParser
+from email.policy import default as default_policy
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Deque, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from config import Config
+from metrics import metrics
+from models import ValidationResult
+from validator import RequirementValidator
+
+REPORT_TYPES = {
+    "word": (".docx", "application/vnd.openxmlformats-officedocument.wordprocessingml.document"),
+    "excel": (".xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+    "json": (".json", "application/json; charset=utf-8")
+}
+
+class QueueFullError(Exception):
+    """任务队列已满"""
+
+class Job:
+    """单个验证任务及其事件流
+
+    事件按发布顺序编号，最多保留 max_events 条，超出时丢弃最早的事件。
+    任务结束且没有读者时只保留结束事件（需求明细已在结果中）。
+    """
+
+    def __init__(self, job_id: str, file_path: Path, priority: int, max_events: int = 10000):
+        self.id = job_id
+        self.file_path = file_path
+        self.priority = priority
+        self.status = "queued"  # queued | running | completed | failed | cancelled
+        self.submitted_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.result: Optional[ValidationResult] = None
+        self.error: Optional[str] = None
+        self.reports: Dict[str, str] = {}
+        self.events: Deque[Dict] = deque(maxlen=max(1, max_events))
+        self.event_offset = 0  # 已丢弃的事件数，events[0] 的编号
+        self.requirement_events = 0
+        self._readers = 0
+        self._condition = threading.Condition()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("completed", "failed", "cancelled")
+
+    def publish(self, event: Dict):
+        with self._condition:
+            self._append(event)
+            if event.get("type") == "requirement":
+                self.requirement_events += 1
+            self._condition.notify_all()
+
+    def finish(self, status: str, **fields):
+        with self._condition:
+            self.status = status
+            self.finished_at = time.time()
+            self._append({"type": status, **fields})
+            self._compact()
+            self._condition.notify_all()
+
+    def wait_events(self, start: int, timeout: float = 15.0) -> Tuple[List[Dict], int, bool]:
+        """返回编号 start 起的新事件、下次读取的起始编号以及任务是否已结束；无新事件时最多等待 timeout 秒。
+        start 之前的事件已被丢弃时从最早保留的事件开始"""
+        with self._condition:
+            if self.event_offset + len(self.events) <= start and not self.finished:
+                self._condition.wait(timeout)
+            skip = max(0, start - self.event_offset)
+            return list(itertools.islice(self.events, skip, None)), self.event_offset + len(self.events), self.finished
+
+    @contextmanager
+    def reading(self) -> Iterator["Job"]:
+        """登记一个事件流读者；读者全部离开后已结束任务的事件才被清理"""
+        with self._condition:
+            self._readers += 1
+        try:
+            yield self
+        finally:
+            with self._condition:
+                self._readers -= 1
+                self._compact()
+
+    def _append(self, event: Dict):
+        if len(self.events) == self.events.maxlen:
+            self.event_offset += 1
+        self.events.append(event)
+
+    def _compact(self):
+        if self.finished and not self._readers and len(self.events) > 1:
+            terminal = self.events[-1]
+            self.event_offset += len(self.events) - 1
+            self.events.clear()
+            self.events.append(terminal)
+
+    def to_dict(self) -> Dict:
+        data = {
+            "job_id": self.id,
+            "status": self.status,
+            "document": self.file_path.name,
+            "priority": self.priority,
+            "submitted_at": self.submitted_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "streamed_requirements": self.requirement_events
+        }
+        if self.result is not None:
+            data["result"] = {
+                "document_id": self.result.document_id,
+                "completeness_score": self.result.completeness_score,
+                "total_requirements": self.result.total_requirements,
+                "complete_requirements": self.result.complete_requirements,
+                "missing_elements_by_type": self.result.missing_elements_by_type,
+                "validation_time": self.result.validation_time,
+                "token_usage": self.result.token_usage.to_dict(),
+                "estimated_cost": self.result.estimated_cost
+            }
+        if self.error:
+            data["error"] = self.error
+        return data
+
+class JobQueue:
+    """有界优先级队列：priority 越大越先执行，同优先级先进先出"""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._heap: List[Tuple[int, int, Job]] = []
+        self._counter = itertools.count()
+        self._condition = threading.Condition()
+        self._closed = False
+
+    def put(self, job: Job):
+        with self._condition:
+            if len(self._heap) >= self.maxsize:
+                raise QueueFullError(f"任务队列已满（{self.maxsize}）")
+            heapq.heappush(self._heap, (-job.priority, next(self._counter), job))
+            metrics.set_gauge("service_queue_depth", len(self._heap))
+            self._condition.notify()
+
+    def get(self) -> Optional[Job]:
+        """阻塞取出下一个任务；关闭后返回 None"""
+        with self._condition:
+            while not self._heap and not self._closed:
+                self._condition.wait()
+            if not self._heap:
+                return None
+            _, _, job = heapq.heappop(self._heap)
+            metrics.set_gauge("service_queue_depth", len(self._heap))
+            return job
+
+    def remove(self, job: Job) -> bool:
+        with self._condition:
+            for i, (_, _, queued) in enumerate(self._heap):
+                if queued is job:
+                    self._heap.pop(i)
+                    heapq.heapify(self._heap)
+                    metrics.set_gauge("service_queue_depth", len(self._heap))
+                    return True
+        return False
+
+    def position(self, job: Job) -> Optional[int]:
+        with self._condition:
+            ordered = sorted(self._heap)
+            for i, (_, _, queued) in enumerate(ordered):
+                if queued is job:
+                    return i + 1
+        return None
+
+    def close(self):
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+    def __len__(self) -> int:
+        with self._condition:
+            return len(self._heap)
+
+class ValidationService:
+    """任务调度与HTTP接口"""
+
+    def __init__(self, config: Config = None):
+        # 报告在请求时按需渲染，验证过程中不生成；复制配置，不修改调用方的实例
+        self.config = copy.copy(config or Config())
+        self.config.REPORT_MODE = "none"
+        self.validator = RequirementValidator(self.config)
+        self.upload_dir = Path(self.config.CACHE_DIR) / "uploads"
+        self.report_dir = Path(self.config.OUTPUT_DIR) / "jobs"
+        self.queue = JobQueue(self.config.SERVICE_QUEUE_SIZE)
+        self.jobs: Dict[str, Job] = {}
+        self._jobs_lock = threading.Lock()
+        self._report_lock = threading.Lock()
+        self._workers: List[threading.Thread] = []
+        self._durations: deque = deque(maxlen=20)
+        self.httpd: Optional[ThreadingHTTPServer] = None
+
+    def start(self, host: str = None, port: int = None) -> "ValidationService":
+        for i in range(max(1, self.config.SERVICE_WORKERS)):
+            worker = threading.Thread(target=self._worker_loop, name=f"service-worker-{i + 1}", daemon=True)
+            worker.start()
+            self._workers.append(worker)
+
+        host = host if host is not None else self.config.SERVICE_HOST
+        port = port if port is not None else self.config.SERVICE_PORT
+        self.httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self.httpd.daemon_threads = True
+        threading.Thread(target=self.httpd.serve_forever, name="validation-service", daemon=True).start()
+        return self
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def stop(self):
+        if self.httpd:
+            self.httpd.shutdown()
+            self.httpd.server_close()
+        self.queue.close()
+        for worker in self._workers:
+            worker.join()
+        self._workers = []
+
+    def submit(self, filename: str, content: bytes, priority: int = 0) -> Job:
+        job_id = uuid.uuid4().hex[:16]
+        job_dir = self.upload_dir / job_id
+        job_dir.mkdir(parents=True, exist_ok=True)
+        file_path = job_dir / filename
+        file_path.write_bytes(content)
+
+        job = Job(job_id, file_path, priority, self.config.SERVICE_MAX_EVENTS)
+        try:
+            self.queue.put(job)
+        except QueueFullError:
+            self._discard_upload(job)
+            metrics.inc("service_jobs_total", status="rejected")
+            raise
+        with self._jobs_lock:
+            self.jobs[job_id] = job
+            self._evict_finished()
+        metrics.inc("service_jobs_total", status="accepted")
+        return job
+
+    def cancel(self, job: Job) -> bool:
+        if job.status == "queued" and self.queue.remove(job):
+            job.finish("cancelled")
+            self._discard_upload(job)
+            metrics.inc("service_jobs_total", status="cancelled")
+            return True
+        return False
+
+    def get_job(self, job_id: str) -> Optional[Job]:
+        with self._jobs_lock:
+            return self.jobs.get(job_id)
+
+    def render_report(self, job: Job, report_type: str) -> str:
+        with self._report_lock:
+            if report_type in job.reports:
+                return job.reports[report_type]
+
+            suffix, _ = REPORT_TYPES[report_type]
+            self.report_dir.mkdir(parents=True, exist_ok=True)
+            path = str(self.report_dir / f"{job.id}{suffix}")
+            if report_type == "word":
+                self.validator.report_generator.generate_word_report(job.result, path)
+            elif report_type == "excel":
+                self.validator.report_generator.generate_excel_report(job.result, path)
+            else:
+                with open(path, 'w', encoding='utf-8') as f:
+                    json.dump(job.result.to_dict(), f, ensure_ascii=False, indent=2)
+            job.reports[report_type] = path
+            return path
+
+    def retry_after(self) -> int:
+        """按最近任务平均耗时估算队列排空所需秒数"""
+        recent = list(self._durations)
+        average = sum(recent) / len(recent) if recent else 5.0
+        workers = max(1, len(self._workers))
+        return max(1, int(average * (len(self.queue) + 1) / workers))
+
+    def health(self) -> Dict:
+        with self._jobs_lock:
+            statuses = [job.status for job in self.jobs.values()]
+        return {
+            "status": "ok",
+            "queue_depth": len(self.queue),
+            "queue_capacity": self.queue.maxsize,
+            "workers": len(self._workers),
+            "running": statuses.count("running"),
+            "jobs": len(statuses)
+        }
+
+    def _worker_loop(self):
+        while True:
+            job = self.queue.get()
+            if job is None:
+                return
+            self._run_job(job)
+
+    def _run_job(self, job: Job):
+        job.status = "running"
+        job.started_at = time.time()
+        job.publish({"type": "started"})
+
+        def on_segment(segment, requirements):
+            for req in requirements:
+                job.publish({"type": "requirement", "segment_id": segment.id, **req.to_dict()})
+
+        try:
+            job.result = self.validator.validate_document(str(job.file_path), on_segment=on_segment)
+        except Exception as e:
+            job.error = str(e)
+            job.finish("failed", error=str(e))
+            metrics.inc("service_jobs_total", status="failed")
+            return
+        finally:
+            self._durations.append(time.time() - job.started_at)
+            # 结果已在内存中，报告按结果渲染，上传的原文件不再需要
+            self._discard_upload(job)
+
+        job.finish("completed", **job.to_dict()["result"])
+        metrics.inc("service_jobs_total", status="completed")
+
+    def _evict_finished(self):
+        overflow = len(self.jobs) - self.config.SERVICE_RETAINED_JOBS
+        if overflow <= 0:
+            return
+        finished = sorted((job for job in self.jobs.values() if job.finished), key=lambda job: job.finished_at)
+        for job in finished[:overflow]:
+            del self.jobs[job.id]
+            self._discard_upload(job)
+            for path in job.reports.values():
+                Path(path).unlink(missing_ok=True)
+
+    def _discard_upload(self, job: Job):
+        shutil.rmtree(job.file_path.parent, ignore_errors=True)
+
+    def _make_handler(self):
+        service = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                parts = [p for p in url.path.split("/") if p]
+                if parts == ["health"]:
+                    self._send_json(200, service.health())
+                    return
+                job = self._job_from(parts)
+                if job is None:
+                    return
+                if len(parts) == 2:
+                    body = job.to_dict()
+                    if job.status == "queued":
+                        body["queue_position"] = service.queue.position(job)
+                    self._send_json(200, body)
+                elif parts[2] == "events":
+                    self._stream_events(job)
+                elif parts[2] == "report":
+                    self._send_report(job, parse_qs(url.query).get("format", ["excel"])[0])
+                else:
+                    self._send_json(404, {"error": "not found"})
+
+            def do_POST(self):
+                url = urlparse(self.path)
+                if url.path.rstrip("/") != "/jobs":
+                    self._send_json(404, {"error": "not found"})
+                    return
+
+                length = int(self.headers.get("Content-Length") or 0)
+                if length <= 0:
+                    self._send_json(411, {"error": "需要 Content-Length"})
+                    return
+                if length > service.config.SERVICE_MAX_UPLOAD_MB * 1024 * 1024:
+                    self._send_json(413, {"error": "文件过大"})
+                    self.close_connection = True
+                    return
+
+                query = parse_qs(url.query)
+                try:
+                    priority = int(query.get("priority", ["0"])[0])
+                    filename, content = self._read_upload(length, query.get("filename", [""])[0])
+                except ValueError as e:
+                    self._send_json(400, {"error": str(e)})
+                    return
+                if Path(filename).suffix.lower() not in service.validator.supported_extensions:
+                    self._send_json(415, {"error": f"不支持的文件类型: {filename}"})
+                    return
+
+                try:
+                    job = service.submit(filename, content, priority)
+                except QueueFullError as e:
+                    self._send_json(429, {"error": str(e)}, {"Retry-After": str(service.retry_after())})
+                    return
+                self._send_json(202, {"job_id": job.id, "status": job.status,
+                                      "queue_position": service.queue.position(job)},
+                                {"Location": f"/jobs/{job.id}"})
+
+            def do_DELETE(self):
+                job = self._job_from([p for p in urlparse(self.path).path.split("/") if p])
+                if job is None:
+                    return
+                if service.cancel(job):
+                    self._send_json(200, job.to_dict())
+                else:
+                    self._send_json(409, {"error": f"任务状态为 {job.status}，无法取消"})
+
+            def _job_from(self, parts: List[str]) -> Optional[Job]:
+                job = service.get_job(parts[1]) if len(parts) >= 2 and parts[0] == "jobs" else None
+                if job is None:
+                    self._send_json(404, {"error": "任务不存在"})
+                return job
+
+            def _read_upload(self, length: int, filename: str) -> Tuple[str, bytes]:
+                body = self.rfile.read(length)
+                content_type = self.headers.get("Content-Type", "")
+                if content_type.startswith("multipart/form-data"):
+                    message = BytesParser(policy=default_policy).parsebytes(
+                        f"Content-Type: {content_type}\r\n\r\n".encode() + body)
+                    for part in message.iter_parts():
+                        if part.get_filename():
+                            filename = filename or part.get_filename()
+                            body = part.get_payload(decode=True)
+                            break
+                    else:
+                        raise ValueError("multipart 请求中没有文件")
+                filename = Path(filename).name
+                if not filename:
+                    raise ValueError("缺少文件名（filename 参数）")
+                return re.sub(r'[^\w\-_\. ]', '_', filename), body
+
+            def _stream_events(self, job: Job):
+                self.send_response(200)
+                self.send_header("Content-Type", "application/x-ndjson; charset=utf-8")
+                self.send_header("Cache-Control", "no-cache")
+                self.send_header("Connection", "close")
+                self.end_headers()
+                self.close_connection = True
+
+                index = 0
+                try:
+                    with job.reading():
+                        while True:
+                            events, index, finished = job.wait_events(index)
+                            for event in events:
+                                self.wfile.write((json.dumps(event, ensure_ascii=False) + "\n").encode("utf-8"))
+                            self.wfile.flush()
+                            if finished:
+                                return
+                except (BrokenPipeError, ConnectionResetError):
+                    return
+
+            def _send_report(self, job: Job, report_type: str):
+                if report_type not in REPORT_TYPES:
+                    self._send_json(400, {"error": f"未知的报告格式: {report_type}"})
+                    return
+                if job.status != "completed":
+                    self._send_json(409, {"error": f"任务状态为 {job.status}，暂无报告"})
+                    return
+                try:
+                    path = service.render_report(job, report_type)
+                except Exception as e:
+                    metrics.record_error("rendering", e)
+                    self._send_json(500, {"error": f"报告生成失败: {e}"})
+                    return
+
+                data = Path(path).read_bytes()
+                suffix, content_type = REPORT_TYPES[report_type]
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(data)))
+                self.send_header("Content-Disposition", f'attachment; filename="{job.id}{suffix}"')
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _send_json(self, status: int, body: Dict, headers: Dict[str, str] = None):
+                data = json.dumps(body, ensure_ascii=False, default=str).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("Content-Length", str(len(data)))
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+        return Handler
+
+metrics.describe("service_jobs_total", "HTTP服务任务数（按状态）")
+metrics.describe("service_queue_depth", "HTTP服务排队任务数")
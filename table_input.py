@@ -0,0 +1,154 @@
+# ==================== table_input.py ====================
+"""
+结构化需求表输入（.xlsx / .csv）
+每行一条需求，按列映射填充 Requirement 字段，不经过抽取、分段与解析请求，直接进入批量评估。
+xlsx 以 openpyxl 只读模式流式读取，csv 逐行读取。
+
+列映射（Config.TABLE_COLUMNS 或 --columns 指定的JSON）：
+{"id": "需求编号", "text": "需求描述", "type": "需求类型", "elements": {"验收条件": "验收标准"}, "sheet": "需求"}
+未指定的列按常见表头识别；表头与完整性标准要素名相同的列自动作为要素列，单元格非空即视为已描述。
+"""
+
+import csv
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from extractor import HeuristicExtractor
+from models import Requirement, RequirementType
+
+TABLE_EXTENSIONS = ('.xlsx', '.csv')
+
+DEFAULT_HEADERS = {
+    "id": ("需求编号", "编号", "需求ID", "ID", "Req ID"),
+    "text": ("需求描述", "需求内容", "描述", "需求", "Description", "Requirement"),
+    "type": ("需求类型", "类型", "Type")
+}
+
+@dataclass
+class ColumnMapping:
+    """表头名到 Requirement 字段的映射；elements 为 列名 → 要素名"""
+    id: Optional[str] = None
+    text: Optional[str] = None
+    type: Optional[str] = None
+    elements: Dict[str, str] = field(default_factory=dict)
+    sheet: Optional[str] = None
+    header_row: int = 1
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict]) -> "ColumnMapping":
+        return cls(**(data or {}))
+
+    def resolve(self, header: List[str], criteria: Dict[str, List[str]]) -> "ResolvedColumns":
+        """按表头定位各字段所在列；找不到需求描述列时抛出 ValueError"""
+        normalized = {name.strip().lower(): index for index, name in enumerate(header) if name}
+
+        def locate(field_name: str) -> Optional[int]:
+            explicit = getattr(self, field_name)
+            candidates = (explicit,) if explicit else DEFAULT_HEADERS[field_name]
+            for candidate in candidates:
+                index = normalized.get(candidate.strip().lower())
+                if index is not None:
+                    return index
+            if explicit:
+                raise ValueError(f"表头中没有列 {explicit!r}（表头: {header}）")
+            return None
+
+        text_index = locate("text")
+        if text_index is None:
+            raise ValueError(f"未找到需求描述列，请通过列映射指定 text（表头: {header}）")
+
+        element_names = {elem for elems in criteria.values() for elem in elems}
+        element_columns = {}
+        for index, name in enumerate(header):
+            if name and name.strip() in element_names:
+                element_columns[index] = name.strip()
+        for column, element in self.elements.items():
+            index = normalized.get(column.strip().lower())
+            if index is None:
+                raise ValueError(f"表头中没有要素列 {column!r}（表头: {header}）")
+            element_columns[index] = element
+
+        return ResolvedColumns(id=locate("id"), text=text_index, type=locate("type"), elements=element_columns)
+
+@dataclass
+class ResolvedColumns:
+    id: Optional[int]
+    text: int
+    type: Optional[int]
+    elements: Dict[int, str]
+
+def iter_rows(path: Path, sheet: Optional[str] = None) -> Iterator[Tuple[int, List[str]]]:
+    """逐行产出 (行号, 单元格文本列表)，行号从1开始"""
+    if path.suffix.lower() == '.csv':
+        # utf-8-sig 兼容 Excel 导出的带BOM文件
+        with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+            for row_number, row in enumerate(csv.reader(f), 1):
+                yield row_number, row
+        return
+
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        worksheet = workbook[sheet] if sheet else workbook.active
+        for row_number, row in enumerate(worksheet.iter_rows(values_only=True), 1):
+            yield row_number, ["" if value is None else str(value) for value in row]
+    finally:
+        workbook.close()
+
+def read_requirements(path: Path, mapping: ColumnMapping, extractor: HeuristicExtractor,
+                      map_type: Callable[[str], RequirementType]) -> Iterator[Requirement]:
+    """流式读取需求行；需求描述为空的行跳过
+
+    类型列为空或无法识别时按正文线索判定类型；没有对应列的要素按正文线索识别（见 extractor.py）。
+    position 为 (行号, 行号)，segment_id 为 文件名_row行号。
+    """
+    columns = None
+    for row_number, row in iter_rows(path, mapping.sheet):
+        if row_number < mapping.header_row:
+            continue
+        if columns is None:
+            columns = mapping.resolve(row, extractor.criteria)
+            column_elements = set(columns.elements.values())
+            continue
+
+        text = _cell(row, columns.text)
+        if not text:
+            continue
+        req_type = _requirement_type(_cell(row, columns.type), map_type)
+        if req_type == RequirementType.UNKNOWN:
+            req_type, _ = extractor.classify(text)
+
+        # 有对应列的要素以单元格为准，其余要素按正文线索识别
+        elements = {name: cue for name, cue in extractor.detect_elements(req_type, text).items()
+                    if name not in column_elements}
+        for index, element in columns.elements.items():
+            value = _cell(row, index)
+            if value:
+                elements[element] = value
+
+        yield Requirement(
+            id=_cell(row, columns.id) or f"ROW-{row_number}",
+            text=text,
+            req_type=req_type,
+            segment_id=f"{path.name}_row{row_number}",
+            position=(row_number, row_number),
+            elements=elements
+        )
+
+    if columns is None:
+        raise ValueError(f"需求表为空或缺少表头: {path.name}")
+
+def _requirement_type(value: str, map_type: Callable[[str], RequirementType]) -> RequirementType:
+    if not value:
+        return RequirementType.UNKNOWN
+    try:
+        return RequirementType(value)
+    except ValueError:
+        return map_type(value)
+
+def _cell(row: List[str], index: Optional[int]) -> str:
+    if index is None or index >= len(row):
+        return ""
+    return row[index].strip()
@@ -0,0 +1,45 @@
+# ==================== conftest.py ====================
+"""测试公共夹具：本地模拟服务与指向它的配置"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from config import Config
+from mock_server import MockDeepSeekServer
+
+@pytest.fixture
+def mock_server():
+    with MockDeepSeekServer() as server:
+        yield server
+
+@pytest.fixture
+def make_config(tmp_path):
+    """make_config(url, **overrides) -> 输出与缓存目录位于 tmp_path 的配置"""
+    def factory(url: str = "http://127.0.0.1:9/v1/chat/completions", **overrides) -> Config:
+        config = Config()
+        config.API_URL = url
+        config.API_KEY = "test"
+        config.OUTPUT_DIR = str(tmp_path / "out")
+        config.CACHE_DIR = str(tmp_path / "cache")
+        config.REPORT_FORMATS = ["json"]
+        config.MAX_RETRIES = 0
+        for key, value in overrides.items():
+            setattr(config, key, value)
+        return config
+    return factory
+
+def write_spec(path: Path, sections: int, items: int = 5) -> Path:
+    """生成按章节组织的需求文本"""
+    parts = []
+    for section in range(1, sections + 1):
+        lines = [f"第{section}章 模块{section}"]
+        lines += [f"{item}. 系统应支持模块{section}的功能{item}，当用户提交时保存记录并返回结果。"
+                  for item in range(1, items + 1)]
+        parts.append("\n".join(lines))
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text("\n\n".join(parts), encoding="utf-8")
+    return path
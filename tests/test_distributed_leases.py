@@ -0,0 +1,64 @@
+# ==================== test_distributed_leases.py ====================
+"""工作者失联后租约过期，任务由存活的工作者接手，协调者等待结束"""
+
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from config import Config
+from distributed import Coordinator, TaskQueue, Worker
+from mock_server import MockDeepSeekServer
+from validator import RequirementValidator
+
+@pytest.fixture
+def validator(tmp_path):
+    with MockDeepSeekServer() as server:
+        config = Config()
+        config.API_URL = server.url
+        config.API_KEY = "test"
+        config.OUTPUT_DIR = str(tmp_path / "out")
+        config.CACHE_DIR = str(tmp_path / "cache")
+        config.REPORT_FORMATS = ["json"]
+        yield RequirementValidator(config)
+
+@pytest.fixture
+def input_dir(tmp_path):
+    root = tmp_path / "in"
+    for sub in ("a", "b"):
+        (root / sub).mkdir(parents=True)
+        (root / sub / "spec.txt").write_text(f"1. 系统应支持{sub}模块的数据导入。\n", encoding="utf-8")
+    return root
+
+def test_dead_worker_lease_is_taken_over(tmp_path, validator, input_dir):
+    queue = TaskQueue(str(tmp_path / "queue.sqlite"), lease_seconds=1.0, max_attempts=3)
+    coordinator = Coordinator(validator, queue)
+    batch_id = coordinator.submit(str(input_dir))
+    assert [doc["document_name"] for doc in queue.documents(batch_id)] == ["a/spec.txt", "b/spec.txt"]
+
+    # 领取后不处理也不续约，模拟工作者失联
+    assert queue.lease("dead-worker") is not None
+
+    survivor = Worker(validator, queue, threads=1, idle_exit=0.2)
+    thread = threading.Thread(target=survivor.run, daemon=True)
+    thread.start()
+    counts = coordinator.wait(batch_id, poll_interval=0.2)
+    thread.join(timeout=10)
+
+    assert counts["done"] == 2 and counts["failed"] == 0
+    assert not thread.is_alive()
+    results = coordinator.collect(batch_id)
+    assert sorted(result.document_name for result in results) == ["a/spec.txt", "b/spec.txt"]
+
+def test_exhausted_lease_fails_without_workers(tmp_path, validator, input_dir):
+    queue = TaskQueue(str(tmp_path / "queue.sqlite"), lease_seconds=0.1, max_attempts=1)
+    coordinator = Coordinator(validator, queue)
+    batch_id = coordinator.submit(str(input_dir))
+    while queue.lease("dead-worker") is not None:
+        pass
+
+    counts = coordinator.wait(batch_id, poll_interval=0.2)
+    assert counts == {"pending": 0, "leased": 0, "done": 0, "failed": 2}
@@ -0,0 +1,70 @@
+# ==================== test_document_identity.py ====================
+"""递归发现时，不同子目录中的同名文档以相对输入目录的路径区分"""
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from cli import BatchState, select_shard
+from config import Config
+from discovery import document_key
+from mock_server import MockDeepSeekServer
+from validator import RequirementValidator
+
+@pytest.fixture
+def input_dir(tmp_path):
+    root = tmp_path / "in"
+    (root / "a").mkdir(parents=True)
+    (root / "b").mkdir()
+    (root / "a" / "spec.txt").write_text("1. 系统应支持用户登录，登录失败时提示错误。\n", encoding="utf-8")
+    (root / "b" / "spec.txt").write_text("1. 系统应支持导出报表，导出格式为Excel。\n2. 系统应记录操作日志。\n",
+                                         encoding="utf-8")
+    return root
+
+@pytest.fixture
+def server():
+    with MockDeepSeekServer() as mock:
+        yield mock
+
+def make_config(tmp_path, server) -> Config:
+    config = Config()
+    config.API_URL = server.url
+    config.API_KEY = "test"
+    config.OUTPUT_DIR = str(tmp_path / "out")
+    config.CACHE_DIR = str(tmp_path / "cache")
+    config.REPORT_FORMATS = ["json"]
+    return config
+
+def test_document_key_is_relative_path(input_dir):
+    assert document_key(input_dir / "a" / "spec.txt", str(input_dir)) == "a/spec.txt"
+    assert document_key(input_dir / "a" / "spec.txt") == "spec.txt"
+    assert document_key(input_dir / "a" / "spec.txt", str(input_dir / "b")) == "spec.txt"
+
+def test_same_named_documents_get_separate_results_and_reports(tmp_path, input_dir, server):
+    validator = RequirementValidator(make_config(tmp_path, server))
+    results = validator.validate_batch(str(input_dir))
+
+    assert sorted(result.document_name for result in results) == ["a/spec.txt", "b/spec.txt"]
+    reports = list((tmp_path / "out").glob("*_验证结果_*.json"))
+    names = sorted(json.loads(path.read_text(encoding="utf-8"))["document_name"] for path in reports)
+    assert names == ["a/spec.txt", "b/spec.txt"]
+
+def test_batch_state_and_shards_keep_same_named_documents_apart(tmp_path, input_dir, server):
+    validator = RequirementValidator(make_config(tmp_path, server))
+    doc_files = validator.discover_documents(str(input_dir))
+
+    shards = [select_shard(doc_files, (index, 2), str(input_dir)) for index in (1, 2)]
+    assert sorted(str(path) for shard in shards for path in shard) == sorted(str(path) for path in doc_files)
+    assert all(len(shard) == 1 for shard in shards)
+
+    state = BatchState(tmp_path / "state")
+    for path in doc_files:
+        result = validator.validate_document(str(path), document_name=document_key(path, str(input_dir)))
+        state.mark_completed(document_key(path, str(input_dir)), "digest", result)
+    reloaded = BatchState(tmp_path / "state").load()
+    assert sorted(reloaded.completed) == ["a/spec.txt", "b/spec.txt"]
+    assert reloaded.load_result("b/spec.txt").document_name == "b/spec.txt"
@@ -0,0 +1,48 @@
+# ==================== test_element_cues.py ====================
+"""本地要素线索：泛称与功能动词不算已描述的要素；本地线索不抬高模型评估的得分"""
+
+import pytest
+
+from aggregation import evaluate_against_criteria
+from config import Config
+from extractor import HeuristicExtractor
+from models import Requirement, RequirementType
+
+CRITERIA = Config().COMPLETENESS_CRITERIA
+
+@pytest.fixture(scope="module")
+def extractor():
+    return HeuristicExtractor(CRITERIA)
+
+@pytest.mark.parametrize("req_type, statement", [
+    (RequirementType.FUNCTIONAL, "系统应支持查询订单，并保存查询记录。"),
+    (RequirementType.FUNCTIONAL, "系统应支持当前用户修改个人资料。"),
+    (RequirementType.INTERFACE, "系统应提供HTTP接口与第三方对接，接收请求并返回响应。"),
+    (RequirementType.INTERFACE, "系统需要支持REST API接口。"),
+    (RequirementType.NON_FUNCTIONAL, "系统应具有良好的并发处理能力和安全性。"),
+])
+def test_generic_wording_detects_no_elements(extractor, req_type, statement):
+    assert extractor.detect_elements(req_type, statement) == {}
+
+@pytest.mark.parametrize("req_type, statement, expected", [
+    (RequirementType.FUNCTIONAL, "当用户提交订单时，系统应校验库存，库存不足时提示错误。",
+     {"触发条件", "处理逻辑", "输出结果", "异常处理"}),
+    (RequirementType.INTERFACE, "系统应调用 /api/orders 接口，入参为订单号，返回格式为JSON，每秒不超过100次。",
+     {"接口名称", "输入参数", "输出格式", "调用频率"}),
+    (RequirementType.NON_FUNCTIONAL, "在1000个并发用户的峰值负载下，查询响应时间不超过2秒。",
+     {"量化指标", "测量场景", "达标条件"}),
+])
+def test_specific_wording_detects_elements(extractor, req_type, statement, expected):
+    assert set(extractor.detect_elements(req_type, statement)) == expected
+
+def test_local_elements_do_not_raise_model_score():
+    req = Requirement(
+        id="REQ-1", text="当用户提交订单时，系统应校验库存并提示结果。", req_type=RequirementType.FUNCTIONAL,
+        segment_id="s", position=(0, 0),
+        elements={"触发条件": "当用户提交订单时", "处理逻辑": "校验", "输出结果": "提示"},
+        completeness_score=40.0, missing_elements=["处理逻辑", "输出结果"]
+    )
+    evaluate_against_criteria([req], CRITERIA)
+    # 模型判定处理逻辑与输出结果缺失，本地线索不再计为已描述；5项要素只有触发条件计为已描述
+    assert req.completeness_score == 40.0
+    assert set(req.missing_elements) == {"处理逻辑", "输出结果", "验收标准", "异常处理"}
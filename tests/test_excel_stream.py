@@ -0,0 +1,38 @@
+# ==================== test_excel_stream.py ====================
+"""需求明细在验证过程中流式写入Excel；出错时不留下截断的工作簿"""
+
+import pytest
+from openpyxl import load_workbook
+
+from conftest import write_spec
+from report_generator import RequirementExcelWriter
+from validator import RequirementValidator
+
+def test_writer_discards_on_error(tmp_path):
+    path = tmp_path / "detail.xlsx"
+    with pytest.raises(RuntimeError):
+        with RequirementExcelWriter(str(path)) as writer:
+            writer.append(["R1", "功能需求"])
+            raise RuntimeError("中断")
+    assert list(tmp_path.iterdir()) == []
+
+def test_validation_streams_detail_rows(tmp_path, mock_server, make_config, monkeypatch):
+    spec = write_spec(tmp_path / "in" / "spec.txt", sections=4)
+    validator = RequirementValidator(make_config(mock_server.url, REPORT_FORMATS=["excel", "json"],
+                                                 MAX_SEGMENT_LENGTH=300))
+
+    def render_after_validation(*args, **kwargs):
+        raise AssertionError("明细已在验证过程中写出，不应再次渲染")
+    monkeypatch.setattr(validator.report_generator, "generate_excel_report", render_after_validation)
+
+    rows_seen = []
+    def on_segment(segment, requirements):
+        rows_seen.append(len(requirements))
+    result = validator.validate_document(str(spec), on_segment=on_segment)
+
+    paths = validator.report_dispatcher.report_paths[result.document_id]
+    excel_path = next(path for path in paths if path.endswith(".xlsx"))
+    rows = list(load_workbook(excel_path, read_only=True).active.iter_rows(values_only=True))
+    assert len(rows) - 1 == result.total_requirements == sum(rows_seen)
+    assert [row[0] for row in rows[1:]] == [req.id for req in result.requirements_details]
+    assert [row[3] for row in rows[1:]] == [req.completeness_score for req in result.requirements_details]
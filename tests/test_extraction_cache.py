@@ -0,0 +1,47 @@
+# ==================== test_extraction_cache.py ====================
+"""抽取缓存：命中时片段与首次抽取一致；损坏的缓存文件计为未命中、删除并重新抽取"""
+
+import struct
+import zlib
+
+import pytest
+
+from conftest import write_spec
+from metrics import metrics
+from preprocessor import DocumentPreprocessor, ExtractionCache
+
+def cache_files(tmp_path):
+    return list((tmp_path / "cache").glob("*.seg"))
+
+@pytest.fixture
+def spec(tmp_path):
+    return write_spec(tmp_path / "spec.txt", sections=3)
+
+def segments_of(preprocessor, path):
+    return [(s.id, s.original_file, s.text) for s in preprocessor.process_document(str(path))]
+
+def test_cache_hit_restores_segments(tmp_path, spec):
+    preprocessor = DocumentPreprocessor(max_segment_length=200, cache_dir=str(tmp_path / "cache"))
+    first = segments_of(preprocessor, spec)
+    hits = metrics.counter_value("extraction_cache_requests_total", result="hit")
+    assert segments_of(preprocessor, spec) == first
+    assert metrics.counter_value("extraction_cache_requests_total", result="hit") == hits + 1
+
+@pytest.mark.parametrize("corrupt", [
+    lambda data: data[:len(ExtractionCache.MAGIC) + 5],                          # zlib 截断
+    lambda data: ExtractionCache.MAGIC + zlib.compress(b"\x01\x00"),              # 记录数不完整
+    lambda data: ExtractionCache.MAGIC + zlib.compress(struct.pack("<II", 1, 50) + b"abc"),  # 长度越界
+    lambda data: ExtractionCache.MAGIC + zlib.compress(struct.pack("<II", 1, 2) + b"\xff\xfe"),  # 非UTF-8
+])
+def test_corrupt_cache_is_reextracted(tmp_path, spec, corrupt):
+    preprocessor = DocumentPreprocessor(max_segment_length=200, cache_dir=str(tmp_path / "cache"))
+    expected = segments_of(preprocessor, spec)
+    (cache_file,) = cache_files(tmp_path)
+    cache_file.write_bytes(corrupt(cache_file.read_bytes()))
+
+    misses = metrics.counter_value("extraction_cache_requests_total", result="miss")
+    assert segments_of(preprocessor, spec) == expected
+    assert metrics.counter_value("extraction_cache_requests_total", result="miss") == misses + 1
+    # 重新抽取后写回完好的缓存
+    assert segments_of(preprocessor, spec) == expected
+    assert preprocessor.cache.load(cache_file, spec.name) is not None
@@ -0,0 +1,72 @@
+# ==================== test_hedging.py ====================
+"""对冲请求：从实际发出时计时、受在途比例限制、落后请求的用量计入文档"""
+
+import threading
+import time
+
+import pytest
+
+from models import TokenUsage
+from validator import RequirementValidator
+
+class SequenceLatency:
+    """依次返回给定延迟，用尽后为 0"""
+
+    def __init__(self, *delays: float):
+        self.delays = list(delays)
+        self._lock = threading.Lock()
+
+    def sample(self) -> float:
+        with self._lock:
+            return self.delays.pop(0) if self.delays else 0.0
+
+@pytest.fixture
+def hedging_validator(mock_server, make_config):
+    config = make_config(mock_server.url, HEDGE_REQUESTS=True, HEDGE_MIN_SAMPLES=1,
+                         HEDGE_MIN_DELAY=0.1, HEDGE_PERCENTILE=50.0, API_MAX_CONCURRENCY=2)
+    validator = RequirementValidator(config)
+    validator.api_client._latencies.extend([0.01] * 10)
+    return validator
+
+MESSAGES = [{"role": "user", "content": "1. 系统应支持用户登录。"}]
+
+def test_slow_request_is_hedged_and_loser_usage_counted(mock_server, hedging_validator):
+    mock_server.latency = SequenceLatency(1.0)
+    usage = TokenUsage()
+    started = time.perf_counter()
+    response, truncated = hedging_validator._call_with_budget(MESSAGES, 100, usage, "parse")
+
+    assert not truncated
+    assert time.perf_counter() - started < 0.9
+    # 服务端在延迟之后计数，等待落后的主请求完成
+    deadline = time.time() + 5
+    while mock_server.stats["requests"] < 2 and time.time() < deadline:
+        time.sleep(0.05)
+    assert mock_server.stats["requests"] == 2
+    assert response["hedge_usage"] == response["usage"]
+    assert usage.requests == 2
+    assert usage.prompt_tokens == 2 * response["usage"]["prompt_tokens"]
+
+def test_queueing_before_send_does_not_trigger_hedge(mock_server, hedging_validator):
+    api = hedging_validator.api_client
+    # 占满并发额度 0.4 秒，主请求排队时间远超对冲阈值
+    api._inflight_limit.acquire()
+    api._inflight_limit.acquire()
+    releaser = threading.Timer(0.4, lambda: (api._inflight_limit.release(), api._inflight_limit.release()))
+    releaser.start()
+    started = time.perf_counter()
+    response = api.call_api(MESSAGES)
+    releaser.join()
+
+    assert time.perf_counter() - started >= 0.4
+    assert "hedge_usage" not in response
+    assert mock_server.stats["requests"] == 1
+
+def test_hedges_beyond_budget_are_not_sent(mock_server, hedging_validator):
+    api = hedging_validator.api_client
+    api._inflight_hedges = 1  # 在途请求很少时只允许一个对冲
+    mock_server.latency = SequenceLatency(0.3)
+    response = api.call_api(MESSAGES)
+
+    assert "hedge_usage" not in response
+    assert mock_server.stats["requests"] == 1
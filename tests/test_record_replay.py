@@ -0,0 +1,29 @@
+# ==================== test_record_replay.py ====================
+"""录制后离线回放：输出预算随校准变化时回放仍命中录制"""
+
+from conftest import write_spec
+from transport import request_fingerprint
+from validator import RequirementValidator
+
+def test_fingerprint_ignores_max_tokens():
+    first = b'{"model": "m", "messages": [{"role": "user", "content": "x"}], "max_tokens": 100}'
+    second = b'{"model": "m", "messages": [{"role": "user", "content": "x"}], "max_tokens": 4000}'
+    assert request_fingerprint(first) == request_fingerprint(second)
+
+def test_concurrent_document_replays_offline(tmp_path, mock_server, make_config):
+    spec = write_spec(tmp_path / "spec.txt", sections=12)
+    overrides = dict(RECORDINGS_DIR=str(tmp_path / "recordings"), CACHE_BACKEND="none",
+                     LOCAL_EXTRACTION=False, MAX_SEGMENT_LENGTH=300, BATCH_SIZE=6)
+
+    recorder = RequirementValidator(make_config(mock_server.url, API_TRANSPORT="record", **overrides))
+    recorded = recorder.validate_document(str(spec))
+    assert recorded.total_requirements > 0
+    assert recorder.api_client.transport.stats["recorded"] > 10
+
+    # 回放不访问网络；校准状态从零开始，输出预算与录制时不同
+    replayer = RequirementValidator(make_config(API_TRANSPORT="replay", **overrides))
+    replayed = replayer.validate_document(str(spec))
+
+    assert replayer.api_client.transport.stats["missed"] == 0
+    assert replayed.total_requirements == recorded.total_requirements
+    assert replayed.completeness_score == recorded.completeness_score
@@ -0,0 +1,58 @@
+# ==================== test_result_cache.py ====================
+"""两级结果缓存：重复验证不发请求；修改完整性标准后重新评分只发送评估请求"""
+
+import copy
+
+import pytest
+
+from conftest import write_spec
+from metrics import metrics
+from result_cache import criteria_fingerprint
+from validator import RequirementValidator
+
+@pytest.fixture
+def spec(tmp_path):
+    return write_spec(tmp_path / "in" / "spec.txt", sections=4)
+
+@pytest.fixture
+def config(mock_server, make_config):
+    return make_config(mock_server.url, LOCAL_EXTRACTION=False, MAX_SEGMENT_LENGTH=300)
+
+def test_criteria_fingerprint_ignores_order():
+    assert criteria_fingerprint({"a": ["x", "y"], "b": ["z"]}) == criteria_fingerprint({"b": ["z"], "a": ["x", "y"]})
+    assert criteria_fingerprint({"a": ["x", "y"]}) != criteria_fingerprint({"a": ["y", "x"]})
+
+def test_revalidation_is_served_from_both_caches(spec, mock_server, config):
+    first = RequirementValidator(config).validate_document(str(spec))
+    sent = mock_server.stats["requests"]
+    assert sent > 0
+
+    second = RequirementValidator(config).validate_document(str(spec))
+    assert mock_server.stats["requests"] == sent
+    assert second.token_usage.requests == 0
+    assert second.total_requirements == first.total_requirements
+    assert second.completeness_score == first.completeness_score
+
+def test_rescore_with_new_criteria_only_evaluates(spec, mock_server, config, monkeypatch):
+    first = RequirementValidator(config).validate_document(str(spec))
+
+    changed = copy.deepcopy(config)
+    changed.COMPLETENESS_CRITERIA = dict(config.COMPLETENESS_CRITERIA, 功能需求=["触发条件", "输出结果"])
+    validator = RequirementValidator(changed)
+
+    def no_parse(*args, **kwargs):
+        raise AssertionError("解析级缓存应命中")
+    monkeypatch.setattr(validator, "_parse_text", no_parse)
+
+    sent = mock_server.stats["requests"]
+    misses = metrics.counter_value("evaluation_cache_requests_total", result="miss")
+    (rescored,) = validator.rescore([spec])
+    assert rescored.total_requirements == first.total_requirements
+    # 旧标准下的评估结果全部失效，新标准下逐条评估；请求数远少于需求数（合并评估）
+    assert metrics.counter_value("evaluation_cache_requests_total", result="miss") - misses == first.total_requirements
+    assert 0 < mock_server.stats["requests"] - sent == rescored.token_usage.requests < first.total_requirements // 4
+
+    # 同一标准再次重新评分全部命中评估级缓存
+    (again,) = validator.rescore([spec])
+    assert again.token_usage.requests == 0
+    assert again.completeness_score == rescored.completeness_score
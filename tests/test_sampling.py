@@ -0,0 +1,64 @@
+# ==================== test_sampling.py ====================
+"""分层抽样估计：分层与分配、比率估计的区间覆盖率、端到端的抽样验证"""
+
+import random
+
+from conftest import write_spec
+from models import DocumentSegment
+from sampling import allocate, chapter_strata, ratio_estimate
+from validator import RequirementValidator
+
+def make_segments(texts):
+    return [DocumentSegment(id=f"doc_{i}", text=text, original_file="doc") for i, text in enumerate(texts)]
+
+def test_chapter_strata_groups_continuations_and_front_matter():
+    segments = make_segments(["封面", "第一章 总则", "续1", "2 功能", "续2", "第三章 接口"])
+    assert chapter_strata(segments) == [[0], [1, 2], [3, 4], [5]]
+
+def test_position_strata_without_chapters():
+    strata = chapter_strata(make_segments([f"正文{i}" for i in range(25)]))
+    assert sum(strata, []) == list(range(25))
+    assert len(strata) == 9 and all(len(members) <= 3 for members in strata)
+
+def test_allocation_is_proportional_with_minimum():
+    strata = [list(range(40)), list(range(40, 45)), [45]]
+    assert allocate(strata, 0.1) == [4, 1, 1]
+    assert allocate(strata, 0.1, min_per_stratum=2) == [4, 2, 1]
+
+def test_census_has_zero_error():
+    strata = [[0, 1], [2, 3]]
+    y, x = {0: 100.0, 1: 50.0, 2: 0.0, 3: 90.0}, {0: 2.0, 1: 1.0, 2: 1.0, 3: 2.0}
+    interval = ratio_estimate(strata, y, x, 0.95, (0.0, 100.0))
+    assert interval.value == sum(y.values()) / sum(x.values())
+    assert interval.stderr == 0.0
+
+def test_interval_coverage_is_near_nominal():
+    rng = random.Random(7)
+    # 60 个片段、6 层，各层得分水平不同
+    strata = [list(range(h * 10, h * 10 + 10)) for h in range(6)]
+    x = {i: float(rng.randint(1, 8)) for i in range(60)}
+    y = {i: x[i] * rng.gauss(40 + 8 * (i // 10), 15) for i in range(60)}
+    truth = sum(y.values()) / sum(x.values())
+
+    covered = 0
+    trials = 400
+    for _ in range(trials):
+        chosen = [i for members in strata for i in rng.sample(members, 4)]
+        interval = ratio_estimate(strata, {i: y[i] for i in chosen}, {i: x[i] for i in chosen},
+                                  0.95, (0.0, 100.0))
+        covered += interval.low <= truth <= interval.high
+    assert 0.88 <= covered / trials <= 0.99
+
+def test_sample_document_estimates_from_a_fraction(tmp_path, mock_server, make_config):
+    spec = write_spec(tmp_path / "spec.txt", sections=4, items=30)
+    validator = RequirementValidator(make_config(mock_server.url, MAX_SEGMENT_LENGTH=300, CACHE_BACKEND="none"))
+    result = validator.sample_document(str(spec), fraction=0.3)
+
+    sampling = result.sampling
+    assert sampling["sampled_segments"] < sampling["total_segments"]
+    assert len(result.unfinished_segments) == sampling["total_segments"] - sampling["sampled_segments"]
+    score = sampling["completeness_score"]
+    assert score["low"] <= score["value"] == result.completeness_score <= score["high"]
+    assert sampling["strata"] == 4
+    # 每章 30 条需求
+    assert abs(sampling["estimated_requirements"] - 120) <= 20
@@ -0,0 +1,48 @@
+# ==================== test_service_jobs.py ====================
+"""验证服务：不修改调用方配置、事件有上限、淘汰任务时删除报告"""
+
+from pathlib import Path
+
+from service import Job, ValidationService
+
+SPEC = "1. 系统应支持用户登录，登录失败时提示错误。\n2. 系统应记录操作日志。\n".encode("utf-8")
+
+def run_next(service: ValidationService) -> Job:
+    job = service.queue.get()
+    service._run_job(job)
+    return job
+
+def test_service_copies_config(mock_server, make_config):
+    config = make_config(mock_server.url, REPORT_MODE="sync")
+    service = ValidationService(config)
+    assert config.REPORT_MODE == "sync"
+    assert service.config.REPORT_MODE == "none"
+
+def test_events_are_capped_and_compacted_after_readers_leave(tmp_path):
+    job = Job("j", tmp_path / "spec.txt", 0, max_events=3)
+    for i in range(5):
+        job.publish({"type": "requirement", "id": i})
+    events, next_index, finished = job.wait_events(0, timeout=0)
+    assert [event["id"] for event in events] == [2, 3, 4]
+    assert next_index == 5 and not finished
+    assert job.to_dict()["streamed_requirements"] == 5
+
+    with job.reading():
+        job.finish("completed")
+        events, next_index, finished = job.wait_events(next_index, timeout=0)
+        assert [event["type"] for event in events] == ["completed"] and finished
+        assert len(job.events) == 3
+    assert list(job.events) == [{"type": "completed"}]
+    assert job.wait_events(0, timeout=0)[0] == [{"type": "completed"}]
+
+def test_evicted_job_reports_are_deleted(mock_server, make_config):
+    service = ValidationService(make_config(mock_server.url, SERVICE_RETAINED_JOBS=1))
+    first = service.submit("spec.txt", SPEC)
+    run_next(service)
+    report = Path(service.render_report(first, "json"))
+    assert report.exists()
+
+    service.submit("spec.txt", SPEC)
+    assert service.get_job(first.id) is None
+    assert not report.exists()
+    assert not first.file_path.parent.exists()
@@ -0,0 +1,50 @@
+# ==================== test_table_input.py ====================
+"""需求表输入：需显式启用；启用后每行一条需求直接评估，不发送解析请求"""
+
+from pathlib import Path
+
+import pytest
+
+from config import Config
+from extractor import HeuristicExtractor
+from parser import ResultParser
+from table_input import ColumnMapping, read_requirements
+from validator import RequirementValidator
+
+REGISTER = "需求编号,需求描述,需求类型,验收标准\n" \
+           "R-1,当用户提交订单时系统应校验库存,功能需求,库存不足时下单失败\n" \
+           "R-2,,功能需求,\n" \
+           "R-3,系统应提供订单查询接口,接口需求,\n"
+
+@pytest.fixture
+def input_dir(tmp_path):
+    root = tmp_path / "in"
+    root.mkdir()
+    (root / "spec.txt").write_text("1. 系统应支持用户登录，登录失败时提示错误。\n", encoding="utf-8")
+    (root / "register.csv").write_text(REGISTER, encoding="utf-8")
+    (root / "data.csv").write_text("a,b\n1,2\n", encoding="utf-8")
+    return root
+
+def test_tables_are_ignored_unless_enabled(input_dir, mock_server, make_config):
+    validator = RequirementValidator(make_config(mock_server.url))
+    assert [path.name for path in validator.discover_documents(str(input_dir))] == ["spec.txt"]
+    with pytest.raises(Exception, match="TABLE_INPUT"):
+        validator.validate_document(str(input_dir / "register.csv"))
+
+def test_register_rows_are_evaluated_without_parse_requests(input_dir, mock_server, make_config):
+    validator = RequirementValidator(make_config(mock_server.url, TABLE_INPUT=True, CACHE_BACKEND="none"))
+    assert "register.csv" in [path.name for path in validator.discover_documents(str(input_dir))]
+
+    result = validator.validate_document(str(input_dir / "register.csv"))
+    assert [req.id for req in result.requirements_details] == ["R-1", "R-3"]
+    assert result.token_usage.requests == mock_server.stats["requests"] == 1
+    first = result.requirements_details[0]
+    assert first.elements["验收标准"] == "库存不足时下单失败"
+    assert first.elements["触发条件"] == "当用户提交订单时"
+
+def test_register_without_text_column_is_rejected(input_dir):
+    criteria = Config().COMPLETENESS_CRITERIA
+    rows = read_requirements(Path(input_dir / "data.csv"), ColumnMapping(), HeuristicExtractor(criteria),
+                             ResultParser(criteria)._map_requirement_type)
+    with pytest.raises(ValueError, match="需求描述列"):
+        list(rows)
@@ -0,0 +1,44 @@
+# ==================== test_truncation_split.py ====================
+"""输出在上限预算下仍被截断时对半拆分重试，拆分后的结果完整"""
+
+import pytest
+
+from metrics import metrics
+from models import TokenUsage
+from validator import RequirementValidator
+
+TEXT = "\n".join(f"{i}. 系统应支持功能{i}，当用户提交时保存记录并返回结果。" for i in range(1, 9))
+
+@pytest.fixture
+def validator(mock_server, make_config):
+    # 8 条需求的解析输出约 440 token，对半后约 240 token
+    return RequirementValidator(make_config(mock_server.url, MAX_TOKENS=300, LOCAL_EXTRACTION=False,
+                                            CACHE_BACKEND="none"))
+
+def test_truncated_parse_is_split_and_merged(validator):
+    splits = metrics.counter_value("segment_splits_total", kind="parse")
+    usage = TokenUsage()
+    requirements = validator._parse_text(TEXT, usage)
+
+    assert len(requirements) == 8
+    assert len({req.id for req in requirements}) == 8
+    assert metrics.counter_value("segment_splits_total", kind="parse") == splits + 1
+    assert usage.requests >= 3
+
+def test_truncated_evaluation_is_split(validator):
+    requirements = validator._parse_text(TEXT, TokenUsage())
+    splits = metrics.counter_value("segment_splits_total", kind="evaluate")
+    validator.config.MAX_TOKENS = 120
+    matched = set()
+    validator._evaluate_batch(requirements, TokenUsage(), matched=matched)
+
+    assert matched == {req.id for req in requirements}
+    assert metrics.counter_value("segment_splits_total", kind="evaluate") > splits
+
+def test_split_depth_is_bounded(validator):
+    validator.config.MAX_TOKENS = 20
+    validator.config.MAX_SPLIT_DEPTH = 1
+    usage = TokenUsage()
+    validator._parse_text(TEXT, usage)
+    # 每一层：校准预算 + 上限预算各一次；深度 1 时最多 1 + 2 个文本块
+    assert usage.requests <= 2 * 3
@@ -0,0 +1,217 @@
+# ==================== tokens.py ====================
+import heapq
+import math
+import re
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, List, Tuple
+
+from config import Config
+from models import TokenUsage
+from prompts import PARSE_TEXT_LIMIT, prompt_text
+
+# 需求条目的粗略特征：句中含情态词，或以章节编号开头
+_REQUIREMENT_LINE = re.compile(r'(应|需|须|支持|要求|shall|must|should)|^\s*\d+(\.\d+)+\s')
+
+def estimate_tokens(text: str) -> int:
+    """粗略估算token数：中日韩字符约0.6个token，其他字符约0.3个token"""
+    if not text:
+        return 0
+    cjk = sum(1 for ch in text if '一' <= ch <= '鿿')
+    return max(1, math.ceil(cjk * 0.6 + (len(text) - cjk) * 0.3))
+
+PARSE_OUTPUT_RATIO = 1.2
+EVAL_TOKENS_PER_REQUIREMENT = 60
+EVAL_BASE_TOKENS = 30
+
+def expected_parse_output(text: str) -> int:
+    """解析响应的预估输出token：约为输入片段的1.2倍"""
+    return math.ceil(estimate_tokens(text) * PARSE_OUTPUT_RATIO)
+
+def expected_evaluate_output(requirement_count: int) -> int:
+    """评估响应的预估输出token：按需求条数计"""
+    return EVAL_BASE_TOKENS + requirement_count * EVAL_TOKENS_PER_REQUIREMENT
+
+def output_budget(expected_tokens: int, config: Config) -> int:
+    """单次请求的 max_tokens：预估输出乘以余量，限制在 [MIN_OUTPUT_TOKENS, MAX_TOKENS]"""
+    if not config.DYNAMIC_MAX_TOKENS:
+        return config.MAX_TOKENS
+    budget = math.ceil(expected_tokens * config.OUTPUT_TOKEN_MARGIN)
+    return max(min(config.MIN_OUTPUT_TOKENS, config.MAX_TOKENS), min(config.MAX_TOKENS, budget))
+
+class OutputCalibration:
+    """按请求类型跟踪实际输出与预估输出之比（指数滑动平均），用于修正输出预算"""
+
+    ALPHA = 0.2
+
+    def __init__(self):
+        self._ratios: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def scale(self, kind: str, expected_tokens: int) -> int:
+        with self._lock:
+            return math.ceil(expected_tokens * self._ratios.get(kind, 1.0))
+
+    def calibrated(self, kind: str) -> bool:
+        with self._lock:
+            return kind in self._ratios
+
+    def observe(self, kind: str, expected_tokens: int, actual_tokens: int):
+        """只记录未被截断的响应，截断时实际输出不代表完整大小"""
+        if expected_tokens <= 0 or actual_tokens <= 0:
+            return
+        ratio = actual_tokens / expected_tokens
+        with self._lock:
+            previous = self._ratios.get(kind)
+            self._ratios[kind] = ratio if previous is None else previous + self.ALPHA * (ratio - previous)
+
+def estimate_cost(usage: TokenUsage, config: Config) -> float:
+    """按配置单价估算费用（元）"""
+    cache_miss = usage.prompt_tokens - usage.cache_hit_tokens
+    return (
+        cache_miss * config.PRICE_INPUT_PER_1M
+        + usage.cache_hit_tokens * config.PRICE_CACHE_HIT_PER_1M
+        + usage.completion_tokens * config.PRICE_OUTPUT_PER_1M
+    ) / 1_000_000
+
+@dataclass
+class SegmentEstimate:
+    """单个片段的请求预估"""
+    segment_id: str
+    cached: bool
+    requests: int = 0
+    usage: TokenUsage = field(default_factory=TokenUsage)
+    seconds: float = 0.0
+
+@dataclass
+class DocumentEstimate:
+    document_name: str
+    segments: List[SegmentEstimate] = field(default_factory=list)
+    usage: TokenUsage = field(default_factory=TokenUsage)
+    requests: int = 0
+    wall_seconds: float = 0.0
+
+@dataclass
+class BatchEstimate:
+    """批量验证的预估结果（不调用API）"""
+    documents: List[DocumentEstimate] = field(default_factory=list)
+    failed_documents: Dict[str, str] = field(default_factory=dict)
+    usage: TokenUsage = field(default_factory=TokenUsage)
+    requests: int = 0
+    cached_segments: int = 0
+    total_segments: int = 0
+    wall_seconds: float = 0.0
+    estimated_cost: float = 0.0
+
+    def to_dict(self) -> Dict:
+        return {
+            "documents": len(self.documents),
+            "failed_documents": self.failed_documents,
+            "total_segments": self.total_segments,
+            "cached_segments": self.cached_segments,
+            "requests": self.requests,
+            "token_usage": self.usage.to_dict(),
+            "estimated_cost": round(self.estimated_cost, 4),
+            "estimated_wall_seconds": round(self.wall_seconds, 1),
+            "per_document": [
+                {
+                    "document_name": doc.document_name,
+                    "segments": len(doc.segments),
+                    "requests": doc.requests,
+                    "token_usage": doc.usage.to_dict(),
+                    "estimated_wall_seconds": round(doc.wall_seconds, 1)
+                }
+                for doc in self.documents
+            ]
+        }
+
+class BatchEstimator:
+    """基于抽取与分段结果预估请求数、token与耗时
+
+    提示词按实际模板构造后估算token，模板固定前缀按命中服务端缓存计；解析响应约为输入片段的1.2倍，
+    评估响应按需求条数计，本地抽取的片段不计解析请求；单次请求耗时 = 固定延迟 + 输出token / 输出速率。
+    文档内片段按 BATCH_SIZE 并发做列表调度，文档之间串行。
+    """
+
+    def __init__(self, config: Config, api_client, is_cached, parses_locally=None):
+        self.config = config
+        self.api_client = api_client
+        self.is_cached = is_cached
+        self.parses_locally = parses_locally or (lambda segment: False)
+
+    def estimate_segment(self, segment) -> SegmentEstimate:
+        estimate = SegmentEstimate(segment_id=segment.id, cached=self.is_cached(segment))
+        if estimate.cached:
+            return estimate
+
+        prompts = self.api_client.prompts
+        parse_prompt = self.api_client.generate_prompt("parse", segment.text)
+        visible_text = segment.text[:PARSE_TEXT_LIMIT]
+        parse_output = min(self.config.MAX_TOKENS, expected_parse_output(visible_text))
+        if not self.parses_locally(segment):
+            self._add_request(estimate, estimate_tokens(prompt_text(parse_prompt)), parse_output,
+                              estimate_tokens(prompts.parse.static_text))
+
+        requirement_count = sum(1 for line in visible_text.split('\n') if _REQUIREMENT_LINE.search(line))
+        if requirement_count:
+            eval_template = prompt_text(self.api_client.generate_prompt("evaluate", ""))
+            eval_output = min(self.config.MAX_TOKENS, expected_evaluate_output(requirement_count))
+            self._add_request(estimate, estimate_tokens(eval_template) + parse_output, eval_output,
+                              estimate_tokens(eval_template))
+        return estimate
+
+    def estimate_document(self, document_name: str, segments) -> DocumentEstimate:
+        doc = DocumentEstimate(document_name=document_name)
+        for segment in segments:
+            seg_estimate = self.estimate_segment(segment)
+            doc.segments.append(seg_estimate)
+            doc.usage.add(seg_estimate.usage)
+            doc.requests += seg_estimate.requests
+        doc.wall_seconds = self._makespan([s.seconds for s in doc.segments], self.config.BATCH_SIZE)
+        return doc
+
+    def estimate_evaluations(self, document_name: str, batches: List[Tuple[int, int]]) -> DocumentEstimate:
+        """需求表：没有解析请求，每批需求一个评估请求；batches 为 (需求条数, 需求输入token)"""
+        doc = DocumentEstimate(document_name=document_name)
+        eval_template = estimate_tokens(prompt_text(self.api_client.generate_prompt("evaluate", "")))
+        for index, (count, input_tokens) in enumerate(batches, 1):
+            estimate = SegmentEstimate(segment_id=f"{document_name}_batch{index}", cached=False)
+            self._add_request(estimate, eval_template + input_tokens,
+                              min(self.config.MAX_TOKENS, expected_evaluate_output(count)), eval_template)
+            doc.segments.append(estimate)
+            doc.usage.add(estimate.usage)
+            doc.requests += estimate.requests
+        doc.wall_seconds = self._makespan([s.seconds for s in doc.segments], self.config.BATCH_SIZE)
+        return doc
+
+    def finalize(self, batch: BatchEstimate) -> BatchEstimate:
+        for doc in batch.documents:
+            batch.usage.add(doc.usage)
+            batch.requests += doc.requests
+            batch.total_segments += len(doc.segments)
+            batch.cached_segments += sum(1 for s in doc.segments if s.cached)
+            batch.wall_seconds += doc.wall_seconds
+        batch.estimated_cost = estimate_cost(batch.usage, self.config)
+        return batch
+
+    def _add_request(self, estimate: SegmentEstimate, prompt_tokens: int, completion_tokens: int,
+                     cached_prefix_tokens: int = 0):
+        estimate.requests += 1
+        estimate.usage.add(TokenUsage(
+            prompt_tokens=prompt_tokens, completion_tokens=completion_tokens,
+            cache_hit_tokens=cached_prefix_tokens, cache_miss_tokens=prompt_tokens - cached_prefix_tokens,
+            requests=1
+        ))
+        estimate.seconds += (self.config.ESTIMATED_API_LATENCY
+                             + completion_tokens / self.config.ESTIMATED_OUTPUT_TOKENS_PER_SEC)
+
+    @staticmethod
+    def _makespan(durations: List[float], workers: int) -> float:
+        """按提交顺序分配给最早空闲的工作线程，返回完成时间"""
+        if not durations:
+            return 0.0
+        finish_times = [0.0] * max(1, workers)
+        for duration in durations:
+            earliest = heapq.heappop(finish_times)
+            heapq.heappush(finish_times, earliest + duration)
+        return max(finish_times)
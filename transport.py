@@ -0,0 +1,97 @@
+# ==================== transport.py ====================
+import hashlib
+import json
+import threading
+from pathlib import Path
+from typing import Dict
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+class RecordingNotFoundError(Exception):
+    """回放模式下未找到对应的录制响应"""
+
+def request_fingerprint(body: bytes) -> str:
+    """按模型、消息与采样参数计算请求指纹，忽略stream等不影响内容的字段
+
+    max_tokens 不计入：输出预算随输出校准（按并发线程的完成顺序更新）变化，
+    同一语料在录制与回放时的预算不一定相同。截断后以更大预算重试的请求指纹相同，
+    录制时后写入的完整响应覆盖被截断的响应。
+    """
+    try:
+        payload = json.loads(body or b"{}")
+    except (TypeError, json.JSONDecodeError):
+        return hashlib.sha256(body or b"").hexdigest()
+
+    key_fields = {
+        "model": payload.get("model"),
+        "messages": payload.get("messages"),
+        "temperature": payload.get("temperature"),
+        "top_p": payload.get("top_p")
+    }
+    canonical = json.dumps(key_fields, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+class RecordReplayAdapter(HTTPAdapter):
+    """录制/回放传输层
+
+    record: 请求照常发往真实服务，成功响应按请求指纹保存到 recordings_dir
+    replay: 不访问网络，直接按请求指纹返回录制的响应
+    """
+
+    MODES = ("record", "replay")
+
+    def __init__(self, mode: str, recordings_dir: str):
+        if mode not in self.MODES:
+            raise ValueError(f"未知的传输模式: {mode}")
+        super().__init__()
+        self.mode = mode
+        self.recordings_dir = Path(recordings_dir)
+        self.recordings_dir.mkdir(parents=True, exist_ok=True)
+        self.stats = {"recorded": 0, "replayed": 0, "missed": 0}
+        self._lock = threading.Lock()
+
+    def send(self, request, **kwargs):
+        body = request.body.encode("utf-8") if isinstance(request.body, str) else request.body
+        fingerprint = request_fingerprint(body)
+        recording_file = self.recordings_dir / f"{fingerprint}.json"
+
+        if self.mode == "replay":
+            if not recording_file.exists():
+                self._count("missed")
+                raise RecordingNotFoundError(f"未找到录制响应: {fingerprint[:16]}")
+            with open(recording_file, 'r', encoding='utf-8') as f:
+                recording = json.load(f)
+            self._count("replayed")
+            return self._build_response(request, recording)
+
+        response = super().send(request, **kwargs)
+        if response.status_code == 200:
+            recording = {
+                "status_code": response.status_code,
+                "headers": {"Content-Type": response.headers.get("Content-Type", "application/json")},
+                "body": response.content.decode("utf-8"),
+                "request": json.loads(body or b"{}")
+            }
+            tmp_file = recording_file.with_suffix(".tmp")
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(recording, f, ensure_ascii=False)
+            tmp_file.replace(recording_file)
+            self._count("recorded")
+        return response
+
+    def _count(self, key: str):
+        with self._lock:
+            self.stats[key] += 1
+
+    def _build_response(self, request, recording: Dict) -> requests.Response:
+        response = requests.Response()
+        response.status_code = recording["status_code"]
+        response.headers = CaseInsensitiveDict(recording.get("headers", {}))
+        response._content = recording["body"].encode("utf-8")
+        response.encoding = "utf-8"
+        response.url = request.url
+        response.request = request
+        response.reason = "OK"
+        return response
@@ -1,20 +1,46 @@
 # ==================== validator.py ====================
 import os
+import random
+import threading
 import time
 import hashlib
 import json
-import re
+from contextlib import nullcontext
+from dataclasses import asdict, dataclass
 from pathlib import Path
-from typing import List, Dict
-from concurrent.futures import ThreadPoolExecutor, as_completed
-import pandas as pd
+from itertools import islice
+from typing import Callable, Iterable, List, Dict, Optional, Tuple, Union
+from concurrent.futures import (FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait,
+                                TimeoutError as FuturesTimeoutError)
 
 from config import Config
-from models import Requirement, DocumentSegment, ValidationResult
-from preprocessor import DocumentPreprocessor
+from models import Requirement, DocumentSegment, ValidationResult, RequirementTable, TokenUsage
+from preprocessor import DocumentPreprocessor, file_digest
 from api_client import DeepSeekAPI
 from parser import ResultParser
-from report_generator import ReportGenerator
+from extractor import HeuristicExtractor
+from prompts import PARSE_TEXT_LIMIT, compact_json
+from report_dispatcher import ReportDispatcher
+from result_cache import (EvaluationCache, ParseCache, apply_evaluation, criteria_fingerprint, evaluation_of,
+                          requirement_key)
+from discovery import discover, document_key
+from sampling import allocate, chapter_strata, estimate as estimate_sample
+from scheduling import ScheduleReport, makespan_lower_bound, order_by_cost
+from table_input import TABLE_EXTENSIONS, ColumnMapping, read_requirements
+from aggregation import evaluate_against_criteria, summarize_batch, summarize_document
+from metrics import metrics
+from tokens import (BatchEstimate, BatchEstimator, OutputCalibration, estimate_cost, estimate_tokens,
+                    expected_evaluate_output, expected_parse_output, output_budget)
+
+SUPPORTED_EXTENSIONS = ('.pdf', '.doc', '.docx', '.txt')
+
+@dataclass
+class PreparedSegment:
+    """提交前对片段的一次性检查，预估与处理共用，避免重复本地抽取与缓存查询"""
+    requirements: Optional[List[Requirement]] = None  # 无需解析请求即可得到的需求
+    source: str = "api"  # local（本地抽取）| cache（解析级缓存）| api（需要解析请求）
+    evaluations: Optional[Dict[str, Dict]] = None  # 评估级缓存命中（键为 requirement_key），None 表示未查询
+    cached: bool = False  # 已解析且全部需求已有评估结果
 
 class RequirementValidator:
     """需求完整性验证主控制器"""
@@ -22,228 +48,879 @@ class RequirementValidator:
     def __init__(self, config: Config = None):
         self.config = config or Config()
         
-        self.preprocessor = DocumentPreprocessor(self.config.MAX_SEGMENT_LENGTH)
+        use_extraction_cache = self.config.CACHE_BACKEND != "none" and self.config.EXTRACTION_CACHE
+        self.preprocessor = DocumentPreprocessor(
+            self.config.MAX_SEGMENT_LENGTH,
+            cache_dir=str(Path(self.config.CACHE_DIR) / "extraction") if use_extraction_cache else None
+        )
         self.api_client = DeepSeekAPI(self.config)
         self.parser = ResultParser(self.config.COMPLETENESS_CRITERIA)
-        self.report_generator = ReportGenerator()
+        self.extractor = HeuristicExtractor(self.config.COMPLETENESS_CRITERIA) if self.config.LOCAL_EXTRACTION else None
+        # 需求表的类型与要素线索判定同样使用本地抽取器，与 LOCAL_EXTRACTION 无关
+        self.table_extractor = self.extractor or HeuristicExtractor(self.config.COMPLETENESS_CRITERIA)
+        self.table_columns = ColumnMapping.from_dict(self.config.TABLE_COLUMNS)
+        self.report_dispatcher = ReportDispatcher(self.config)
+        self.output_calibration = OutputCalibration()
+        
+        # 两级缓存：解析结果与完整性标准无关，修改标准后只需重新评估
+        self.parse_cache = None
+        self.evaluation_cache = None
+        if self.config.CACHE_BACKEND != "none":
+            parse_fingerprint = hashlib.sha256(
+                self.api_client.prompts.parse.static_text.encode("utf-8")
+            ).hexdigest()[:16]
+            self.parse_cache = ParseCache(str(Path(self.config.CACHE_DIR) / "parse"), parse_fingerprint)
+            self.evaluation_cache = EvaluationCache(str(Path(self.config.CACHE_DIR) / "evaluations.sqlite"))
+        
+        # 精简模式只接受 .txt（及 .csv 需求表）输入与JSON输出，整个流程不导入 python-docx/openpyxl/PyPDF2；
+        # 需求表需通过 TABLE_INPUT 显式启用，批量目录中的其他表格文件不会被当作需求表读取
+        self.supported_extensions = ('.txt',) if self.config.MINIMAL_MODE else SUPPORTED_EXTENSIONS
+        if self.config.TABLE_INPUT:
+            self.supported_extensions += ('.csv',) if self.config.MINIMAL_MODE else TABLE_EXTENSIONS
+        if self.config.MINIMAL_MODE and set(self.config.REPORT_FORMATS) - {"json"}:
+            raise ValueError(f"精简模式仅支持JSON报告: {self.config.REPORT_FORMATS}")
+        
+        self._refinements: List[threading.Thread] = []
         
         os.makedirs(self.config.OUTPUT_DIR, exist_ok=True)
         os.makedirs(self.config.CACHE_DIR, exist_ok=True)
+        
+        if self.config.METRICS_PORT:
+            metrics.serve(self.config.METRICS_PORT, self.config.METRICS_HOST)
+    
+    @property
+    def report_generator(self):
+        """Word/Excel报告生成器，首次访问时才导入 python-docx 与 openpyxl"""
+        return self.report_dispatcher.report_generator
     
-    def validate_document(self, file_path: str) -> ValidationResult:
+    def validate_document(self, file_path: str,
+                          on_segment: Optional[Callable[[DocumentSegment, List[Requirement]], None]] = None,
+                          document_name: Optional[str] = None) -> ValidationResult:
+        """验证单个文档；on_segment 在每个片段完成解析与评估后回调，可用于流式输出
+        document_name 为结果与报告中的文档标识，默认为文件名（批量验证时为相对输入目录的路径）
+
+        回调前已按完整性标准补充缺失要素（与最终结果相同的合并规则，重复应用结果不变），
+        流式输出的得分与缺失要素与最终结果一致。输出Excel报告时，需求明细同样在片段完成时逐条写入。
+        """
         start_time = time.time()
-        document_name = Path(file_path).name
+        document_name = document_name or Path(file_path).name
+        stage_timings = {}
+        detail_stream = None
         
         try:
-            segments = self.preprocessor.process_document(file_path)
+            if Path(file_path).suffix.lower() not in self.supported_extensions:
+                hint = "；需求表输入需启用 TABLE_INPUT（--tables）" if Path(file_path).suffix.lower() in TABLE_EXTENSIONS else ""
+                raise ValueError(f"不支持的文件格式（支持 {', '.join(self.supported_extensions)}）{hint}")
+            if Path(file_path).suffix.lower() in TABLE_EXTENSIONS:
+                return self._validate_table(file_path, document_name)
+            with metrics.span("preprocessing", document=document_name) as span:
+                segments = self.preprocessor.process_document(file_path)
+            stage_timings["preprocessing"] = span["duration"]
             all_requirements = []
+            segment_usage = {segment.id: TokenUsage() for segment in segments}
             
-            with ThreadPoolExecutor(max_workers=self.config.BATCH_SIZE) as executor:
+            # 每个片段只做一次本地抽取与缓存查询，排序预估与处理沿用同一结果
+            prepared = {segment.id: self._prepare_segment(segment) for segment in segments}
+            estimator = self.segment_estimator(prepared)
+            scheduled = order_by_cost(segments, lambda segment: estimator.estimate_segment(segment).seconds,
+                                      self.config.SCHEDULE_ORDER)
+            durations: Dict[str, float] = {}
+            detail_stream = self.report_dispatcher.open_detail_stream(document_name)
+            
+            unfinished_segments = []
+            with metrics.span("segments", document=document_name) as span:
+                executor = ThreadPoolExecutor(max_workers=self.config.BATCH_SIZE)
                 future_to_segment = {
-                    executor.submit(self._process_segment, segment): segment
-                    for segment in segments
+                    executor.submit(self._timed_segment, segment, segment_usage[segment.id], durations,
+                                    prepared[segment.id]): segment
+                    for segment in scheduled
                 }
+                metrics.add_gauge("segment_queue_depth", len(future_to_segment))
                 
-                for future in as_completed(future_to_segment):
-                    segment = future_to_segment[future]
-                    try:
-                        segment_requirements = future.result()
-                        for req in segment_requirements:
-                            req.segment_id = segment.id
-                        all_requirements.extend(segment_requirements)
-                    except Exception as e:
-                        print(f"片段处理失败 {segment.id}: {e}")
+                # 文档时限从开始验证起算；超时后不再等待剩余片段，按已完成的片段出具部分结果
+                timeout = None
+                if self.config.DOCUMENT_DEADLINE > 0:
+                    timeout = max(0.0, self.config.DOCUMENT_DEADLINE - (time.time() - start_time))
+                pending = set(future_to_segment)
+                try:
+                    for future in as_completed(future_to_segment, timeout=timeout):
+                        pending.discard(future)
+                        segment = future_to_segment[future]
+                        metrics.add_gauge("segment_queue_depth", -1)
+                        try:
+                            segment_requirements = future.result()
+                            for req in segment_requirements:
+                                req.segment_id = segment.id
+                            all_requirements.extend(segment_requirements)
+                            if on_segment or detail_stream:
+                                self._evaluate_requirements(segment_requirements)
+                            if detail_stream:
+                                for req in segment_requirements:
+                                    detail_stream.write_requirement(req)
+                            if on_segment:
+                                on_segment(segment, segment_requirements)
+                        except Exception as e:
+                            metrics.record_error("segment", e)
+                            print(f"片段处理失败 {segment.id}: {e}")
+                except FuturesTimeoutError:
+                    pending_ids = {future_to_segment[future].id for future in pending}
+                    unfinished_segments = [segment.id for segment in segments if segment.id in pending_ids]
+                    metrics.add_gauge("segment_queue_depth", -len(pending))
+                    metrics.inc("document_deadline_exceeded_total")
+                    metrics.inc("segments_unfinished_total", len(pending))
+                    print(f"文档 {document_name} 超出时限 {self.config.DOCUMENT_DEADLINE} 秒，"
+                          f"{len(pending)} 个片段未完成，输出部分结果")
+                finally:
+                    # 未开始的片段直接取消；已在执行的请求继续在后台完成并写入缓存，重新验证时可直接命中
+                    executor.shutdown(wait=not unfinished_segments, cancel_futures=bool(unfinished_segments))
+            stage_timings["segments"] = span["duration"]
+            schedule = ScheduleReport(
+                order=self.config.SCHEDULE_ORDER,
+                workers=self.config.BATCH_SIZE,
+                tasks=len(segments),
+                makespan=span["duration"],
+                lower_bound=makespan_lower_bound(list(durations.values()), self.config.BATCH_SIZE)
+            )
+            metrics.set_gauge("schedule_efficiency", schedule.efficiency, scope="document")
+            
+            with metrics.span("aggregation", document=document_name) as span:
+                evaluated_requirements = self._evaluate_requirements(all_requirements)
+                result = self._calculate_results(
+                    document_name=document_name,
+                    requirements=evaluated_requirements,
+                    validation_time=time.time() - start_time
+                )
+                result.unfinished_segments = unfinished_segments
+                result.schedule = schedule.to_dict()
+            stage_timings["aggregation"] = span["duration"]
+            
+            for segment_id, usage in segment_usage.items():
+                result.token_usage.add(usage)
+            result.segment_token_usage = {k: v for k, v in segment_usage.items() if v.requests}
+            result.estimated_cost = estimate_cost(result.token_usage, self.config)
+            
+            with metrics.span("reporting", document=document_name, mode=self.config.REPORT_MODE) as span:
+                streamed = None
+                if detail_stream:
+                    detail_stream.close()
+                    streamed = {"excel": detail_stream.output_path}
+                self._generate_reports(result, document_name, streamed)
+            stage_timings["reporting"] = span["duration"]
+            result.stage_timings = stage_timings
+            
+            metrics.observe("document_duration_seconds", result.validation_time)
+            return result
             
-            evaluated_requirements = self._evaluate_requirements(all_requirements)
+        except Exception as e:
+            if detail_stream:
+                detail_stream.discard()
+            metrics.record_error("document", e)
+            raise Exception(f"文档验证失败 {document_name}: {e}")
+    
+    def sample_document(self, file_path: str, fraction: Optional[float] = None, refine: bool = False,
+                        on_update: Optional[Callable[[ValidationResult], None]] = None) -> ValidationResult:
+        """抽样快速估计：按章节分层随机抽取 fraction（默认 SAMPLE_FRACTION）比例的片段完整验证
+
+        completeness_score 为分层比率估计值，result.sampling 包含其置信区间与各类型要素缺失率的区间，
+        未抽中的片段记入 unfinished_segments。refine=True 时在后台按同样比例分轮验证剩余片段，
+        每轮结束以更新后的结果回调 on_update，直至全部片段完成（最后一轮的结果再生成一次报告）；
+        wait_for_refinements() 等待后台完成。
+        """
+        start_time = time.time()
+        document_name = Path(file_path).name
+        fraction = self.config.SAMPLE_FRACTION if fraction is None else fraction
+        if not 0 < fraction <= 1:
+            raise ValueError(f"抽样比例应在 (0, 1] 之间: {fraction}")
+        
+        try:
+            suffix = Path(file_path).suffix.lower()
+            if suffix not in self.supported_extensions or suffix in TABLE_EXTENSIONS:
+                raise ValueError(f"抽样估计不支持该文件格式: {suffix}")
+            segments = self.preprocessor.process_document(file_path)
+        except Exception as e:
+            metrics.record_error("document", e)
+            raise Exception(f"文档验证失败 {document_name}: {e}")
+        
+        strata = chapter_strata(segments)
+        per_round = allocate(strata, fraction, self.config.SAMPLE_MIN_PER_STRATUM)
+        remaining = [list(members) for members in strata]
+        rng = random.Random(self.config.SAMPLE_SEED)
+        processed: Dict[int, List[Requirement]] = {}
+        usage = TokenUsage()
+        
+        def run_round():
+            chosen = []
+            for members, count in zip(remaining, per_round):
+                picked = rng.sample(members, min(count, len(members)))
+                for index in picked:
+                    members.remove(index)
+                chosen.extend(picked)
+            metrics.inc("sampled_segments_total", len(chosen))
+            self._process_sampled(segments, sorted(chosen), processed, usage)
+        
+        def build_result(render: bool) -> ValidationResult:
+            requirements = [req for index in sorted(processed) for req in processed[index]]
             result = self._calculate_results(
                 document_name=document_name,
-                requirements=evaluated_requirements,
+                requirements=self._evaluate_requirements(requirements),
                 validation_time=time.time() - start_time
             )
-            
-            self._generate_reports(result, document_name)
+            sample = estimate_sample(segments, strata, processed, self.config.COMPLETENESS_CRITERIA,
+                                     self.config.SAMPLE_CONFIDENCE)
+            result.completeness_score = sample.completeness_score.value
+            result.sampling = sample.to_dict()
+            result.unfinished_segments = [segment.id for index, segment in enumerate(segments)
+                                          if index not in processed]
+            result.token_usage.add(usage)
+            result.estimated_cost = estimate_cost(result.token_usage, self.config)
+            if render:
+                self._generate_reports(result, document_name)
             return result
+        
+        run_round()
+        result = build_result(render=True)
+        
+        if refine and any(remaining):
+            def refine_rounds():
+                try:
+                    while any(remaining):
+                        run_round()
+                        refined = build_result(render=not any(remaining))
+                        if on_update:
+                            on_update(refined)
+                except Exception as e:
+                    metrics.record_error("document", e)
+                    print(f"抽样估计后台补全失败 {document_name}: {e}")
             
-        except Exception as e:
-            raise Exception(f"文档验证失败 {document_name}: {e}")
+            thread = threading.Thread(target=refine_rounds, name=f"refine-{document_name}", daemon=True)
+            self._refinements.append(thread)
+            thread.start()
+        return result
+    
+    def _process_sampled(self, segments: List[DocumentSegment], indices: List[int],
+                         processed: Dict[int, List[Requirement]], usage: TokenUsage):
+        """验证抽中的片段；失败的片段不计入样本"""
+        segment_usage = {index: TokenUsage() for index in indices}
+        with ThreadPoolExecutor(max_workers=self.config.BATCH_SIZE) as executor:
+            futures = {executor.submit(self.process_segment, segments[index], segment_usage[index]): index
+                       for index in indices}
+            for future in as_completed(futures):
+                index = futures[future]
+                try:
+                    requirements = future.result()
+                except Exception as e:
+                    metrics.record_error("segment", e)
+                    print(f"片段处理失败 {segments[index].id}: {e}")
+                    continue
+                for req in requirements:
+                    req.segment_id = segments[index].id
+                processed[index] = requirements
+        for part in segment_usage.values():
+            usage.add(part)
     
-    def validate_batch(self, input_dir: str = None) -> List[ValidationResult]:
+    def wait_for_refinements(self):
+        """等待抽样估计的后台补全完成"""
+        for thread in list(self._refinements):
+            thread.join()
+        self._refinements.clear()
+    
+    def validate_batch(self, input_dir: str = None,
+                       dry_run: bool = False) -> Union[List[ValidationResult], BatchEstimate]:
+        """批量验证目录中的文档；dry_run=True 时只预估请求数、token、费用与耗时，不调用API"""
         input_dir = input_dir or self.config.INPUT_DIR
-        results = []
-        
-        supported_extensions = ['.pdf', '.doc', '.docx', '.txt']
-        doc_files = []
         
-        for ext in supported_extensions:
-            doc_files.extend(Path(input_dir).glob(f"*{ext}"))
-            doc_files.extend(Path(input_dir).glob(f"*{ext.upper()}"))
+        doc_files = self.discover_documents(input_dir)
         
         if not doc_files:
             print(f"未找到文档文件: {input_dir}")
-            return results
+            return BatchEstimate() if dry_run else []
         
-        for doc_file in doc_files:
+        if dry_run:
+            return self.estimate_batch(doc_files, root=input_dir)
+        
+        return self.validate_files(doc_files, root=input_dir)
+    
+    def validate_files(self, doc_files: List[Path],
+                       progress: Optional[Callable[..., None]] = None,
+                       previous_results: Optional[List[ValidationResult]] = None,
+                       root: Optional[str] = None) -> List[ValidationResult]:
+        """依次验证给定文档并生成批量汇总
+
+        progress(event, **fields) 在每个文档开始、完成或失败时回调；
+        previous_results 为续跑时已完成的结果，会并入批量汇总。
+        文档按给定顺序串行处理，SCHEDULE_ORDER 作用于文档内的片段（跨文档排序见 distributed.py）。
+        root 为输入目录，文档以相对 root 的路径标识（见 discovery.document_key）。
+        """
+        results = list(previous_results or [])
+        total = len(doc_files)
+        
+        for index, doc_file in enumerate(doc_files, 1):
+            if progress:
+                progress("document_started", file=str(doc_file), index=index, total=total)
             try:
-                result = self.validate_document(str(doc_file))
+                result = self.validate_document(str(doc_file), document_name=document_key(doc_file, root))
                 results.append(result)
+                if progress:
+                    progress("document_completed", file=str(doc_file), index=index, total=total, result=result)
             except Exception as e:
                 print(f"文档验证失败 {doc_file}: {e}")
+                if progress:
+                    progress("document_failed", file=str(doc_file), index=index, total=total, error=str(e))
+        
+        self._report_schedule(results[len(previous_results or []):])
+        if results:
+            self._generate_batch_report(results)
+        self.wait_for_reports()
+        self.export_metrics()
+        
+        return results
+    
+    def rescore(self, doc_files: List[Path], progress: Optional[Callable[..., None]] = None,
+                root: Optional[str] = None) -> List[ValidationResult]:
+        """按当前 COMPLETENESS_CRITERIA 重新评估已验证过的文档
+
+        需求取自解析级缓存，只发送评估请求；同一文档中评估级缓存未命中的需求
+        每 RESCORE_BATCH_SIZE 条合并为一个请求并发发送。尚未解析的片段会先解析。
+        """
+        if self.parse_cache is None:
+            raise ValueError("重新评分依赖解析级缓存，CACHE_BACKEND 不能为 none")
+        results = []
+        total = len(doc_files)
+        
+        for index, doc_file in enumerate(doc_files, 1):
+            if progress:
+                progress("document_started", file=str(doc_file), index=index, total=total)
+            try:
+                result = self._rescore_document(doc_file, document_key(doc_file, root))
+                results.append(result)
+                if progress:
+                    progress("document_completed", file=str(doc_file), index=index, total=total, result=result)
+            except Exception as e:
+                metrics.record_error("document", e)
+                print(f"文档重新评分失败 {doc_file}: {e}")
+                if progress:
+                    progress("document_failed", file=str(doc_file), index=index, total=total, error=str(e))
         
         if results:
             self._generate_batch_report(results)
+        self.wait_for_reports()
+        self.export_metrics()
         
         return results
     
-    def _process_segment(self, segment: DocumentSegment) -> List[Requirement]:
+    def _evaluation_batch_size(self) -> int:
+        """RESCORE_BATCH_SIZE 与输出上限（按实际输出校准）允许的条数取较小值，避免合并后的输出被截断再拆分"""
+        limit = self.config.MAX_TOKENS / max(1.0, self.config.OUTPUT_TOKEN_MARGIN)
+        size = max(1, self.config.RESCORE_BATCH_SIZE)
+        while size > 1 and self.output_calibration.scale("evaluate", expected_evaluate_output(size)) > limit:
+            size -= 1
+        return size
+    
+    def _evaluate_stream(self, requirements: Iterable[Requirement], usage: TokenUsage,
+                         document_name: str) -> List[Requirement]:
+        """将需求按 _evaluation_batch_size 条合并为评估请求并发发送，边读取边提交；
+        在途请求不超过 2×BATCH_SIZE，输入为流式读取时不必先全部载入。返回全部需求（原顺序）"""
+        iterator = iter(requirements)
+        collected: List[Requirement] = []
+        
+        def handle(future):
+            try:
+                usage.add(future.result())
+            except Exception as e:
+                metrics.record_error("segment", e)
+                print(f"需求评估失败 {document_name}: {e}")
+        
+        def evaluate(chunk: List[Requirement]) -> TokenUsage:
+            chunk_usage = TokenUsage()
+            self._evaluate_cached(chunk, chunk_usage)
+            return chunk_usage
+        
+        # 尚无实际输出可供校准时先单独评估一小批，再按校准后的输出大小确定合并条数
+        if not self.output_calibration.calibrated("evaluate"):
+            probe = list(islice(iterator, max(1, self._evaluation_batch_size() // 4)))
+            collected.extend(probe)
+            if probe:
+                with ThreadPoolExecutor(max_workers=1) as executor:
+                    handle(executor.submit(evaluate, probe))
+        
+        with ThreadPoolExecutor(max_workers=self.config.BATCH_SIZE) as executor:
+            in_flight = set()
+            while True:
+                chunk = list(islice(iterator, self._evaluation_batch_size()))
+                if not chunk:
+                    break
+                collected.extend(chunk)
+                in_flight.add(executor.submit(evaluate, chunk))
+                if len(in_flight) >= 2 * self.config.BATCH_SIZE:
+                    done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        handle(future)
+            for future in as_completed(in_flight):
+                handle(future)
+        return collected
+    
+    def _rescore_document(self, doc_file: Path, document_name: str) -> ValidationResult:
+        if doc_file.suffix.lower() in TABLE_EXTENSIONS:
+            return self._validate_table(str(doc_file), document_name)
+        
+        start_time = time.time()
+        stage_timings = {}
+        usage = TokenUsage()
+        
+        with metrics.span("preprocessing", document=document_name) as span:
+            segments = self.preprocessor.process_document(str(doc_file))
+        stage_timings["preprocessing"] = span["duration"]
+        
+        all_requirements = []
+        with metrics.span("segments", document=document_name) as span:
+            # 评估在 _evaluate_stream 中统一查缓存，此处只确定需求来源
+            prepared = [self._prepare_segment(segment, evaluations=False) for segment in segments]
+            unparsed = [segment for segment, state in zip(segments, prepared) if state.requirements is None]
+            if unparsed:
+                metrics.inc("rescore_unparsed_segments_total", len(unparsed))
+                print(f"{document_name}: {len(unparsed)} 个片段尚未解析，先调用解析接口")
+            segment_usage = [TokenUsage() for _ in segments]
+            with ThreadPoolExecutor(max_workers=self.config.BATCH_SIZE) as executor:
+                parsed = [executor.submit(self._parse_segment, segment, segment_usage[i], prepared[i])
+                          for i, segment in enumerate(segments)]
+                for segment, future in zip(segments, parsed):
+                    try:
+                        requirements = future.result()
+                    except Exception as e:
+                        metrics.record_error("segment", e)
+                        print(f"片段处理失败 {segment.id}: {e}")
+                        continue
+                    for req in requirements:
+                        req.segment_id = segment.id
+                    all_requirements.extend(requirements)
+            for part in segment_usage:
+                usage.add(part)
+            self._evaluate_stream(all_requirements, usage, document_name)
+        stage_timings["segments"] = span["duration"]
+        
+        return self._finish_document(document_name, all_requirements, usage, start_time, stage_timings)
+    
+    def _validate_table(self, file_path: str, document_name: Optional[str] = None) -> ValidationResult:
+        """需求表（.xlsx/.csv）：每行一条需求，跳过抽取与解析，直接批量评估"""
+        start_time = time.time()
+        path = Path(file_path)
+        document_name = document_name or path.name
+        stage_timings = {}
+        usage = TokenUsage()
+        
+        rows = read_requirements(path, self.table_columns, self.table_extractor,
+                                 self.parser._map_requirement_type)
+        with metrics.span("segments", document=document_name, source="table") as span:
+            requirements = self._evaluate_stream(rows, usage, document_name)
+        stage_timings["segments"] = span["duration"]
+        metrics.inc("table_requirements_total", len(requirements))
+        
+        return self._finish_document(document_name, requirements, usage, start_time, stage_timings)
+    
+    def _finish_document(self, document_name: str, requirements: List[Requirement], usage: TokenUsage,
+                         start_time: float, stage_timings: Dict[str, float]) -> ValidationResult:
+        """按标准补充缺失要素、汇总结果并生成报告"""
+        with metrics.span("aggregation", document=document_name) as span:
+            result = self._calculate_results(
+                document_name=document_name,
+                requirements=self._evaluate_requirements(requirements),
+                validation_time=time.time() - start_time
+            )
+        stage_timings["aggregation"] = span["duration"]
+        result.token_usage.add(usage)
+        result.estimated_cost = estimate_cost(result.token_usage, self.config)
+        
+        with metrics.span("reporting", document=document_name, mode=self.config.REPORT_MODE) as span:
+            self._generate_reports(result, document_name)
+        stage_timings["reporting"] = span["duration"]
+        result.stage_timings = stage_timings
+        
+        metrics.observe("document_duration_seconds", result.validation_time)
+        return result
+    
+    def _report_schedule(self, results: List[ValidationResult]):
+        """文档串行处理，批量的理想下界为各文档片段阶段下界之和"""
+        schedules = [result.schedule for result in results if result.schedule]
+        if not schedules:
+            return
+        batch = ScheduleReport(
+            order=self.config.SCHEDULE_ORDER,
+            workers=self.config.BATCH_SIZE,
+            tasks=sum(s["tasks"] for s in schedules),
+            makespan=sum(s["makespan"] for s in schedules),
+            lower_bound=sum(s["lower_bound"] for s in schedules)
+        )
+        metrics.set_gauge("schedule_efficiency", batch.efficiency, scope="batch")
+        print(f"片段调度（{batch.order}）: 实际 {batch.makespan:.1f} 秒，理想下界 {batch.lower_bound:.1f} 秒，"
+              f"效率 {batch.efficiency:.1%}")
+    
+    def estimate_batch(self, doc_files: List[Path], root: Optional[str] = None) -> BatchEstimate:
+        """抽取并分段全部文档，按实际提示词估算token，已缓存的片段不计入请求；root 含义同 validate_files"""
+        batch = BatchEstimate()
+        
+        for doc_file in doc_files:
+            # 检查结果按片段ID缓存，每个文档使用单独的预估器
+            estimator = self.segment_estimator()
+            document_name = document_key(doc_file, root)
+            try:
+                if doc_file.suffix.lower() in TABLE_EXTENSIONS:
+                    batch.documents.append(estimator.estimate_evaluations(document_name, self._table_batches(doc_file)))
+                    continue
+                segments = self.preprocessor.process_document(str(doc_file))
+                batch.documents.append(estimator.estimate_document(document_name, segments))
+            except Exception as e:
+                batch.failed_documents[document_name] = str(e)
+                print(f"文档预估失败 {doc_file}: {e}")
+        
+        self.segment_estimator().finalize(batch)
+        self._print_estimate(batch)
+        
+        timestamp = time.strftime("%Y%m%d_%H%M%S")
+        estimate_path = Path(self.config.OUTPUT_DIR) / f"批量验证预估_{timestamp}.json"
+        with open(estimate_path, 'w', encoding='utf-8') as f:
+            json.dump(batch.to_dict(), f, ensure_ascii=False, indent=2)
+        
+        return batch
+    
+    def _table_batches(self, doc_file: Path) -> List[Tuple[int, int]]:
+        """需求表中评估缓存未命中的需求按评估批次分组，返回每批 (条数, 输入token)"""
+        fingerprint = criteria_fingerprint(self.config.COMPLETENESS_CRITERIA)
+        rows = read_requirements(doc_file, self.table_columns, self.table_extractor,
+                                 self.parser._map_requirement_type)
+        size = self._evaluation_batch_size()
+        batches = []
+        while True:
+            chunk = list(islice(rows, size * 10))
+            if not chunk:
+                break
+            if self.evaluation_cache is not None:
+                cached = self.evaluation_cache.get_many([requirement_key(req, fingerprint) for req in chunk])
+                chunk = [req for req in chunk if requirement_key(req, fingerprint) not in cached]
+            for start in range(0, len(chunk), size):
+                part = chunk[start:start + size]
+                batches.append((len(part), sum(estimate_tokens(compact_json(self._evaluation_input(req)))
+                                               for req in part)))
+        return batches
+    
+    def _print_estimate(self, batch: BatchEstimate):
+        usage = batch.usage
+        print(f"预估文档数: {len(batch.documents)}（失败 {len(batch.failed_documents)}）")
+        print(f"预估片段数: {batch.total_segments}（已缓存 {batch.cached_segments}）")
+        print(f"预估请求数: {batch.requests}")
+        print(f"预估token: 输入 {usage.prompt_tokens:,}，输出 {usage.completion_tokens:,}")
+        print(f"预估费用: ¥{batch.estimated_cost:.4f}")
+        print(f"预估耗时: {batch.wall_seconds:.1f}秒（并发 {self.config.BATCH_SIZE}）")
+    
+    def discover_documents(self, input_dir: str) -> List[Path]:
+        """按 DISCOVERY_* 配置遍历目录并去除重复文档；有重复项时在输出目录写入文档发现清单"""
+        discovery = discover(
+            input_dir, self.supported_extensions,
+            include=self.config.DISCOVERY_INCLUDE, exclude=self.config.DISCOVERY_EXCLUDE,
+            recursive=self.config.DISCOVERY_RECURSIVE, dedupe_content=self.config.DEDUPE_CONTENT,
+            skip_dirs=[self.config.OUTPUT_DIR, self.config.CACHE_DIR]
+        )
+        if discovery.duplicates:
+            manifest_path = discovery.write_manifest(self.config.OUTPUT_DIR)
+            print(f"发现 {len(discovery.documents)} 个文档，跳过 {len(discovery.duplicates)} 个重复文档"
+                  f"（清单: {manifest_path}）")
+        return discovery.documents
+    
+    def segment_estimator(self, prepared: Optional[Dict[str, PreparedSegment]] = None) -> BatchEstimator:
+        """按当前缓存状态预估片段请求量与耗时（已缓存片段为0）
+
+        prepared 为 片段ID → 检查结果，缺少的片段在首次预估时检查（不计入解析阶段耗时）并补入；
+        片段ID只在文档内唯一，一个预估器只用于一个文档。
+        """
+        prepared = {} if prepared is None else prepared
+        
+        def lookup(segment: DocumentSegment) -> PreparedSegment:
+            if segment.id not in prepared:
+                prepared[segment.id] = self._prepare_segment(segment, timed=False)
+            return prepared[segment.id]
+        
+        return BatchEstimator(self.config, self.api_client, lambda segment: lookup(segment).cached,
+                              lambda segment: lookup(segment).source == "local")
+    
+    def _prepare_segment(self, segment: DocumentSegment, evaluations: bool = True,
+                         timed: bool = True) -> PreparedSegment:
+        """本地抽取，不足时取解析级缓存；evaluations=True 时再查询这些需求的评估级缓存。
+        timed=True 时本地抽取计入解析阶段耗时（仅预估时为 False）"""
+        requirements = self._local_requirements(segment, timed)
+        source = "local"
+        if requirements is None and self.parse_cache is not None:
+            requirements = self.parse_cache.get(segment)
+            source = "cache"
+        if requirements is None:
+            return PreparedSegment()
+        
+        prepared = PreparedSegment(requirements=requirements, source=source)
+        if evaluations and self.evaluation_cache is not None:
+            fingerprint = criteria_fingerprint(self.config.COMPLETENESS_CRITERIA)
+            keys = {requirement_key(req, fingerprint) for req in requirements}
+            prepared.evaluations = self.evaluation_cache.get_many(list(keys))
+            prepared.cached = len(prepared.evaluations) == len(keys)
+        return prepared
+    
+    def _timed_segment(self, segment: DocumentSegment, usage: TokenUsage, durations: Dict[str, float],
+                       prepared: Optional[PreparedSegment] = None) -> List[Requirement]:
+        start_time = time.perf_counter()
         try:
-            cache_key = f"{segment.id}_{hashlib.md5(segment.text.encode()).hexdigest()[:16]}"
-            cache_file = Path(self.config.CACHE_DIR) / f"{cache_key}.json"
-            
-            if cache_file.exists():
-                with open(cache_file, 'r', encoding='utf-8') as f:
-                    cached_data = json.load(f)
-                    return [Requirement(**data) for data in cached_data]
-            
-            parse_prompt = self.api_client.generate_prompt("parse", segment.text)
-            parse_response = self.api_client.call_api(parse_prompt)
-            parse_content = self.api_client.extract_content(parse_response)
-            
-            requirements = self.parser.parse_requirements(parse_content)
-            
-            if requirements:
-                eval_context = {
-                    "criteria": self.config.COMPLETENESS_CRITERIA,
-                    "requirements": [
-                        {
-                            "id": req.id,
-                            "text": req.text,
-                            "type": req.req_type.value,
-                            "elements": req.elements
-                        }
-                        for req in requirements
-                    ]
-                }
-                
-                eval_prompt = self.api_client.generate_prompt(
-                    "evaluate", 
-                    json.dumps(eval_context, ensure_ascii=False),
-                    eval_context
-                )
-                
-                eval_response = self.api_client.call_api(eval_prompt)
-                eval_content = self.api_client.extract_content(eval_response)
-                requirements = self.parser.parse_evaluation(eval_content, requirements)
-            
-            cache_data = [
-                {
-                    "id": req.id,
-                    "text": req.text,
-                    "req_type": req.req_type.value,
-                    "segment_id": req.segment_id,
-                    "position": req.position,
-                    "elements": req.elements,
-                    "completeness_score": req.completeness_score,
-                    "missing_elements": req.missing_elements,
-                    "improvement_suggestions": req.improvement_suggestions
-                }
-                for req in requirements
-            ]
-            
-            with open(cache_file, 'w', encoding='utf-8') as f:
-                json.dump(cache_data, f, ensure_ascii=False, indent=2)
-            
-            return requirements
-            
+            return self._process_segment(segment, usage, prepared)
+        finally:
+            durations[segment.id] = time.perf_counter() - start_time
+    
+    def _process_segment(self, segment: DocumentSegment, usage: Optional[TokenUsage] = None,
+                         prepared: Optional[PreparedSegment] = None) -> List[Requirement]:
+        try:
+            return self.process_segment(segment, usage, prepared)
         except Exception as e:
+            metrics.record_error("segment", e)
             print(f"片段处理失败 {segment.id}: {e}")
             return []
     
-    def _evaluate_requirements(self, requirements: List[Requirement]) -> List[Requirement]:
-        for requirement in requirements:
-            expected_elements = self.config.COMPLETENESS_CRITERIA.get(
-                requirement.req_type.value, []
+    def process_segment(self, segment: DocumentSegment, usage: Optional[TokenUsage] = None,
+                        prepared: Optional[PreparedSegment] = None) -> List[Requirement]:
+        """解析并评估单个片段（解析与评估分别查缓存），失败时抛出异常；
+        prepared 为提交前的检查结果，未给出时在此检查"""
+        usage = usage if usage is not None else TokenUsage()
+        prepared = prepared or self._prepare_segment(segment)
+        requirements = self._parse_segment(segment, usage, prepared)
+        if requirements:
+            self._evaluate_cached(requirements, usage, prepared.evaluations)
+        return requirements
+    
+    def _local_requirements(self, segment: DocumentSegment, timed: bool = True) -> Optional[List[Requirement]]:
+        """本地抽取置信度足够时返回需求列表（带片段内偏移），否则返回 None"""
+        if self.extractor is None:
+            return None
+        with metrics.span("parsing", kind="local") if timed else nullcontext():
+            extraction = self.extractor.extract(segment.text)
+        if extraction.confidence < self.config.LOCAL_EXTRACTION_MIN_CONFIDENCE:
+            return None
+        return extraction.requirements
+    
+    def _parse_segment(self, segment: DocumentSegment, usage: TokenUsage,
+                       prepared: PreparedSegment) -> List[Requirement]:
+        """片段 → 未评估的需求列表：本地抽取置信度足够时不调用模型，其次取解析级缓存（均由 prepared 给出）"""
+        if prepared.source == "local":
+            metrics.inc("local_extraction_total", result="accepted")
+            return prepared.requirements
+        if self.extractor is not None:
+            metrics.inc("local_extraction_total", result="fallback")
+        
+        requirements = prepared.requirements
+        # 检查之后同一文档中内容相同的片段可能已解析完成
+        if requirements is None and self.parse_cache is not None:
+            requirements = self.parse_cache.get(segment)
+        if requirements is not None:
+            metrics.inc("segment_cache_requests_total", result="hit")
+            return requirements
+        
+        metrics.inc("segment_cache_requests_total", result="miss")
+        requirements = self._parse_text(segment.text[:PARSE_TEXT_LIMIT], usage)
+        # 在评估写回得分之前缓存，解析级缓存只保存与标准无关的内容
+        if self.parse_cache is not None:
+            self.parse_cache.put(segment, requirements)
+        return requirements
+    
+    def _evaluate_cached(self, requirements: List[Requirement], usage: TokenUsage,
+                         cached: Optional[Dict[str, Dict]] = None) -> List[Requirement]:
+        """评估需求；评估级缓存未命中的需求合并为一次评估请求（截断时按需拆分）。
+        cached 为已查询过的评估级缓存结果，给出时不再查询"""
+        fingerprint = criteria_fingerprint(self.config.COMPLETENESS_CRITERIA)
+        pending = list(requirements)
+        keys = {}
+        if self.evaluation_cache is not None:
+            keys = {id(req): requirement_key(req, fingerprint) for req in requirements}
+            unique_keys = set(keys.values())
+            if cached is None:
+                cached = self.evaluation_cache.get_many(list(unique_keys))
+            elif len(cached) < len(unique_keys):
+                # 预先查询之后其他片段可能已评估了相同的需求，只补查未命中的部分
+                cached = {**cached, **self.evaluation_cache.get_many(list(unique_keys - cached.keys()))}
+            pending = []
+            for req in requirements:
+                if keys[id(req)] in cached:
+                    apply_evaluation(req, cached[keys[id(req)]])
+                else:
+                    pending.append(req)
+            metrics.inc("evaluation_cache_requests_total", len(requirements) - len(pending), result="hit")
+            metrics.inc("evaluation_cache_requests_total", len(pending), result="miss")
+        if not pending:
+            return requirements
+        
+        # 跨片段合并的需求ID可能重复，请求期间临时改用序号，完成后恢复
+        original_ids = [req.id for req in pending]
+        renumber = len(set(original_ids)) < len(original_ids)
+        if renumber:
+            for index, req in enumerate(pending, 1):
+                req.id = f"R{index}"
+        matched = set()
+        try:
+            self._evaluate_batch(pending, usage, matched=matched)
+        finally:
+            evaluated = [req for req in pending if req.id in matched]
+            if renumber:
+                for req, original_id in zip(pending, original_ids):
+                    req.id = original_id
+        
+        if self.evaluation_cache is not None and evaluated:
+            self.evaluation_cache.put_many(
+                fingerprint, [(keys[id(req)], evaluation_of(req)) for req in evaluated]
             )
-            
-            missing_from_config = [
-                elem for elem in expected_elements 
-                if elem not in requirement.elements
-            ]
-            
-            requirement.missing_elements = list(set(
-                requirement.missing_elements + missing_from_config
-            ))
-            
-            if expected_elements:
-                requirement.completeness_score = max(
-                    requirement.completeness_score,
-                    (1 - len(missing_from_config) / len(expected_elements)) * 100
-                )
         return requirements
     
+    def _call_with_budget(self, messages: List[Dict], expected_tokens: int,
+                          usage: TokenUsage, kind: str) -> Tuple[Dict, bool]:
+        """按预估输出（经实际输出校准）设置 max_tokens 调用API；输出被截断时以 MAX_TOKENS 重试一次。
+        返回响应以及在上限预算下是否仍被截断"""
+        budget = output_budget(self.output_calibration.scale(kind, expected_tokens), self.config)
+        while True:
+            response = self.api_client.call_api(messages, max_tokens=budget)
+            response_usage = TokenUsage.from_api(response.get("usage"))
+            usage.add(response_usage)
+            if response.get("hedge_usage"):
+                # 对冲中落后但已发出的请求同样计费
+                usage.add(TokenUsage.from_api(response["hedge_usage"]))
+            if not self.api_client.is_truncated(response):
+                self.output_calibration.observe(kind, expected_tokens, response_usage.completion_tokens)
+                return response, False
+            metrics.inc("api_truncated_responses_total", kind=kind)
+            if budget >= self.config.MAX_TOKENS:
+                return response, True
+            budget = self.config.MAX_TOKENS
+    
+    def _parse_text(self, text: str, usage: TokenUsage, depth: int = 0) -> List[Requirement]:
+        """解析文本；上限预算下仍被截断时按行对半拆分，分别解析后合并"""
+        response, truncated = self._call_with_budget(
+            self.api_client.generate_prompt("parse", text), expected_parse_output(text), usage, "parse"
+        )
+        if truncated and depth < self.config.MAX_SPLIT_DEPTH:
+            halves = self._split_in_half(text)
+            if halves:
+                metrics.inc("segment_splits_total", kind="parse")
+                first = self._parse_text(halves[0], usage, depth + 1)
+                second = self._parse_text(halves[1], usage, depth + 1)
+                return self._merge_requirements(first, second)
+        return self.parser.parse_requirements(self.api_client.extract_content(response))
+    
+    def _evaluate_batch(self, requirements: List[Requirement], usage: TokenUsage,
+                        depth: int = 0, matched: Optional[set] = None) -> List[Requirement]:
+        """评估需求；上限预算下仍被截断时将需求列表对半拆分分别评估。
+        matched 不为 None 时收集实际取得评估结果的需求ID"""
+        # 评估标准已在提示的固定前缀中，可变输入只包含待评估需求
+        eval_input = {"requirements": [self._evaluation_input(req) for req in requirements]}
+        eval_prompt = self.api_client.generate_prompt(
+            "evaluate",
+            compact_json(eval_input),
+            {"criteria": self.config.COMPLETENESS_CRITERIA}
+        )
+        response, truncated = self._call_with_budget(
+            eval_prompt, expected_evaluate_output(len(requirements)), usage, "evaluate"
+        )
+        if truncated and len(requirements) > 1 and depth < self.config.MAX_SPLIT_DEPTH:
+            metrics.inc("segment_splits_total", kind="evaluate")
+            middle = len(requirements) // 2
+            return (self._evaluate_batch(requirements[:middle], usage, depth + 1, matched)
+                    + self._evaluate_batch(requirements[middle:], usage, depth + 1, matched))
+        return self.parser.parse_evaluation(self.api_client.extract_content(response), requirements, matched)
+    
+    @staticmethod
+    def _evaluation_input(req: Requirement) -> Dict:
+        return {
+            "id": req.id,
+            "text": req.text,
+            "type": req.req_type.value,
+            "elements": req.elements
+        }
+    
+    @staticmethod
+    def _split_in_half(text: str) -> Optional[Tuple[str, str]]:
+        """在最靠近中点的换行处拆分；没有换行时不拆分"""
+        middle = len(text) // 2
+        before = text.rfind('\n', 0, middle)
+        after = text.find('\n', middle)
+        candidates = [pos for pos in (before, after) if 0 < pos < len(text) - 1]
+        if not candidates:
+            return None
+        cut = min(candidates, key=lambda pos: abs(pos - middle))
+        return text[:cut], text[cut + 1:]
+    
+    @staticmethod
+    def _merge_requirements(first: List[Requirement], second: List[Requirement]) -> List[Requirement]:
+        """合并分别解析的两部分；模型在两次请求中可能生成相同的ID，重复时追加序号"""
+        seen = {req.id for req in first}
+        for req in second:
+            if req.id in seen:
+                suffix = 2
+                while f"{req.id}-{suffix}" in seen:
+                    suffix += 1
+                req.id = f"{req.id}-{suffix}"
+            seen.add(req.id)
+        return first + second
+    
+    def _evaluate_requirements(self, requirements: List[Requirement]) -> List[Requirement]:
+        return evaluate_against_criteria(requirements, self.config.COMPLETENESS_CRITERIA)
+    
     def _calculate_results(self, document_name: str, 
                           requirements: List[Requirement],
                           validation_time: float) -> ValidationResult:
-        complete_requirements = [
-            req for req in requirements 
-            if not req.missing_elements
-        ]
-        
-        if requirements:
-            overall_score = sum(req.completeness_score for req in requirements) / len(requirements)
-        else:
-            overall_score = 0.0
-        
-        missing_by_type = {}
-        for req in requirements:
-            if req.missing_elements:
-                req_type = req.req_type.value
-                if req_type not in missing_by_type:
-                    missing_by_type[req_type] = {}
-                for elem in req.missing_elements:
-                    missing_by_type[req_type][elem] = missing_by_type[req_type].get(elem, 0) + 1
+        summary = summarize_document(requirements)
         
         doc_id = hashlib.md5(f"{document_name}_{time.time()}".encode()).hexdigest()[:12]
         
+        if self.config.COMPACT_RESULTS:
+            requirements = RequirementTable(requirements)
+        
         return ValidationResult(
             document_id=doc_id,
             document_name=document_name,
-            total_requirements=len(requirements),
-            complete_requirements=len(complete_requirements),
-            completeness_score=overall_score,
-            missing_elements_by_type=missing_by_type,
+            total_requirements=summary["total_requirements"],
+            complete_requirements=summary["complete_requirements"],
+            completeness_score=summary["completeness_score"],
+            missing_elements_by_type=summary["missing_elements_by_type"],
             requirements_details=requirements,
             validation_time=validation_time,
             generated_at=time.strftime("%Y-%m-%d %H:%M:%S")
         )
     
-    def _generate_reports(self, result: ValidationResult, base_name: str):
-        base_name_clean = re.sub(r'[^\w\-_\. ]', '_', base_name)
-        timestamp = time.strftime("%Y%m%d_%H%M%S")
-        
-        word_path = Path(self.config.OUTPUT_DIR) / f"{base_name_clean}_验证报告_{timestamp}.docx"
-        self.report_generator.generate_word_report(result, str(word_path))
-        
-        excel_path = Path(self.config.OUTPUT_DIR) / f"{base_name_clean}_详细清单_{timestamp}.xlsx"
-        self.report_generator.generate_excel_report(result, str(excel_path))
+    def export_metrics(self, path: str = None):
+        """将当前指标导出为JSON文件（默认使用 METRICS_EXPORT_PATH）"""
+        path = path or self.config.METRICS_EXPORT_PATH
+        if path:
+            metrics.export_json(path)
+    
+    def render_reports(self, document_id: str) -> List[str]:
+        """按需渲染已保存结果的报告（deferred模式下使用；none模式不保存结果，无法事后渲染）"""
+        return self.report_dispatcher.render(document_id)
+    
+    def wait_for_reports(self):
+        """等待后台报告渲染完成"""
+        self.report_dispatcher.join()
+    
+    def _generate_reports(self, result: ValidationResult, base_name: str,
+                          streamed: Optional[Dict[str, str]] = None):
+        self.report_dispatcher.submit(result, base_name, streamed)
     
     def _generate_batch_report(self, results: List[ValidationResult]):
         if not results:
             return
         
         timestamp = time.strftime("%Y%m%d_%H%M%S")
-        batch_path = Path(self.config.OUTPUT_DIR) / f"批量验证汇总_{timestamp}.xlsx"
+        if self.config.MINIMAL_MODE:
+            batch_path = Path(self.config.OUTPUT_DIR) / f"批量验证汇总_{timestamp}.json"
+            summary = {
+                "documents": [
+                    {k: v for k, v in result.to_dict().items() if k != "requirements_details"}
+                    for result in results
+                ],
+                "statistics": asdict(summarize_batch(results))
+            }
+            with open(batch_path, 'w', encoding='utf-8') as f:
+                json.dump(summary, f, ensure_ascii=False, indent=2)
+            return
         
-        summary_data = []
-        for result in results:
-            summary_data.append({
-                "文档名称": result.document_name,
-                "总需求数": result.total_requirements,
-                "完整需求数": result.complete_requirements,
-                "完整性得分": f"{result.completeness_score:.2f}%",
-                "验证耗时(秒)": f"{result.validation_time:.2f}",
-                "生成时间": result.generated_at
-            })
-        
-        df = pd.DataFrame(summary_data)
-        with pd.ExcelWriter(str(batch_path), engine='openpyxl') as writer:
-            df.to_excel(writer, sheet_name='批量汇总', index=False)
\ No newline at end of file
+        batch_path = Path(self.config.OUTPUT_DIR) / f"批量验证汇总_{timestamp}.xlsx"
+        self.report_generator.generate_batch_excel_report(
+            results, str(batch_path), stats=summarize_batch(results)
+        )
\ No newline at end of file
@@ -0,0 +1,252 @@
+# ==================== watcher.py ====================
+"""
+监视输入目录的常驻验证进程
+新增或修改的文档在写入稳定（去抖）后按内容哈希判断是否需要重新验证，
+整个进程生命周期复用同一个 RequirementValidator（API会话、缓存、报告线程）。
+Linux 下通过 inotify（ctypes 调用 libc）接收事件，不可用时退化为定时轮询。
+"""
+
+import ctypes
+import ctypes.util
+import json
+import os
+import select
+import struct
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Optional, Set
+
+from metrics import metrics
+from validator import file_digest
+
+RESCAN = "*"
+
+# 编辑器与Office生成的临时文件
+IGNORED_PREFIXES = (".", "~$", "~")
+
+class InotifyBackend:
+    """基于 inotify 的目录事件源"""
+
+    IN_MODIFY = 0x00000002
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_Q_OVERFLOW = 0x00004000
+    WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+    EVENT_HEADER = struct.Struct("iIII")
+
+    name = "inotify"
+
+    def __init__(self, directory: str):
+        libc_path = ctypes.util.find_library("c")
+        libc = ctypes.CDLL(libc_path or "libc.so.6", use_errno=True)
+        if not hasattr(libc, "inotify_init1"):
+            raise OSError("当前平台不支持inotify")
+
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 失败")
+        if libc.inotify_add_watch(self.fd, os.fsencode(directory), self.WATCH_MASK) < 0:
+            errno = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(errno, f"无法监视目录: {directory}")
+
+    def wait(self, timeout: float) -> Set[str]:
+        """等待事件，返回发生变化的文件名；事件队列溢出时返回 {RESCAN}"""
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return set()
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return set()
+
+        names = set()
+        offset = 0
+        while offset + self.EVENT_HEADER.size <= len(data):
+            _, mask, _, length = self.EVENT_HEADER.unpack_from(data, offset)
+            offset += self.EVENT_HEADER.size
+            if mask & self.IN_Q_OVERFLOW:
+                names.add(RESCAN)
+            elif length:
+                names.add(os.fsdecode(data[offset:offset + length].rstrip(b"\0")))
+            offset += length
+        return names
+
+    def close(self):
+        os.close(self.fd)
+
+class PollingBackend:
+    """定时比较目录快照（修改时间与大小）的事件源"""
+
+    name = "polling"
+
+    def __init__(self, directory: str, interval: float = 2.0):
+        self.directory = Path(directory)
+        self.interval = interval
+        self._snapshot = self._scan()
+
+    def _scan(self) -> Dict[str, tuple]:
+        snapshot = {}
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if entry.is_file():
+                    stat = entry.stat()
+                    snapshot[entry.name] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def wait(self, timeout: float) -> Set[str]:
+        time.sleep(min(timeout, self.interval))
+        current = self._scan()
+        changed = {name for name, sig in current.items() if self._snapshot.get(name) != sig}
+        changed.update(name for name in self._snapshot if name not in current)
+        self._snapshot = current
+        return changed
+
+    def close(self):
+        pass
+
+def create_backend(directory: str, backend: str = "auto", poll_interval: float = 2.0):
+    if backend in ("auto", "inotify"):
+        try:
+            return InotifyBackend(directory)
+        except (OSError, AttributeError) as e:
+            if backend == "inotify":
+                raise
+            print(f"inotify不可用，改用轮询: {e}")
+    return PollingBackend(directory, poll_interval)
+
+class FolderWatcher:
+    """监视目录并验证新增或内容变化的文档
+
+    文件最后一次变化后静默 debounce 秒且大小不再变化才视为写入完成；
+    已验证文档的内容哈希保存在 OUTPUT_DIR/.watch_state.json，重启后不会重复验证。
+    """
+
+    def __init__(self, validator, input_dir: str = None, debounce: float = 2.0,
+                 backend: str = "auto", poll_interval: float = 2.0,
+                 on_event: Optional[Callable[..., None]] = None):
+        self.validator = validator
+        self.input_dir = Path(input_dir or validator.config.INPUT_DIR)
+        self.debounce = debounce
+        self.backend_name = backend
+        self.poll_interval = poll_interval
+        self.on_event = on_event
+        self.state_file = Path(validator.config.OUTPUT_DIR) / ".watch_state.json"
+        self.known_hashes: Dict[str, str] = self._load_state()
+        self._pending: Dict[str, float] = {}
+        self._sizes: Dict[str, int] = {}
+        self._stop = threading.Event()
+
+    def run(self):
+        """阻塞运行直到 stop() 被调用"""
+        self.input_dir.mkdir(parents=True, exist_ok=True)
+        backend = create_backend(str(self.input_dir), self.backend_name, self.poll_interval)
+        self._emit("watch_started", directory=str(self.input_dir), backend=backend.name,
+                   known_documents=len(self.known_hashes))
+        self._schedule_all()
+        try:
+            while not self._stop.is_set():
+                changed = backend.wait(self._next_timeout())
+                if RESCAN in changed:
+                    self._schedule_all()
+                    changed.discard(RESCAN)
+                for name in changed:
+                    self._schedule(name)
+                self._process_ready()
+        finally:
+            backend.close()
+            self.validator.wait_for_reports()
+            self._emit("watch_stopped")
+
+    def stop(self):
+        self._stop.set()
+
+    def _schedule_all(self):
+        for path in self.input_dir.iterdir():
+            self._schedule(path.name)
+
+    def _schedule(self, name: str):
+        """记录最后一次变化时间与当时的大小，供去抖后判断写入是否完成"""
+        self._pending[name] = time.monotonic()
+        self._sizes[name] = self._size_of(name)
+
+    def _size_of(self, name: str) -> Optional[int]:
+        try:
+            return (self.input_dir / name).stat().st_size
+        except OSError:
+            return None
+
+    def _next_timeout(self) -> float:
+        if not self._pending:
+            return 1.0
+        oldest = min(self._pending.values())
+        return max(0.05, min(1.0, oldest + self.debounce - time.monotonic()))
+
+    def _process_ready(self):
+        now = time.monotonic()
+        ready = [name for name, last in self._pending.items() if now - last >= self.debounce]
+        for name in sorted(ready):
+            del self._pending[name]
+            if self._stop.is_set():
+                return
+            self._handle(name)
+
+    def _handle(self, name: str):
+        path = self.input_dir / name
+        if not self._is_candidate(path):
+            if not path.exists() and self.known_hashes.pop(name, None) is not None:
+                self._save_state()
+                self._emit("document_removed", file=str(path))
+            return
+
+        # 去抖期内大小仍在变化（如轮询模式下未收到写入事件），说明还在写入，推迟处理
+        if self._sizes.pop(name, None) != self._size_of(name):
+            self._schedule(name)
+            return
+
+        digest = file_digest(path)
+        if self.known_hashes.get(name) == digest:
+            return
+
+        self._emit("document_started", file=str(path))
+        try:
+            result = self.validator.validate_document(str(path))
+        except Exception as e:
+            metrics.inc("watch_documents_total", result="failed")
+            self._emit("document_failed", file=str(path), error=str(e))
+            print(f"文档验证失败 {path}: {e}")
+            return
+
+        self.known_hashes[name] = digest
+        self._save_state()
+        metrics.inc("watch_documents_total", result="validated")
+        self._emit("document_completed", file=str(path), result=result)
+
+    def _is_candidate(self, path: Path) -> bool:
+        return (path.suffix.lower() in self.validator.supported_extensions
+                and not path.name.startswith(IGNORED_PREFIXES)
+                and path.is_file())
+
+    def _load_state(self) -> Dict[str, str]:
+        if self.state_file.exists():
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        return {}
+
+    def _save_state(self):
+        self.state_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = self.state_file.with_suffix(".tmp")
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(self.known_hashes, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_file, self.state_file)
+
+    def _emit(self, event: str, **fields):
+        if self.on_event:
+            self.on_event(event, **fields)
+
+metrics.describe("watch_documents_total", "监视模式下验证的文档数（按结果）")
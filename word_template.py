@@ -0,0 +1,204 @@
+# ==================== word_template.py ====================
+import io
+import re
+import threading
+from typing import Dict, List, Optional, Sequence
+from xml.sax.saxutils import escape
+
+from docx import Document
+from docx.enum.text import WD_ALIGN_PARAGRAPH
+from docx.oxml import OxmlElement, parse_xml
+from lxml import etree
+
+from models import ValidationResult
+
+# 模板中的占位段落，整段替换为批量生成的XML
+PLACEHOLDERS = ("document_info", "summary", "missing_analysis", "detail_list", "suggestions")
+
+TABLE_STYLE_ID = "LightGrid-Accent1"
+BULLET_STYLE_ID = "ListBullet"
+TEXT_WIDTH_TWIPS = 8640
+DEFAULT_DETAIL_LIMIT = 10
+
+# XML 1.0 不允许的控制字符
+_INVALID_XML_CHARS = re.compile(r'[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+def _text(value) -> str:
+    return escape(_INVALID_XML_CHARS.sub('', str(value)))
+
+def _run(value) -> str:
+    return f'<w:r><w:t xml:space="preserve">{_text(value)}</w:t></w:r>'
+
+def _paragraph(value: str = "", style_id: Optional[str] = None) -> str:
+    props = f'<w:pPr><w:pStyle w:val="{style_id}"/></w:pPr>' if style_id else ''
+    run = _run(value) if value else ''
+    return f'<w:p>{props}{run}</w:p>'
+
+def _table(rows: Sequence[Sequence], center: bool = False) -> str:
+    col_count = len(rows[0])
+    col_width = TEXT_WIDTH_TWIPS // col_count
+    cell_props = f'<w:tcPr><w:tcW w:type="dxa" w:w="{col_width}"/></w:tcPr>'
+
+    parts = [
+        '<w:tbl><w:tblPr>',
+        f'<w:tblStyle w:val="{TABLE_STYLE_ID}"/><w:tblW w:type="auto" w:w="0"/>',
+        '<w:jc w:val="center"/>' if center else '',
+        '<w:tblLook w:firstColumn="1" w:firstRow="1" w:lastColumn="0" w:lastRow="0" '
+        'w:noHBand="0" w:noVBand="1" w:val="04A0"/>',
+        '</w:tblPr><w:tblGrid>',
+        f'<w:gridCol w:w="{col_width}"/>' * col_count,
+        '</w:tblGrid>'
+    ]
+    for row in rows:
+        parts.append('<w:tr>')
+        for value in row:
+            parts.append(f'<w:tc>{cell_props}<w:p>{_run(value)}</w:p></w:tc>')
+        parts.append('</w:tr>')
+    parts.append('</w:tbl>')
+    return ''.join(parts)
+
+class WordTemplateReportBuilder:
+    """基于模板的Word报告生成器
+
+    模板为普通.docx文件，其中包含独占一段的占位符
+    {{document_info}} {{summary}} {{missing_analysis}} {{detail_list}} {{suggestions}}，
+    渲染时每个占位段落被一次性解析的XML片段整体替换，避免逐单元格调用python-docx。
+    未指定模板时使用内置默认模板。
+    """
+
+    _default_template: Optional[bytes] = None
+    _default_lock = threading.Lock()
+
+    def __init__(self, template_path: Optional[str] = None):
+        if template_path:
+            with open(template_path, 'rb') as f:
+                self.template_bytes = f.read()
+        else:
+            self.template_bytes = self.default_template()
+
+    @classmethod
+    def default_template(cls) -> bytes:
+        with cls._default_lock:
+            if cls._default_template is None:
+                cls._default_template = cls._build_default_template()
+            return cls._default_template
+
+    @staticmethod
+    def _build_default_template() -> bytes:
+        doc = Document()
+        title_para = doc.add_heading("需求完整性验证报告", level=0)
+        title_para.alignment = WD_ALIGN_PARAGRAPH.CENTER
+        doc.add_paragraph()
+
+        headings = ['一、文档基本信息', '二、完整性验证摘要', '三、缺失要素分析', '四、详细缺失清单', '五、整改建议']
+        for heading, placeholder in zip(headings, PLACEHOLDERS):
+            doc.add_heading(heading, level=1)
+            doc.add_paragraph(f"{{{{{placeholder}}}}}")
+
+        buffer = io.BytesIO()
+        doc.save(buffer)
+        return buffer.getvalue()
+
+    def render(self, result: ValidationResult, output_path: str,
+               detail_limit: Optional[int] = DEFAULT_DETAIL_LIMIT):
+        """渲染报告，detail_limit为None时输出完整缺失清单"""
+        doc = Document(io.BytesIO(self.template_bytes))
+
+        fragments = {
+            "document_info": self._document_info_xml(result),
+            "summary": self._summary_xml(result),
+            "missing_analysis": self._missing_analysis_xml(result),
+            "detail_list": self._detail_list_xml(result, detail_limit),
+            "suggestions": self._suggestions_xml(result)
+        }
+
+        # 跨文档移动大量lxml节点的开销随节点数超线性增长，
+        # 因此先把占位段落换成标记段落，再在序列化后的XML字符串上整体拼接，最后只解析一次
+        markers = {}
+        for placeholder, paragraph in self._find_placeholders(doc).items():
+            marker = f"@@REPORT_PLACEHOLDER_{placeholder}@@"
+            p_element = paragraph._p
+            p_element.attrib.clear()
+            for child in list(p_element):
+                p_element.remove(child)
+            run = OxmlElement('w:r')
+            text = OxmlElement('w:t')
+            text.text = marker
+            run.append(text)
+            p_element.append(run)
+            markers[placeholder] = f'<w:p><w:r><w:t>{marker}</w:t></w:r></w:p>'
+
+        document_part = doc.part
+        document_xml = etree.tostring(document_part.element, encoding='unicode')
+        for placeholder, marker_xml in markers.items():
+            document_xml = document_xml.replace(marker_xml, fragments[placeholder], 1)
+        document_part._element = parse_xml(document_xml)
+
+        doc.save(output_path)
+
+    def _find_placeholders(self, doc) -> Dict[str, object]:
+        found = {}
+        for paragraph in doc.paragraphs:
+            text = paragraph.text.strip()
+            if text.startswith("{{") and text.endswith("}}") and text[2:-2] in PLACEHOLDERS:
+                found[text[2:-2]] = paragraph
+        return found
+
+    def _document_info_xml(self, result: ValidationResult) -> str:
+        rows = [
+            ('文档名称', result.document_name),
+            ('文档ID', result.document_id),
+            ('验证耗时', f"{result.validation_time:.2f} 秒")
+        ]
+        if result.partial:
+            rows.append(result.partial_note)
+        return _table(rows, center=True) + _paragraph()
+
+    def _summary_xml(self, result: ValidationResult) -> str:
+        rows = [
+            ('总需求数', '完整需求数', '完整性得分'),
+            (result.total_requirements, result.complete_requirements, f"{result.completeness_score:.2f}%")
+        ]
+        return _table(rows) + _paragraph()
+
+    def _missing_analysis_xml(self, result: ValidationResult) -> str:
+        if not result.missing_elements_by_type:
+            return _paragraph("未发现缺失要素，需求完整性良好。")
+
+        rows = [('需求类型', '缺失要素类型', '数量')]
+        for req_type, missing_dict in result.missing_elements_by_type.items():
+            for element_type, count in missing_dict.items():
+                rows.append((req_type, element_type, count))
+        return _table(rows) + _paragraph()
+
+    def _detail_list_xml(self, result: ValidationResult, detail_limit: Optional[int]) -> str:
+        incomplete_reqs = [r for r in result.requirements_details if r.missing_elements]
+        if not incomplete_reqs:
+            return _paragraph("无缺失要素需求。")
+
+        if detail_limit is not None:
+            incomplete_reqs = incomplete_reqs[:detail_limit]
+
+        parts: List[str] = []
+        for i, req in enumerate(incomplete_reqs, 1):
+            parts.append(_paragraph(f"{i}. 需求ID: {req.id}", BULLET_STYLE_ID))
+            parts.append(_paragraph(f"   描述: {req.text[:100]}..."))
+            parts.append(_paragraph(f"   缺失要素: {', '.join(req.missing_elements)}"))
+            parts.append(_paragraph())
+        return ''.join(parts)
+
+    def _suggestions_xml(self, result: ValidationResult) -> str:
+        all_suggestions = []
+        for req in result.requirements_details:
+            all_suggestions.extend(req.improvement_suggestions)
+
+        unique_suggestions = sorted(list(set(all_suggestions)), key=len, reverse=True)[:10]
+        if not unique_suggestions:
+            return _paragraph("暂无具体整改建议。")
+
+        parts = [
+            _paragraph(f"{i}. {suggestion}", BULLET_STYLE_ID)
+            for i, suggestion in enumerate(unique_suggestions, 1)
+        ]
+        parts.append(_paragraph())
+        return ''.join(parts)